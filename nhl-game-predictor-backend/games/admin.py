@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Franchise, Season, Team, TeamData, Game, GamePrediction
+from .models import Franchise, Season, Team, TeamData, Game, GamePrediction, BackfillJob, BackfillJobUnit
 
 @admin.register(Franchise)
 class FranchiseAdmin(admin.ModelAdmin):
@@ -61,11 +61,11 @@ class GameAdmin(admin.ModelAdmin):
     is_completed.short_description = 'Completed'
 
     def home_game_number_display(self, obj: Game):
-        return obj.home_team_game_number()
+        return obj.home_team_game_number
     home_game_number_display.short_description = 'Home Team Game #'
 
     def away_game_number_display(self, obj: Game):
-        return obj.away_team_game_number()
+        return obj.away_team_game_number
     away_game_number_display.short_description = 'Away Team Game #'
 
 
@@ -105,3 +105,21 @@ class GamePredictionAdmin(admin.ModelAdmin):
             'fields': ('display_top_features',),
         }),
     )
+
+class BackfillJobUnitInline(admin.TabularInline):
+    """
+    display of a BackfillJob's units on its admin page
+    """
+    model = BackfillJobUnit
+    extra = 0
+    readonly_fields = ('season', 'unit_key', 'completed_at', 'games_created', 'api_calls', 'elapsed_seconds')
+
+@admin.register(BackfillJob)
+class BackfillJobAdmin(admin.ModelAdmin):
+    """
+    display of the BackfillJob model class on the admin page
+    """
+    list_display = ('id', 'mode', 'seasons', 'created_at', 'completed_at', 'games_created', 'api_calls', 'elapsed_seconds')
+    list_filter = ('mode',)
+    readonly_fields = ('created_at', 'updated_at', 'completed_at', 'games_created', 'api_calls', 'elapsed_seconds')
+    inlines = (BackfillJobUnitInline,)
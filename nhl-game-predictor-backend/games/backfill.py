@@ -0,0 +1,400 @@
+import asyncio
+import httpx
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta, datetime
+from games.models import BackfillJob, BackfillJobUnit
+from games.reference_data import reference_data
+from games.nhl_api import nhl_api_client, is_settled_date, NHLAPIError, NHLAPIOfflineError
+from games.data_loader import STANDINGS_CACHE, check_standings_source_for_fetch_phase, get_standings_date, write_games_batch, fetch_games_for_team_from_api, fetch_games_for_schedule_week_from_api, get_season_schedule_weeks, convert_schedule_games_json_to_game_data_objects, load_team_data_for_dates_from_api, assign_team_data_to_games, get_season_end_date, get_dated_games_json_from_schedule
+
+
+class BackfillFetchError(NHLAPIError):
+    """
+    raised by a backfill once the games of every request that succeeded have been written,
+    when some of its requests still failed after their retries. failed_urls maps each of
+    those URLs to its error, and games is the list of Game instances that were written
+    """
+
+    def __init__(self, failed_urls : dict, games : list):
+        self.failed_urls = failed_urls
+        self.games = games
+        super().__init__(f"{len(failed_urls)} requests to the NHL API failed: {', '.join(failed_urls)}")
+
+
+async def fetch_json(client : httpx.AsyncClient, semaphore : asyncio.Semaphore, url : str) -> dict:
+    """
+    requests a single URL from the NHL API, waiting for the semaphore so that
+    no more than the configured number of requests are in flight at once.
+    returns the JSON body of the response
+    """
+    async with semaphore:
+        response = await nhl_api_client.async_get(client=client, url=url)
+
+    if response.status_code != 200:
+        raise NHLAPIError(f"Request to {url} returned status code {response.status_code}")
+
+    return response.json()
+
+async def fetch_all_json(urls : list, max_concurrent_requests : int) -> tuple:
+    """
+    concurrently requests every URL in urls, returning a list of JSON responses in the
+    same order as the provided URLs, along with a dictionary that maps the URL of every
+    request that still failed after its retries to its error. the response of a failed
+    request is None, so one failure does not discard the responses of every other request
+    """
+    semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    async with nhl_api_client.async_client() as client:
+        results = await asyncio.gather(*(fetch_json(client=client, semaphore=semaphore, url=url) for url in urls),
+                                       return_exceptions=True)
+
+    responses = []
+    failed_urls = {}
+    for url, result in zip(urls, results):
+        if isinstance(result, (NHLAPIError, NHLAPIOfflineError)):
+            failed_urls[url] = result
+            responses.append(None)
+        elif isinstance(result, BaseException):
+            # anything other than a failed request is a bug, so it is not collected
+            raise result
+        else:
+            responses.append(result)
+
+    return responses, failed_urls
+
+def fetch_standings_for_dates(data_capture_dates : list, max_concurrent_requests : int) -> dict:
+    """
+    concurrently fetches the league standings for every date that has not already been
+    memoized by fetch_standings_for_date. returns a dictionary that maps each standings
+    date to its standings, which is passed to the TeamData builders (see
+    load_team_data_for_dates_from_api) rather than stored in the bounded memo, so that
+    no prefetched date is discarded before it is used
+    """
+
+    # dates outside of a regular season share the standings of another date, or have none
+    standings_dates = set(get_standings_date(date) for date in data_capture_dates)
+    standings_dates.discard(None)
+
+    prefetched_standings = {}
+    for standings_date in standings_dates:
+        memoized_standings_json = STANDINGS_CACHE.get(standings_date)
+        if memoized_standings_json is not None:
+            prefetched_standings[standings_date] = memoized_standings_json
+
+    dates_to_fetch = sorted(standings_dates - prefetched_standings.keys())
+    standings_urls = [f"{settings.NHL_API_BASE_URL}standings/{date.strftime('%Y-%m-%d')}" for date in dates_to_fetch]
+
+    standings_responses, _ = asyncio.run(fetch_all_json(urls=standings_urls,
+                                                        max_concurrent_requests=max_concurrent_requests))
+
+    # dates whose standings could not be fetched are requested again by fetch_standings_for_date
+    for standings_date, standings_response_json in zip(dates_to_fetch, standings_responses):
+        if standings_response_json is not None:
+            prefetched_standings[standings_date] = standings_response_json.get("standings", [])
+
+    return prefetched_standings
+
+def fetch_active_team_abbreviations(seasons : list, max_concurrent_requests : int) -> tuple:
+    """
+    concurrently fetches the final regular season standings of every season, returning a
+    dictionary that maps each season ID to the abbreviations of the teams in its standings,
+    along with the requests that failed (see fetch_all_json). franchises that were defunct
+    or had not yet joined the league during a season are not part of its standings
+    """
+
+    season_end_dates = []
+    for season_id in seasons:
+        season = reference_data.season(season_id)
+        if season is None:
+            raise ValueError(f"No season found with ID {season_id}")
+        season_end_dates.append(season.regular_season_end)
+
+    standings_urls = [f"{settings.NHL_API_BASE_URL}standings/{date.strftime('%Y-%m-%d')}" for date in season_end_dates]
+    standings_responses, failed_urls = asyncio.run(fetch_all_json(urls=standings_urls,
+                                                                  max_concurrent_requests=max_concurrent_requests))
+
+    team_abbreviations_by_season = {}
+    for season_id, season_end_date, standings_response_json in zip(seasons, season_end_dates, standings_responses):
+        if standings_response_json is None:
+            continue
+
+        standings_json = standings_response_json.get("standings", [])
+        team_abbreviations_by_season[season_id] = [team_json.get("teamAbbrev", {}).get("default") for team_json in standings_json]
+
+        # the final standings also describe the season's playoffs, so they are memoized like fetch_standings_for_date
+        if is_settled_date(season_end_date):
+            STANDINGS_CACHE[season_end_date] = standings_json
+
+    return team_abbreviations_by_season, failed_urls
+
+def backfill_games_from_api(seasons : list, team_abbreviations : list = None, get_team_data : bool = True, max_concurrent_requests : int = None) -> list:
+    """
+    concurrent equivalent of load_games_for_all_teams_from_api. the club schedules for
+    every (team, season) pair are fetched in parallel, followed by the standings for every
+    date that TeamData is required for. all Game and TeamData instances are then written
+    to the database in a single bulk write phase.
+
+    team_abbreviations optionally restricts the teams whose schedules are fetched (by default
+    every team in the final standings of each season that is in the database), and
+    max_concurrent_requests limits the number of requests that are in flight at once
+    (by default settings.NHL_API_MAX_CONCURRENT_REQUESTS). returns the list of created
+    Game instances.
+
+    a request that fails does not abort the backfill: the games of every other request are
+    written, and a BackfillFetchError listing the failed requests is raised afterwards
+    """
+
+    if len(seasons) == 0:
+        raise ValueError(f"Please enter seasons to fetch game data for.")
+
+    check_standings_source_for_fetch_phase(get_team_data=get_team_data)
+
+    if max_concurrent_requests is None:
+        max_concurrent_requests = settings.NHL_API_MAX_CONCURRENT_REQUESTS
+
+    failed_urls = {}
+
+    # fetch phase: only the teams that played in a season have a club schedule for it
+    if team_abbreviations is None:
+        teams = reference_data.teams()
+        team_abbreviations_by_season, failed_urls = fetch_active_team_abbreviations(seasons=seasons,
+                                                                                    max_concurrent_requests=max_concurrent_requests)
+        schedule_keys = [
+            (team_abbreviation, season)
+            for season, season_team_abbreviations in team_abbreviations_by_season.items()
+            for team_abbreviation in season_team_abbreviations
+            if team_abbreviation in teams
+        ]
+    else:
+        schedule_keys = [(team_abbreviation, season) for team_abbreviation in team_abbreviations for season in seasons]
+
+    # fetch phase: every club schedule is requested concurrently
+    schedule_urls = [f"{settings.NHL_API_BASE_URL}club-schedule-season/{team_abbreviation}/{season}" for team_abbreviation, season in schedule_keys]
+    schedule_responses, failed_schedule_urls = asyncio.run(fetch_all_json(urls=schedule_urls,
+                                                                          max_concurrent_requests=max_concurrent_requests))
+    failed_urls.update(failed_schedule_urls)
+
+    # each game appears in the schedule of both of its teams, so games are deduplicated by ID
+    dated_games_json = [
+        (datetime.strptime(game_json.get("gameDate"), "%Y-%m-%d").date(), game_json)
+        for season_schedule_json in schedule_responses
+        if season_schedule_json is not None
+        for game_json in season_schedule_json.get("games", [])
+    ]
+
+    games = write_games_and_team_data(dated_games_json=dated_games_json,
+                                      get_team_data=get_team_data,
+                                      max_concurrent_requests=max_concurrent_requests)
+
+    if failed_urls:
+        raise BackfillFetchError(failed_urls=failed_urls, games=games)
+
+    return games
+
+def backfill_games_from_schedule_api(seasons : list, get_team_data : bool = True, max_concurrent_requests : int = None) -> list:
+    """
+    concurrent equivalent of load_games_for_seasons_from_schedule_api. the first week of
+    each season is requested to find the end of its playoffs, and every remaining week
+    of every season is then fetched in parallel. returns the list of created Game instances.
+
+    as with backfill_games_from_api, the games of every request that succeeded are written
+    before a BackfillFetchError listing the failed requests is raised
+    """
+
+    if len(seasons) == 0:
+        raise ValueError(f"Please enter seasons to fetch game data for.")
+
+    check_standings_source_for_fetch_phase(get_team_data=get_team_data)
+
+    if max_concurrent_requests is None:
+        max_concurrent_requests = settings.NHL_API_MAX_CONCURRENT_REQUESTS
+
+    season_instances = []
+    for season_id in seasons:
+        season = reference_data.season(season_id)
+        if season is None:
+            raise ValueError(f"No season found with ID {season_id}")
+        season_instances.append(season)
+
+    # fetch phase: the first week of each season reports when the season ends
+    first_week_urls = [f"{settings.NHL_API_BASE_URL}schedule/{season.regular_season_start.strftime('%Y-%m-%d')}" for season in season_instances]
+    first_week_responses, failed_urls = asyncio.run(fetch_all_json(urls=first_week_urls,
+                                                                   max_concurrent_requests=max_concurrent_requests))
+
+    week_keys = []
+    dated_games_json = []
+    for season, schedule_json in zip(season_instances, first_week_responses):
+        # the end of a season is unknown without its first week, so none of its weeks are requested
+        if schedule_json is None:
+            continue
+
+        season_end_date = get_season_end_date(season=season, schedule_json=schedule_json)
+        dated_games_json += get_dated_games_json_from_schedule(schedule_json=schedule_json,
+                                                               season=season,
+                                                               season_end_date=season_end_date)
+
+        week_start_date = season.regular_season_start + timedelta(days=7)
+        while week_start_date <= season_end_date:
+            week_keys.append((season, season_end_date, week_start_date))
+            week_start_date += timedelta(days=7)
+
+    # fetch phase: every remaining week is requested concurrently
+    week_urls = [f"{settings.NHL_API_BASE_URL}schedule/{week_start_date.strftime('%Y-%m-%d')}" for _, _, week_start_date in week_keys]
+    week_responses, failed_week_urls = asyncio.run(fetch_all_json(urls=week_urls,
+                                                                  max_concurrent_requests=max_concurrent_requests))
+    failed_urls.update(failed_week_urls)
+
+    schedules_json = [schedule_json for schedule_json in first_week_responses + week_responses if schedule_json is not None]
+
+    for (season, season_end_date, _), schedule_json in zip(week_keys, week_responses):
+        if schedule_json is None:
+            continue
+
+        dated_games_json += get_dated_games_json_from_schedule(schedule_json=schedule_json,
+                                                               season=season,
+                                                               season_end_date=season_end_date)
+
+    games = write_games_and_team_data(dated_games_json=dated_games_json,
+                                      get_team_data=get_team_data,
+                                      max_concurrent_requests=max_concurrent_requests,
+                                      schedules_json=schedules_json)
+
+    if failed_urls:
+        raise BackfillFetchError(failed_urls=failed_urls, games=games)
+
+    return games
+
+def write_games_and_team_data(dated_games_json : list, get_team_data : bool, max_concurrent_requests : int, schedules_json : list = None) -> list:
+    """
+    converts the fetched (game date, game JSON) pairs into Game instances, concurrently
+    fetches the standings that their TeamData requires, and writes everything to the
+    database in a single bulk write phase, along with the calendar of the weekly schedule
+    responses in schedules_json. returns the list of created Game instances
+    """
+
+    games_to_create, team_abbreviations_by_date = convert_schedule_games_json_to_game_data_objects(dated_games_json=dated_games_json,
+                                                                                                   get_team_data=get_team_data)
+
+    # fetch phase: every standings date is requested concurrently
+    prefetched_standings = fetch_standings_for_dates(data_capture_dates=team_abbreviations_by_date.keys(),
+                                                     max_concurrent_requests=max_concurrent_requests)
+
+    team_data_map, team_data_to_create = load_team_data_for_dates_from_api(team_abbreviations_by_date,
+                                                                           prefetched_standings=prefetched_standings)
+    assign_team_data_to_games(games=games_to_create, team_data_map=team_data_map)
+
+    # write phase: everything is created in a single short transaction
+    write_games_batch(games_to_create=games_to_create,
+                      team_data_to_create=team_data_to_create,
+                      schedules_json=schedules_json)
+
+    return games_to_create
+
+def count_api_calls() -> int:
+    """
+    the number of requests the NHL API client has sent over the network (excluding cache hits)
+    """
+    return sum(endpoint_stats.get("requests", 0) for endpoint_stats in nhl_api_client.stats_summary().values())
+
+def create_backfill_job(seasons : list, mode : str = BackfillJob.LEAGUE, get_team_data : bool = True, team_abbreviations : list = None) -> BackfillJob:
+    """
+    creates a BackfillJob along with its units. team jobs have one unit per team and season
+    (by default every team in the final standings of the season, see fetch_active_team_abbreviations),
+    while league jobs have one unit per week of each season's schedule
+    """
+
+    if len(seasons) == 0:
+        raise ValueError(f"Please enter seasons to fetch game data for.")
+
+    check_standings_source_for_fetch_phase(get_team_data=get_team_data)
+
+    if mode == BackfillJob.TEAM and team_abbreviations is None:
+        team_abbreviations_by_season, failed_urls = fetch_active_team_abbreviations(seasons=seasons,
+                                                                                    max_concurrent_requests=settings.NHL_API_MAX_CONCURRENT_REQUESTS)
+        if failed_urls:
+            raise BackfillFetchError(failed_urls=failed_urls, games=[])
+
+    job_units = []
+    for season_id in seasons:
+        if mode == BackfillJob.TEAM:
+            if team_abbreviations is None:
+                teams = reference_data.teams()
+                job_units += [(season_id, team_abbreviation) for team_abbreviation in team_abbreviations_by_season[season_id] if team_abbreviation in teams]
+            else:
+                job_units += [(season_id, team_abbreviation) for team_abbreviation in team_abbreviations]
+        else:
+            season = reference_data.season(season_id)
+            if season is None:
+                raise ValueError(f"No season found with ID {season_id}")
+            _, week_start_dates = get_season_schedule_weeks(season=season)
+            job_units += [(season_id, week_start_date.strftime("%Y-%m-%d")) for week_start_date in week_start_dates]
+
+    with transaction.atomic():
+        job = BackfillJob.objects.create(mode=mode,
+                                         seasons=seasons,
+                                         get_team_data=get_team_data)
+        BackfillJobUnit.objects.bulk_create([
+            BackfillJobUnit(job=job, season=season_id, unit_key=unit_key)
+            for season_id, unit_key in job_units
+        ])
+
+    return job
+
+def run_backfill_job(job : BackfillJob, on_unit_completed = None) -> BackfillJob:
+    """
+    loads the games of every unit of a BackfillJob that has not yet been completed.
+    each unit is fetched from the NHL API first, and then written in its own short
+    transaction together with its checkpoint, so the job can be resumed from the
+    last completed unit if it is interrupted.
+
+    on_unit_completed is an optional function called with each completed BackfillJobUnit
+    """
+
+    season_end_dates = {}
+    pending_units = job.units.filter(completed_at__isnull=True).order_by("season", "unit_key")
+
+    for unit in pending_units:
+        start = timezone.now()
+        start_api_calls = count_api_calls()
+
+        # fetch phase: no transaction is held while the NHL API is requested
+        if job.mode == BackfillJob.TEAM:
+            games, team_data = fetch_games_for_team_from_api(team_abbreviation=unit.unit_key,
+                                                             seasons=[unit.season],
+                                                             get_team_data=job.get_team_data)
+            schedules_json = []
+        else:
+            season = reference_data.season(unit.season)
+            if unit.season not in season_end_dates:
+                season_end_dates[unit.season], _ = get_season_schedule_weeks(season=season)
+
+            games, team_data, schedules_json = fetch_games_for_schedule_week_from_api(season=season,
+                                                                                      week_start_date=datetime.strptime(unit.unit_key, "%Y-%m-%d").date(),
+                                                                                      season_end_date=season_end_dates[unit.season],
+                                                                                      get_team_data=job.get_team_data)
+
+        # write phase: the unit's games are written together with its checkpoint
+        with transaction.atomic():
+            write_games_batch(games_to_create=games, team_data_to_create=team_data, schedules_json=schedules_json)
+
+            unit.completed_at = timezone.now()
+            unit.games_created = len(games)
+            unit.api_calls = count_api_calls() - start_api_calls
+            unit.elapsed_seconds = (unit.completed_at - start).total_seconds()
+            unit.save()
+
+            job.games_created += unit.games_created
+            job.api_calls += unit.api_calls
+            job.elapsed_seconds += unit.elapsed_seconds
+            job.save()
+
+        if on_unit_completed is not None:
+            on_unit_completed(unit)
+
+    job.completed_at = timezone.now()
+    job.save()
+
+    return job
@@ -0,0 +1,414 @@
+import statistics
+import time
+
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from datetime import timedelta
+from django.db import models
+from games.models import Game, GamePrediction, Team, TeamData, Season
+from games.nhl_api import nhl_api_client
+from games.reference_data import reference_data, empty_game_dates
+from games.data_loader import (STANDINGS_CACHE, STANDINGS_ENGINES, fetch_games_for_date, update_completed_games, load_games_for_team_from_api,
+                               load_games_for_all_teams_from_api, load_games_for_seasons_from_schedule_api,
+                               load_franchises_and_teams_data_from_api, load_seasons_from_api, rebuild_team_data_from_local_standings)
+from predictor.models import PredictionModel
+
+
+@contextmanager
+def scratch_database(keepdb : bool = False):
+    """
+    runs the enclosed code against a scratch database instead of the configured one. the scratch
+    database is created (and migrated) the way the Django test runner creates its test database,
+    and is destroyed afterwards unless keepdb is set, in which case it is reused by the next run
+    """
+    def invalidate_caches():
+        # the in-process caches hold rows of the database that was just switched from
+        STANDINGS_CACHE.clear()
+        STANDINGS_ENGINES.invalidate()
+        reference_data.invalidate()
+        empty_game_dates.invalidate()
+
+    old_database_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False, keepdb=keepdb)
+    invalidate_caches()
+    try:
+        yield connection.settings_dict["NAME"]
+    finally:
+        connection.creation.destroy_test_db(old_database_name, verbosity=0, keepdb=keepdb)
+        invalidate_caches()
+
+
+class QueryCounter:
+    """
+    database execute wrapper that counts the queries run while it is installed.
+    unlike CaptureQueriesContext, the count is not limited by the size of the query log
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class IngestionBenchmark:
+    """
+    class to represent a benchmark of the data loader entry points. the benchmark runs against
+    a scratch database (see scratch_database), so the configured database is never read, locked
+    or changed, and every scenario runs in its own savepoint that is rolled back afterwards, so
+    that each one starts from the same empty tables. the NHL API response cache is bypassed, so
+    every scenario makes the same requests to the NHL API (or a stand-in for it, see
+    games.fake_nhl_api) on every run.
+
+    for each scenario, the wall time, HTTP requests, bytes and database queries are recorded,
+    both in total and per game ingested
+    """
+
+    SCENARIOS = [
+        "fetch_games_for_date",
+        "load_games_for_team_from_api",
+        "load_games_for_all_teams_from_api",
+        "load_games_for_seasons_from_schedule_api",
+        "update_completed_games",
+    ]
+
+    def __init__(self, season_id : int, team_abbreviation : str = "TOR", days : int = 7, keepdb : bool = False):
+        self.season_id = season_id
+        self.team_abbreviation = team_abbreviation
+        self.days = days
+        self.keepdb = keepdb
+        self.season = None
+        self.database = None
+
+    def set_up(self):
+        """
+        prepares the scratch database for the scenarios: games and TeamData kept from a previous
+        run (with keepdb) are removed, and the teams and benchmarked season are loaded from the
+        NHL API if they do not exist
+        """
+        Game.objects.all().delete()
+        TeamData.objects.all().delete()
+
+        if not Team.objects.exists():
+            load_franchises_and_teams_data_from_api()
+
+        self.season = Season.objects.filter(id=self.season_id).first()
+        if self.season is None:
+            load_seasons_from_api()
+            self.season = Season.objects.filter(id=self.season_id).first()
+            if self.season is None:
+                raise ValueError(f"No season found with ID {self.season_id}")
+
+        reference_data.invalidate()
+
+    def fetch_games_for_date(self) -> int:
+        # the first week of the regular season is skipped, as with most schedule lookups after opening night
+        start_date = self.season.regular_season_start + timedelta(days=7)
+        for day in range(self.days):
+            fetch_games_for_date(date=start_date + timedelta(days=day))
+
+        return Game.objects.count()
+
+    def load_games_for_team_from_api(self) -> int:
+        return len(load_games_for_team_from_api(team_abbreviation=self.team_abbreviation,
+                                                seasons=[self.season_id]))
+
+    def load_games_for_all_teams_from_api(self) -> int:
+        load_games_for_all_teams_from_api(seasons=[self.season_id])
+        return Game.objects.count()
+
+    def load_games_for_seasons_from_schedule_api(self) -> int:
+        return len(load_games_for_seasons_from_schedule_api(seasons=[self.season_id]))
+
+    def prepare_update_completed_games(self):
+        # games loaded without TeamData have no winning team, so they are all pending
+        load_games_for_seasons_from_schedule_api(seasons=[self.season_id], get_team_data=False)
+
+    def update_completed_games(self) -> int:
+        return len(update_completed_games())
+
+    def run_scenario(self, scenario : str) -> dict:
+        """
+        runs a single scenario in a savepoint that is rolled back, and returns its measurements
+        """
+        with transaction.atomic():
+            prepare = getattr(self, f"prepare_{scenario}", None)
+            if prepare is not None:
+                prepare()
+
+            # every scenario starts without memoized standings, known empty dates or request stats
+            STANDINGS_CACHE.clear()
+            STANDINGS_ENGINES.invalidate()
+            empty_game_dates.invalidate()
+            nhl_api_client.reset_stats()
+
+            query_counter = QueryCounter()
+            with connection.execute_wrapper(query_counter):
+                start = time.perf_counter()
+                games = getattr(self, scenario)()
+                elapsed_seconds = time.perf_counter() - start
+
+            transaction.set_rollback(True)
+
+        api_stats = nhl_api_client.stats_summary().values()
+        results = {
+            "scenario": scenario,
+            "games": games,
+            "seconds": round(elapsed_seconds, 3),
+            "http_requests": sum(endpoint_stats["requests"] for endpoint_stats in api_stats),
+            "http_retries": sum(endpoint_stats["retries"] for endpoint_stats in api_stats),
+            "http_failures": sum(endpoint_stats["failures"] for endpoint_stats in api_stats),
+            "bytes": sum(endpoint_stats["bytes"] for endpoint_stats in api_stats),
+            "db_queries": query_counter.count,
+            "endpoints": nhl_api_client.stats_summary(),
+        }
+
+        for measurement in ("seconds", "http_requests", "bytes", "db_queries"):
+            results[f"{measurement}_per_game"] = round(results[measurement] / games, 4) if games else None
+        results["games_per_second"] = round(games / elapsed_seconds, 2) if elapsed_seconds else None
+
+        return results
+
+    def run(self, scenarios : list = None) -> list:
+        """
+        runs the provided scenarios (by default every scenario) and returns their measurements
+        """
+        scenarios = self.SCENARIOS if scenarios is None else scenarios
+
+        # responses are always requested, so cached responses do not skew the measurements
+        cache = nhl_api_client.cache
+        nhl_api_client.cache = None
+
+        try:
+            with scratch_database(keepdb=self.keepdb) as self.database:
+                self.set_up()
+                results = [self.run_scenario(scenario) for scenario in scenarios]
+        finally:
+            nhl_api_client.cache = cache
+
+        return results
+
+    def metadata(self) -> dict:
+        return {
+            "created_at": timezone.now().isoformat(),
+            "season": self.season_id,
+            "team": self.team_abbreviation,
+            "days": self.days,
+            "database": self.database,
+            "nhl_api_base_url": settings.NHL_API_BASE_URL,
+            "nhl_api_requests_per_second": nhl_api_client.rate_limiter.rate if nhl_api_client.rate_limiter is not None else None,
+        }
+
+
+class QueryPlanBenchmark:
+    """
+    class to represent a benchmark of the date-driven read paths of the public endpoints and
+    the data loader. each access path is explained (with EXPLAIN ANALYZE) and timed twice: with
+    the indexes of the current schema, and with the baseline schema, in which the date indexes
+    are dropped and the foreign key indexes that they replaced are restored.
+
+    by default, the access paths are measured against the games in the configured database, and
+    everything the benchmark writes (a prediction for every game and the schema changes) is rolled
+    back afterwards. when seasons are provided, the benchmark runs against a scratch database
+    instead (see scratch_database): the games of the seasons are loaded into it (from the NHL API,
+    or a stand-in for it, see games.fake_nhl_api) along with their locally computed standings, and
+    its tables are vacuumed, so that the indexes are in the state of a live database rather than
+    one that was just written
+    """
+
+    ACCESS_PATHS = [
+        "games_by_date",
+        "predictions_by_date",
+        "team_data_by_dates",
+        "team_data_by_team_and_date",
+        "unresolved_games",
+    ]
+
+    # indexes for the date-driven read paths, which are dropped for the baseline
+    INDEXES = [
+        (Game, "game_date_idx"),
+        (Game, "game_unresolved_date_idx"),
+        (TeamData, "teamdata_date_idx"),
+    ]
+
+    # foreign key indexes that are covered by a composite index, which are restored for the baseline
+    BASELINE_INDEXES = [
+        (Game, models.Index(fields=["season"], name="baseline_game_season_idx")),
+        (TeamData, models.Index(fields=["team"], name="baseline_teamdata_team_idx")),
+        (GamePrediction, models.Index(fields=["game"], name="baseline_prediction_game_idx")),
+    ]
+
+    # tables read by the access paths
+    MODELS = [Game, TeamData, GamePrediction]
+
+    def __init__(self, seasons : list = None, repeat : int = 20, keepdb : bool = False):
+        self.seasons = seasons or []
+        self.repeat = repeat
+        self.keepdb = keepdb
+        self.sample = {}
+        self.dataset = {}
+        self.database = None
+
+    def load_seasons(self):
+        """
+        loads the games of the benchmarked seasons and their TeamData into the scratch database, as
+        a backfill followed by rebuild_standings would, and vacuums the tables they are written to
+        """
+        if self.database is None:
+            raise ValueError("Seasons are only loaded into a scratch database.")
+
+        if not Team.objects.exists():
+            load_franchises_and_teams_data_from_api()
+        if Season.objects.filter(id__in=self.seasons).count() < len(self.seasons):
+            load_seasons_from_api()
+        reference_data.invalidate()
+
+        load_games_for_seasons_from_schedule_api(seasons=self.seasons, get_team_data=False)
+        rebuild_team_data_from_local_standings(seasons=self.seasons)
+
+        # vacuuming is not possible in a transaction, so it runs in autocommit mode like the loaders above
+        with connection.cursor() as cursor:
+            for model in self.MODELS:
+                cursor.execute(f"VACUUM ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+    def set_up(self):
+        """
+        predicts every game that has no prediction (to be rolled back), and picks the dates and team
+        that the access paths look up: the date with the most games, the week that ends on it and the
+        team of the latest TeamData of that week
+        """
+        prediction_model = PredictionModel.objects.create(name="query plan benchmark", version=timezone.now().isoformat())
+        GamePrediction.objects.bulk_create([
+            GamePrediction(game_id=game_id, model=prediction_model)
+            for game_id in Game.objects.filter(predictions__isnull=True).values_list("id", flat=True)
+        ])
+
+        busiest_date = Game.objects.values("game_date").annotate(games=models.Count("id")).order_by("-games", "-game_date").first()
+        if busiest_date is None:
+            raise ValueError("There are no games to benchmark the read paths with.")
+
+        date = busiest_date["game_date"]
+        dates = [date - timedelta(days=day) for day in range(7)]
+        team_data = TeamData.objects.filter(data_capture_date__in=dates).order_by("-data_capture_date", "team").first()
+
+        self.sample = {
+            "date": date,
+            "dates": dates,
+            "team_id": team_data.team_id if team_data is not None else None,
+            "team_data_date": team_data.data_capture_date if team_data is not None else date,
+            "today": timezone.localdate(),
+        }
+        self.dataset = {
+            "games": Game.objects.count(),
+            "team_data": TeamData.objects.count(),
+            "unresolved_games": Game.objects.filter(winning_team__isnull=True, game_date__lt=self.sample["today"]).count(),
+            "predictions": GamePrediction.objects.count(),
+        }
+
+        self.analyze()
+
+    def analyze(self):
+        """
+        refreshes the planner statistics of the benchmarked tables
+        """
+        with connection.cursor() as cursor:
+            for model in self.MODELS:
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+    def use_baseline_indexes(self):
+        # indexes cannot be changed while the foreign keys of the new predictions have deferred checks
+        connection.check_constraints()
+
+        with connection.schema_editor() as schema_editor:
+            for model, index_name in self.INDEXES:
+                schema_editor.remove_index(model, next(index for index in model._meta.indexes if index.name == index_name))
+            for model, index in self.BASELINE_INDEXES:
+                schema_editor.add_index(model, index)
+
+        self.analyze()
+
+    def games_by_date(self):
+        return Game.objects.filter(game_date=self.sample["date"])
+
+    def predictions_by_date(self):
+        return GamePrediction.objects.filter(game__game_date=self.sample["date"])
+
+    def team_data_by_dates(self):
+        return TeamData.objects.filter(data_capture_date__in=self.sample["dates"]).select_related("team")
+
+    def team_data_by_team_and_date(self):
+        return TeamData.objects.filter(team_id=self.sample["team_id"], data_capture_date=self.sample["team_data_date"])
+
+    def unresolved_games(self):
+        return Game.objects.filter(winning_team__isnull=True, game_date__lt=self.sample["today"]).select_related("home_team", "away_team")
+
+    def measure(self, access_path : str) -> dict:
+        """
+        explains and times a single access path, returning its plan and latencies
+        """
+        queryset = getattr(self, access_path)()
+        plan = queryset.explain(analyze=True, buffers=True)
+
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            rows = len(list(queryset.all()))
+            timings.append(time.perf_counter() - start)
+
+        return {
+            "access_path": access_path,
+            "rows": rows,
+            "median_ms": round(statistics.median(timings) * 1000, 3),
+            "min_ms": round(min(timings) * 1000, 3),
+            "plan": plan,
+        }
+
+    def run(self, access_paths : list = None) -> dict:
+        """
+        measures the provided access paths (by default every access path) with the current and the
+        baseline indexes, and returns the measurements of each schema
+        """
+        access_paths = self.ACCESS_PATHS if access_paths is None else access_paths
+
+        if not self.seasons:
+            self.database = connection.settings_dict["NAME"]
+            return self.measure_access_paths(access_paths)
+
+        cache = nhl_api_client.cache
+        nhl_api_client.cache = None
+        try:
+            with scratch_database(keepdb=self.keepdb) as self.database:
+                self.load_seasons()
+                return self.measure_access_paths(access_paths)
+        finally:
+            nhl_api_client.cache = cache
+
+    def measure_access_paths(self, access_paths : list) -> dict:
+        """
+        measures the provided access paths with the current and the baseline indexes, in a
+        transaction that is rolled back
+        """
+        with transaction.atomic():
+            self.set_up()
+            results = {"indexed": [self.measure(access_path) for access_path in access_paths]}
+
+            self.use_baseline_indexes()
+            results["baseline"] = [self.measure(access_path) for access_path in access_paths]
+
+            transaction.set_rollback(True)
+
+        return results
+
+    def metadata(self) -> dict:
+        return {
+            "created_at": timezone.now().isoformat(),
+            "seasons": self.seasons,
+            "database": self.database,
+            "repeat": self.repeat,
+            **self.dataset,
+            "date": self.sample["date"].isoformat() if self.sample else None,
+            "team_id": self.sample.get("team_id"),
+        }
@@ -1,15 +1,20 @@
 import os
-import httpx
 import django
+import threading
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "nhl_game_predictor")
 django.setup()
 
 from django.conf import settings
-from games.models import Franchise, Team, Game, TeamData, Season
+from games.models import Franchise, Team, Game, TeamData, Season, StandingsSnapshot, hash_game_json, TEAM_DATA_STAT_FIELDS
+from games.nhl_api import nhl_api_client, is_settled_date, NHLAPIError, NHLAPIOfflineError
+from games.reference_data import reference_data, empty_game_dates
+from games.standings_engine import StandingsEngine, is_completed_game
+from predictor.ml_models.utils import update_game_feature_vectors
 from django.utils import timezone
 from datetime import timedelta, datetime
-from django.db import transaction
+from django.db import transaction, connection
+from collections import defaultdict, OrderedDict
 
 # mapping from API-provided strings to integer values for GameData model class
 RESULT_MAP = {
@@ -22,10 +27,232 @@ RESULT_MAP = {
 # reverse results map
 REVERSE_RESULT_MAP = {v: k for k, v in RESULT_MAP.items()}
 
-def convert_game_json_to_game_data_objects(game_json : dict, date_string : str, get_team_data : bool = False):
+# upper bound on the length of the playoffs, used when the NHL API does not report when they end
+PLAYOFFS_MAX_DURATION = timedelta(days=75)
+
+# upper bound on the length of the preseason, used to find the season that a date before a regular season belongs to
+PRESEASON_MAX_DURATION = timedelta(days=45)
+
+# the dates of a season reported by the schedule endpoint, which are stored in Season.season_json
+SEASON_CALENDAR_KEYS = ["preSeasonStartDate", "regularSeasonStartDate", "regularSeasonEndDate", "playoffEndDate"]
+
+# fields that are refreshed when a TeamData or Game being written already exists in the database
+TEAM_DATA_UPSERT_FIELDS = ["standings_snapshot", *TEAM_DATA_STAT_FIELDS]
+GAME_UPSERT_FIELDS = ["game_json", "game_json_hash", "game_date", "season", "game_type", "winning_team", "home_team_data", "away_team_data"]
+
+# Game fields that are only refreshed when the game being written has a value for them, so that
+# a game written without its result or TeamData (e.g. with get_team_data=False) keeps the stored ones
+GAME_UPSERT_NULLABLE_FIELDS = ["winning_team", "home_team_data", "away_team_data"]
+
+# numbers each team's games within every (team, season, game type) with a window function, where playoff
+# games continue from the team's number of regular season games. team_games_filter restricts the team
+# seasons that are numbered, and only games whose numbers change are written
+GAME_NUMBERS_SQL = """
+WITH team_games AS (
+    SELECT id, season_id, home_team_id AS team_id, TRUE AS is_home, game_type, game_date
+    FROM games_game
+    UNION ALL
+    SELECT id, season_id, away_team_id AS team_id, FALSE AS is_home, game_type, game_date
+    FROM games_game
+),
+numbered_team_games AS (
+    SELECT id, is_home,
+           ROW_NUMBER() OVER (PARTITION BY team_id, season_id, game_type ORDER BY game_date, id)
+           + CASE WHEN game_type = %(playoffs)s
+                  THEN COUNT(*) FILTER (WHERE game_type = %(regular_season)s) OVER (PARTITION BY team_id, season_id)
+                  ELSE 0 END AS game_number
+    FROM team_games
+    WHERE {team_games_filter}
+),
+game_numbers AS (
+    SELECT id,
+           MAX(game_number) FILTER (WHERE is_home) AS home_team_game_number,
+           MAX(game_number) FILTER (WHERE NOT is_home) AS away_team_game_number
+    FROM numbered_team_games
+    GROUP BY id
+)
+UPDATE games_game
+SET home_team_game_number = COALESCE(game_numbers.home_team_game_number, games_game.home_team_game_number),
+    away_team_game_number = COALESCE(game_numbers.away_team_game_number, games_game.away_team_game_number)
+FROM game_numbers
+WHERE games_game.id = game_numbers.id
+  AND (games_game.home_team_game_number IS DISTINCT FROM COALESCE(game_numbers.home_team_game_number, games_game.home_team_game_number)
+       OR games_game.away_team_game_number IS DISTINCT FROM COALESCE(game_numbers.away_team_game_number, games_game.away_team_game_number))
+"""
+
+def update_game_numbers(games : list = None, seasons : list = None) -> int:
+    """
+    recomputes the stored game numbers (see Game.home_team_game_number) in a single UPDATE
+    statement. when games are provided, every game in the seasons of their home and away
+    teams is renumbered, so games ingested out of order shift the numbers of later games.
+    otherwise, every game of the provided seasons (or of every season) is renumbered.
+    returns the number of games whose numbers changed
+    """
+    params = {"regular_season": Game.REGULAR_SEASON, "playoffs": Game.PLAYOFFS}
+
+    if games is not None:
+        team_seasons = set()
+        for game in games:
+            if game.season_id is not None:
+                team_seasons.update([(game.home_team_id, game.season_id), (game.away_team_id, game.season_id)])
+
+        if not team_seasons:
+            return 0
+
+        team_games_filter = "(team_id, season_id) IN (SELECT * FROM UNNEST(%(team_ids)s::bigint[], %(season_ids)s::bigint[]))"
+        params["team_ids"] = [team_id for team_id, _ in team_seasons]
+        params["season_ids"] = [season_id for _, season_id in team_seasons]
+    elif seasons is not None:
+        team_games_filter = "season_id = ANY(%(season_ids)s::bigint[])"
+        params["season_ids"] = list(seasons)
+    else:
+        team_games_filter = "TRUE"
+
+    with connection.cursor() as cursor:
+        cursor.execute(GAME_NUMBERS_SQL.format(team_games_filter=team_games_filter), params)
+        return cursor.rowcount
+
+def upsert_standings_snapshots(team_data_list : list) -> list:
+    """
+    writes the unsaved StandingsSnapshot instances referenced by the provided TeamData. a
+    snapshot that already exists for its standings date is reused rather than rewritten, and
+    the rest are written in a single INSERT ... ON CONFLICT (standings_date) DO UPDATE statement.
+    the primary key of every referenced snapshot is set. returns the list of written snapshots
+    """
+
+    # a statement can only upsert each standings date once
+    snapshots_by_date = {}
+    for team_data in team_data_list:
+        if team_data is not None and team_data.standings_snapshot is not None and team_data.standings_snapshot.pk is None:
+            snapshots_by_date.setdefault(team_data.standings_snapshot.standings_date, team_data.standings_snapshot)
+
+    if not snapshots_by_date:
+        return []
+
+    existing_snapshots = StandingsSnapshot.objects.only("id", "standings_date").in_bulk(list(snapshots_by_date.keys()),
+                                                                                       field_name="standings_date")
+    for standings_date, existing_snapshot in existing_snapshots.items():
+        snapshots_by_date[standings_date].pk = existing_snapshot.pk
+
+    snapshots_to_write = StandingsSnapshot.objects.bulk_create([snapshot for snapshot in snapshots_by_date.values() if snapshot.pk is None],
+                                                               update_conflicts=True,
+                                                               unique_fields=["standings_date"],
+                                                               update_fields=["standings_json"])
+
+    # duplicate instances share the primary key of the instance that was written
+    for team_data in team_data_list:
+        if team_data is not None and team_data.standings_snapshot is not None and team_data.standings_snapshot.pk is None:
+            team_data.standings_snapshot.pk = snapshots_by_date[team_data.standings_snapshot.standings_date].pk
+
+    return snapshots_to_write
+
+def upsert_team_data(team_data_list : list) -> list:
+    """
+    writes unsaved TeamData instances in a single INSERT ... ON CONFLICT (team, data_capture_date)
+    DO UPDATE statement, so TeamData written in the meantime (by a re-run or a concurrent caller)
+    is refreshed rather than raising an IntegrityError. the primary key of every provided
+    instance is set from the statement, and instances that are already saved are skipped.
+    the standings snapshots that the TeamData reference are written first, and the statistic
+    columns of each instance are set from its standings.
+    returns the list of written TeamData instances
+    """
+
+    # a statement can only upsert each (team, data capture date) once
+    team_data_by_key = {}
+    for team_data in team_data_list:
+        if team_data is not None and team_data.pk is None:
+            team_data.set_stats()
+            team_data_by_key.setdefault((team_data.team_id, team_data.data_capture_date), team_data)
+
+    if not team_data_by_key:
+        return []
+
+    upsert_standings_snapshots(list(team_data_by_key.values()))
+
+    team_data_to_write = TeamData.objects.bulk_create(list(team_data_by_key.values()),
+                                                      update_conflicts=True,
+                                                      unique_fields=["team", "data_capture_date"],
+                                                      update_fields=TEAM_DATA_UPSERT_FIELDS)
+
+    # duplicate instances share the primary key of the instance that was written
+    for team_data in team_data_list:
+        if team_data is not None and team_data.pk is None:
+            team_data.pk = team_data_by_key[(team_data.team_id, team_data.data_capture_date)].pk
+
+    return team_data_to_write
+
+def upsert_games(games : list) -> list:
+    """
+    writes Game instances with INSERT ... ON CONFLICT (id) DO UPDATE statements, so games
+    written in the meantime (by a re-run or a concurrent caller) are refreshed rather than
+    raising an IntegrityError. the GAME_UPSERT_NULLABLE_FIELDS that a game has no value for
+    are not refreshed, so games are grouped by the fields that are written, with one statement
+    per group. returns the list of written Game instances
+    """
+
+    games_by_id = {game.id: game for game in games}
+
+    if not games_by_id:
+        return []
+
+    games_by_update_fields = defaultdict(list)
+    for game in games_by_id.values():
+        # bulk_create does not call save(), so the hashes of the payloads are set here
+        game.game_json_hash = hash_game_json(game.game_json)
+
+        update_fields = tuple(field for field in GAME_UPSERT_FIELDS
+                              if field not in GAME_UPSERT_NULLABLE_FIELDS or getattr(game, f"{field}_id") is not None)
+        games_by_update_fields[update_fields].append(game)
+
+    written_games = []
+    for update_fields, games_to_write in games_by_update_fields.items():
+        written_games += Game.objects.bulk_create(games_to_write,
+                                                  update_conflicts=True,
+                                                  unique_fields=["id"],
+                                                  update_fields=list(update_fields))
+
+    return written_games
+
+@transaction.atomic
+def write_games_batch(games_to_create : list, team_data_to_create : list, schedules_json : list = None) -> list:
+    """
+    write phase of the data loaders: writes the TeamData and Game instances built by a
+    fetch phase in a single short transaction. requests to the NHL API are all made
+    before the transaction is opened, so it is only held for the bulk writes.
+    the game numbers of the teams whose games were written, and the feature vectors of the games
+    and of the games that reference the TeamData, are updated in the same transaction, and the
+    standings engines of the written seasons are discarded. returns the list of written Game instances.
+
+    schedules_json optionally lists the weekly schedule responses that the fetch phase requested,
+    whose calendar (see record_schedule_calendar) is recorded in the same transaction, so that
+    the fetch phase does not write to the database
+    """
+    if schedules_json:
+        record_schedule_calendar(schedules_json)
+
+    upsert_team_data(team_data_to_create)
+    written_games = upsert_games(games_to_create)
+    update_game_numbers(games=written_games)
+    update_game_feature_vectors(games=written_games, team_data=team_data_to_create)
+    STANDINGS_ENGINES.invalidate(season_ids={game.season_id for game in written_games})
+
+    return written_games
+
+def get_existing_game_ids(games_json : list) -> set:
+    """
+    returns the set of IDs of the provided game JSONs that already
+    exist in the database, using a single query
+    """
+    game_ids = [game_json.get("id") for game_json in games_json]
+    return set(Game.objects.filter(id__in=game_ids).values_list("id", flat=True))
+
+def convert_game_json_to_game_data_objects(game_json : dict, date_string : str, get_team_data : bool = False, existing_game_ids : set = None):
     """
     converts a single game's JSON from the NHL API into Game and TeamData
     Django model instances. Optionally, TeamData instances are created as well.
+
+    existing_game_ids is an optional set of game IDs already in the database (see
+    get_existing_game_ids). when converting many games, it replaces a query per game
     """
 
     game_id = game_json.get("id")
@@ -37,17 +264,20 @@ def convert_game_json_to_game_data_objects(game_json : dict, date_string : str,
     home_team_goals = home_team_json.get("score", 0)
     away_team_goals = away_team_json.get("score", 0)
 
+    if existing_game_ids is None:
+        existing_game_ids = get_existing_game_ids([game_json])
+
     # only create game data when it doesn't already exist
     game = None
     home_team_data = None
     away_team_data = None
-    if Game.objects.filter(id=game_id).count() == 0:
+    if game_id not in existing_game_ids:
 
         away_team_abbreviation = away_team_json.get("abbrev")
-        away_team = Team.objects.filter(abbreviation=away_team_abbreviation).first()
+        away_team = reference_data.team(away_team_abbreviation)
 
         home_team_abbreviation = home_team_json.get("abbrev")
-        home_team = Team.objects.filter(abbreviation=home_team_abbreviation).first()
+        home_team = reference_data.team(home_team_abbreviation)
 
         # handle case where games are between an NHL team and non-NHL team (e.g., 2022010107, NSH vs SC Bern)
         if home_team is None or away_team is None:
@@ -66,10 +296,11 @@ def convert_game_json_to_game_data_objects(game_json : dict, date_string : str,
         
         # assign game to season model
         season_id = game_json.get("season")
-        season = Season.objects.filter(id=season_id).first()
+        season = reference_data.season(season_id)
         
         game = Game(id=game_id,
                     season=season,
+                    game_type=game_json.get("gameType"),
                     game_date=game_date,
                     game_json=game_json,
                     home_team=home_team,
@@ -80,13 +311,24 @@ def convert_game_json_to_game_data_objects(game_json : dict, date_string : str,
     
     return game, home_team_data, away_team_data
 
-@transaction.atomic
 def fetch_games_for_date(date : datetime, get_team_data : bool = True):
     """
     fetches game JSONs from the NHL api and create Game
     Django objects. Optionally, TeamData objects are recorded as well.
-    Returns True in the case that there are games on the given date,
-    False otherwise.
+    Returns the Games on the given date, which is empty when
+    there are no games on the given date.
+    """
+
+    # dates that are known to have no games are answered without a query or a request
+    if empty_game_dates.contains(date):
+        return Game.objects.none()
+
+    return load_games_for_date_from_api(date=date, get_team_data=get_team_data)
+
+def load_games_for_date_from_api(date : datetime, get_team_data : bool = True):
+    """
+    loads the Games on the given date, creating them (and optionally
+    their TeamData) from the NHL API if they are not yet in the database
     """
 
     # first check to see if the games already exist before calling API
@@ -95,18 +337,20 @@ def fetch_games_for_date(date : datetime, get_team_data : bool = True):
         return games_for_date_in_db
     
     date_string = date.strftime("%Y-%m-%d")
-    schedule_url = f"https://api-web.nhle.com/v1/schedule/{date_string}"
-    schedule_response = httpx.get(schedule_url)
-    response_json = schedule_response.json()
-    games_for_date_json = response_json.get("gameWeek")[0].get("games", [])
+    schedule_url = f"{settings.NHL_API_BASE_URL}schedule/{date_string}"
+    response_json = nhl_api_client.get_json(schedule_url)
+    game_week_json = response_json.get("gameWeek", [])
+    games_for_date_json = game_week_json[0].get("games", []) if len(game_week_json) != 0 else []
     games_to_create = []
     team_data_to_create = []
+    existing_game_ids = get_existing_game_ids(games_for_date_json)
 
     # iterate over all games
     for game_json in games_for_date_json:
         game, home_team_data, away_team_data = convert_game_json_to_game_data_objects(game_json=game_json,
                                                                                       date_string=date_string,
-                                                                                      get_team_data=True)
+                                                                                      get_team_data=True,
+                                                                                      existing_game_ids=existing_game_ids)
         if game is not None:
             games_to_create.append(game)
         if home_team_data is not None:
@@ -114,12 +358,12 @@ def fetch_games_for_date(date : datetime, get_team_data : bool = True):
         if away_team_data is not None:
             team_data_to_create.append(away_team_data)
 
-    TeamData.objects.bulk_create(team_data_to_create)
-    Game.objects.bulk_create(games_to_create)
+    write_games_batch(games_to_create=games_to_create,
+                      team_data_to_create=team_data_to_create,
+                      schedules_json=[response_json])
 
     return Game.objects.filter(game_date=date)
 
-@transaction.atomic
 def load_franchises_and_teams_data_from_api():
     """
     using the official NHL API, this function gets a list of all franchises
@@ -127,12 +371,18 @@ def load_franchises_and_teams_data_from_api():
     to represent them
     """
 
-    franchise_url = f"https://api.nhle.com/stats/rest/en/team"
-    franchise_response = httpx.get(franchise_url)
-
-    franchise_json = franchise_response.json()
+    franchise_url = f"{settings.NHL_STATS_API_BASE_URL}team"
+    franchise_json = nhl_api_client.get_json(franchise_url)
     franchises_json = franchise_json.get("data", [])
 
+    create_franchises_and_teams(franchises_json)
+
+@transaction.atomic
+def create_franchises_and_teams(franchises_json : list):
+    """
+    creates a Franchise (if it does not exist) and a Team for every team
+    in the NHL stats API's team response, in a single transaction
+    """
     teams = []
     for franchise_json in franchises_json:
         franchise_id = franchise_json.get("franchiseId")
@@ -147,8 +397,10 @@ def load_franchises_and_teams_data_from_api():
     
     Team.objects.bulk_create(teams)
 
+    # bulk_create does not send post_save signals, so the index is invalidated explicitly
+    reference_data.invalidate()
+
 
-@transaction.atomic
 def load_active_team_logo_urls():
     """
     using the NHL API, load each NHL team's name, abbreviation, and logo url
@@ -162,13 +414,12 @@ def load_active_team_logo_urls():
     # first get a list of teams from the standings to get all team abbreviations
     standings_url = f"{settings.NHL_API_BASE_URL}standings/{formatted_date}"
 
-    team_standings_response = httpx.get(standings_url)
-
     # exit if API is down
-    if team_standings_response.status_code != 200:
+    try:
+        team_standings = nhl_api_client.get_json(standings_url).get("standings", [])
+    except NHLAPIError:
         return
-    
-    team_standings = team_standings_response.json().get("standings", [])
+
     teams = []
 
     for team_json in team_standings:
@@ -177,8 +428,8 @@ def load_active_team_logo_urls():
         logo_url = team_json.get("teamLogo", "")
 
         # ensure that the team doesn't already exist in the db
-        if Team.objects.filter(abbreviation=abbreviation).count() != 0:
-            team = Team.objects.filter(abbreviation=abbreviation).first()
+        team = reference_data.team(abbreviation)
+        if team is not None:
             team.logo_url = logo_url
             teams.append(team)
             
@@ -186,8 +437,288 @@ def load_active_team_logo_urls():
     # bulk create all new teams identified in above for loop
     Team.objects.bulk_update(teams, fields=['logo_url'])
 
+    # bulk_update does not send post_save signals, so the index is invalidated explicitly
+    reference_data.invalidate()
+
+
+class StandingsMemo(OrderedDict):
+    """
+    dictionary of league standings responses keyed by standings date, which holds at most
+    max_dates responses. once it is full, the response that was stored first is discarded,
+    so long backfills do not keep the standings of every season in memory
+    """
+
+    def __init__(self, max_dates : int):
+        super().__init__()
+        self.max_dates = max_dates
+        self.lock = threading.Lock()
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            super().__setitem__(key, value)
+            while len(self) > self.max_dates:
+                self.popitem(last=False)
+
+
+# league standings responses memoized by standings date. the standings endpoint
+# returns every team at once, so a single response serves all TeamData for that date
+STANDINGS_CACHE = StandingsMemo(max_dates=settings.NHL_API_STANDINGS_CACHE_SIZE)
+
+
+class StandingsEngineCache(OrderedDict):
+    """
+    dictionary of StandingsEngines keyed by season ID, which holds the engines of at most
+    max_seasons seasons. the engine of a season applies its games incrementally, so the local
+    standings of a season's dates are computed in a single pass over its games rather than one
+    pass per date. engines are discarded when games of their season are written (see invalidate)
+    """
+
+    def __init__(self, max_seasons : int):
+        super().__init__()
+        self.max_seasons = max_seasons
+        self.lock = threading.Lock()
+
+    def standings(self, season : Season, standings_date : datetime) -> list:
+        """
+        returns the standings of the season on the provided date (see StandingsEngine.standings).
+        the engine is rebuilt when the date is before a date it has already computed
+        """
+        with self.lock:
+            engine = self.pop(season.id, None)
+            if engine is None:
+                engine = StandingsEngine(season=season)
+
+            try:
+                standings_json = engine.standings(standings_date)
+            except ValueError:
+                engine = StandingsEngine(season=season)
+                standings_json = engine.standings(standings_date)
+
+            # the engine is moved to the end, so the least recently used season is discarded first
+            self[season.id] = engine
+            while len(self) > self.max_seasons:
+                self.popitem(last=False)
+
+            return standings_json
+
+    def invalidate(self, season_ids : set = None):
+        """
+        discards the engines of the provided seasons (by default every engine), whose games changed
+        """
+        with self.lock:
+            if season_ids is None:
+                self.clear()
+            else:
+                for season_id in season_ids:
+                    self.pop(season_id, None)
+
+
+# standings engines of the seasons whose standings were recently computed from the stored games
+STANDINGS_ENGINES = StandingsEngineCache(max_seasons=2)
+
+# the dates on which the seasons have been reloaded from the NHL API, so they are reloaded at most once a day
+SEASONS_REFRESHED_DATES = set()
+
+def load_seasons_from_api():
+    """
+    creates or updates a Season for every season reported by the NHL API's seasons
+    endpoint. dates that were previously stored in a season's season_json (see
+    record_season_calendar) are kept
+    """
+    seasons_url = f"{settings.NHL_API_BASE_URL}standings-season"
+    seasons_json = nhl_api_client.get_json(seasons_url).get("seasons", [])
+    existing_seasons = Season.objects.in_bulk()
+
+    seasons = []
+    for season_json in seasons_json:
+        existing_season = existing_seasons.get(season_json.get("id"))
+        existing_season_json = existing_season.season_json if existing_season is not None else {}
+        seasons.append(Season(id=season_json.get("id"),
+                              regular_season_start=datetime.strptime(season_json.get("standingsStart"), "%Y-%m-%d").date(),
+                              regular_season_end=datetime.strptime(season_json.get("standingsEnd"), "%Y-%m-%d").date(),
+                              season_json={**existing_season_json, **season_json}))
+
+    Season.objects.bulk_create(seasons,
+                               update_conflicts=True,
+                               unique_fields=["id"],
+                               update_fields=["regular_season_start", "regular_season_end", "season_json"])
+
+    # bulk_create does not send post_save signals, so the index and calendar are invalidated explicitly
+    reference_data.invalidate()
+    empty_game_dates.invalidate()
+
+def find_season_for_date(date : datetime):
+    """
+    returns the latest known Season whose preseason may have started by the provided date, or None
+    """
+    seasons = [season for season in reference_data.seasons() if season.regular_season_start - PRESEASON_MAX_DURATION <= date]
+    return max(seasons, key=lambda season: season.regular_season_start, default=None)
+
+def get_season_for_date(date : datetime):
+    """
+    returns the Season that a date belongs to, from its preseason to the start of the
+    next season's preseason. when a date falls after the regular season of every known
+    season, the seasons are reloaded from the NHL API (at most once a day), in case a
+    new season has been scheduled
+    """
+    season = find_season_for_date(date)
+    current_date = timezone.localdate()
+
+    is_after_known_seasons = season is None or (date > season.regular_season_end and reference_data.season(season.id + 10001) is None)
+    if is_after_known_seasons and current_date not in SEASONS_REFRESHED_DATES:
+        SEASONS_REFRESHED_DATES.add(current_date)
+        try:
+            load_seasons_from_api()
+        except (NHLAPIError, NHLAPIOfflineError):
+            # the known seasons are used when the seasons endpoint is unavailable
+            return season
+
+        season = find_season_for_date(date)
+
+    return season
+
+def get_standings_date(data_capture_date : datetime):
+    """
+    returns the date whose standings describe the provided date. the standings endpoint is
+    only valid between the start and end of a regular season, so preseason dates have no
+    standings (None is returned), and the playoffs and off-season are described by the final
+    standings of the regular season. dates that do not belong to a known season are unchanged
+    """
+    season = get_season_for_date(data_capture_date)
+    if season is None:
+        return data_capture_date
+
+    if data_capture_date < season.regular_season_start:
+        return None
+
+    return min(data_capture_date, season.regular_season_end)
+
+def fetch_standings_for_date(data_capture_date : datetime, prefetched_standings : dict = None) -> list:
+    """
+    fetches the league standings for a given date from the NHL API. responses
+    for settled dates (see is_settled_date) never change, so they are memoized for
+    the lifetime of the process and each date is only ever requested once.
+
+    dates outside of a regular season are not requested (see get_standings_date):
+    the preseason has blank standings, and the playoffs share the final standings.
+
+    prefetched_standings optionally maps standings dates to standings that were already
+    fetched (see games.backfill.fetch_standings_for_dates), which are used before the memo.
+
+    when settings.NHL_STANDINGS_SOURCE is "local", the standings are computed from the
+    stored games with a StandingsEngine instead of being requested from the NHL API
+    (see check_standings_source_for_fetch_phase)
+    """
+
+    standings_date = get_standings_date(data_capture_date)
+    if standings_date is None:
+        return []
+
+    if prefetched_standings is not None and standings_date in prefetched_standings:
+        return prefetched_standings[standings_date]
+
+    # local standings change whenever games are written, so they are not memoized with the
+    # responses. the standings engines they come from are discarded by the writes instead
+    if settings.NHL_STANDINGS_SOURCE == "local":
+        return compute_standings_for_date(standings_date=standings_date)
+
+    # the memo may discard a date at any time, so the response is looked up only once
+    memoized_standings_json = STANDINGS_CACHE.get(standings_date)
+    if memoized_standings_json is not None:
+        return memoized_standings_json
+
+    formatted_date = standings_date.strftime("%Y-%m-%d")
+    standings_url = f"{settings.NHL_API_BASE_URL}standings/{formatted_date}"
+
+    standings_json = nhl_api_client.get_json(standings_url).get("standings", [])
+
+    # recent standings can still change with corrected results, so only settled dates are memoized
+    if is_settled_date(standings_date):
+        STANDINGS_CACHE[standings_date] = standings_json
+
+    return standings_json
+
+def check_standings_source_for_fetch_phase(get_team_data : bool):
+    """
+    raises a ValueError when a fetch phase would create TeamData from local standings. local
+    standings are computed from the stored games, which do not include the results of the
+    games being fetched until they are written, so the TeamData would be stale. such games
+    are loaded without TeamData, and rebuild_team_data_from_local_standings is used instead
+    """
+    if get_team_data and settings.NHL_STANDINGS_SOURCE == "local":
+        raise ValueError("TeamData cannot be created from local standings while games are fetched, please load the games without TeamData and rebuild their standings.")
+
+def compute_standings_for_date(standings_date : datetime) -> list:
+    """
+    computes the league standings on the provided date from the results of the stored
+    games of its season, in the format of the NHL API standings/{date} response
+    """
+    season = get_season_for_date(standings_date)
+    if season is None:
+        return []
+
+    return STANDINGS_ENGINES.standings(season=season, standings_date=standings_date)
+
+def build_standings_snapshot(data_capture_date : datetime, standings_json : list):
+    """
+    returns an unsaved StandingsSnapshot of the league standings that describe the provided
+    date (see fetch_standings_for_date), or None if there are no standings
+    """
+    if len(standings_json) == 0:
+        return None
+
+    standings_by_team_id = {}
+    for team_standings in standings_json:
+        team = reference_data.team(team_standings.get("teamAbbrev", {}).get("default", ""))
+        if team is not None:
+            standings_by_team_id[str(team.id)] = team_standings
+
+    return StandingsSnapshot(standings_date=get_standings_date(data_capture_date),
+                             standings_json=standings_by_team_id)
+
+def get_existing_team_data_by_date(data_capture_dates : list) -> dict:
+    """
+    returns a dictionary that maps each data capture date to a dictionary of the
+    TeamData already in the database for that date, keyed by team abbreviation.
+    a single query is used for every date
+    """
+    existing_team_data_by_date = defaultdict(dict)
+    for team_data in TeamData.objects.filter(data_capture_date__in=data_capture_dates).select_related("team"):
+        existing_team_data_by_date[team_data.data_capture_date][team_data.team.abbreviation] = team_data
+
+    return existing_team_data_by_date
+
+def load_team_data_snapshot_for_date_from_api(data_capture_date : datetime, existing_team_data : dict = None, prefetched_standings : dict = None) -> dict:
+    """
+    creates TeamData instances for every team in the league standings on the
+    provided date in a single pass. returns a dictionary that maps each team's
+    abbreviation to its TeamData. TeamData that already exists in the database
+    is reused, and all other instances are returned unsaved.
+
+    existing_team_data optionally supplies the TeamData already in the database for
+    the date (see get_existing_team_data_by_date), otherwise it is queried.
+    prefetched_standings is passed to fetch_standings_for_date
+    """
+
+    if existing_team_data is None:
+        existing_team_data = get_existing_team_data_by_date([data_capture_date])[data_capture_date]
+
+    team_data_snapshot = dict(existing_team_data)
+
+    standings_json = fetch_standings_for_date(data_capture_date=data_capture_date,
+                                              prefetched_standings=prefetched_standings)
+    standings_snapshot = build_standings_snapshot(data_capture_date=data_capture_date,
+                                                  standings_json=standings_json)
+    for team_standings in standings_json:
+        abbreviation = team_standings.get("teamAbbrev", {}).get("default", "")
+        team = reference_data.team(abbreviation)
+        if team is not None and abbreviation not in team_data_snapshot:
+            team_data_snapshot[abbreviation] = TeamData(standings_snapshot=standings_snapshot,
+                                                        team=team,
+                                                        data_capture_date=data_capture_date)
+
+    return team_data_snapshot
 
-@transaction.atomic
 def load_team_data_for_date_from_api(team : Team, game_date : datetime):
     """
     creates a TeamData instance for a particular game. a TeamData
@@ -203,29 +734,24 @@ def load_team_data_for_date_from_api(team : Team, game_date : datetime):
     if previous_team_data is not None:
         return previous_team_data
 
-
-    # format the standings URL for the given date
-    formatted_date = previous_day.strftime("%Y-%m-%d")
-    standings_url = f"{settings.NHL_API_BASE_URL}standings/{formatted_date}"
-
-    standings_response = httpx.get(standings_url)
-    standings_json = standings_response.json().get("standings", [])
+    # the standings for the date are shared by every team, so they are only fetched once
+    standings_json = fetch_standings_for_date(data_capture_date=previous_day)
 
     if len(standings_json) != 0:
         for team_standings in standings_json:
             if team_standings.get("teamAbbrev", {}).get("default", "") == team.abbreviation:
-                team_data = TeamData(team_data_json=team_standings,
+                team_data = TeamData(standings_snapshot=build_standings_snapshot(data_capture_date=previous_day,
+                                                                                 standings_json=standings_json),
                                      team=team,
                                      data_capture_date=previous_day)
                 return team_data
     else:
         # if standings is blank, it is the first game of the season, so only supply date and team
         # all other fields will default to zero
-        return TeamData(team_data_json={},
+        return TeamData(standings_snapshot=None,
                         team=team,
                         data_capture_date=previous_day)
 
-@transaction.atomic
 def load_games_for_team_from_api(team_abbreviation : str, seasons : list, get_team_data : bool = True):
     """
     given the abbreviation of a team, load Game and TeamData model instances
@@ -234,17 +760,33 @@ def load_games_for_team_from_api(team_abbreviation : str, seasons : list, get_te
     the seasons parameter is a list of season IDs that are compliant with the NHL API.
     For example, the 2024-2025 season has an ID of 20242025
 
-    TeamData instances are the team's statistics a day prior to a Game
+    TeamData instances are the team's statistics a day prior to a Game.
+    returns the list of created Game instances
+    """
+    games_to_create, team_data_to_create = fetch_games_for_team_from_api(team_abbreviation=team_abbreviation,
+                                                                         seasons=seasons,
+                                                                         get_team_data=get_team_data)
+    write_games_batch(games_to_create=games_to_create, team_data_to_create=team_data_to_create)
+
+    return games_to_create
+
+def fetch_games_for_team_from_api(team_abbreviation : str, seasons : list, get_team_data : bool = True):
+    """
+    fetch phase of load_games_for_team_from_api: builds the unsaved Game and TeamData
+    instances for a team's seasons without writing to the database. returns the
+    list of Game instances and the list of TeamData instances to create
     """
 
     # get the team by its abbreviation
-    team = Team.objects.filter(abbreviation=team_abbreviation).first()
+    team = reference_data.team(team_abbreviation)
 
     if team is None:
         raise ValueError(f"No team found with abbreviation {team_abbreviation}")
     
     if len(seasons) == 0:
         raise ValueError(f"Please enter seasons to fetch game data for.")
+
+    check_standings_source_for_fetch_phase(get_team_data=get_team_data)
     
     games_to_create = []
     team_data_to_create = []
@@ -253,79 +795,371 @@ def load_games_for_team_from_api(team_abbreviation : str, seasons : list, get_te
     # used to see the completion status of a game
     current_date = timezone.localdate()
 
+    # get schedule and all games for every season
+    games_json = []
     for season in seasons:
-        # get schedule and all games for this season
         season_schedule_url = f"{settings.NHL_API_BASE_URL}club-schedule-season/{team_abbreviation}/{season}"
-        season_schedule_response = httpx.get(season_schedule_url)
-        season_schedule_json = season_schedule_response.json()
-        games_json = season_schedule_json.get("games", [])
-
-        # iterate over all games
-        for game_json in games_json:
-            game_id = game_json.get("id")
-            game_type = game_json.get("gameType")
-            game_date = datetime.strptime(game_json.get("gameDate"), "%Y-%m-%d").date()
-
-            home_team_json = game_json.get("homeTeam", {})
-            away_team_json = game_json.get("awayTeam", {})
-            home_team_goals = home_team_json.get("score", 0)
-            away_team_goals = away_team_json.get("score", 0)
-
-            # only create game data when it is not preseason game, in the past, has a winner, and doesn't already exist
-            if game_type != Game.PRESEASON and Game.objects.filter(id=game_id).count() == 0:
-
-                away_team_abbreviation = away_team_json.get("abbrev")
-                away_team = Team.objects.filter(abbreviation=away_team_abbreviation).first()
-
-                home_team_abbreviation = home_team_json.get("abbrev")
-                home_team = Team.objects.filter(abbreviation=home_team_abbreviation).first()
-
-                winning_team = None
-                home_team_data = None
-                away_team_data = None
-                if game_date < current_date and get_team_data and not (home_team_goals == 0 and away_team_goals == 0):
-                    winning_team = home_team if home_team_goals > away_team_goals else away_team
-                    home_team_data = load_team_data_for_date_from_api(team=home_team,
-                                                                      game_date=game_date)
-                    away_team_data = load_team_data_for_date_from_api(team=away_team,
-                                                                      game_date=game_date)
-                    
-
-                game = Game(id=game_id,
-                            game_date=game_date,
-                            game_json=game_json,
-                            home_team=home_team,
-                            away_team=away_team,
-                            winning_team=winning_team,
-                            home_team_data=home_team_data,
-                            away_team_data=away_team_data)
-                games_to_create.append(game)
-
-                # check if home team data already exists in list
-                if home_team_data is not None and home_team_data.pk is not None:
-                    team_data_key = (home_team.id, home_team_data.data_capture_date)
-                    if team_data_key not in existing_team_data_keys:
-                        existing_team_data_keys.add(team_data_key)
-                        team_data_to_create.append(home_team_data)
-
-                # check if away team data already exists in list
-                if away_team_data is not None and away_team_data.pk is not None:
-                    team_data_key = (away_team.id, away_team_data.data_capture_date)
-                    if team_data_key not in existing_team_data_keys:
-                        existing_team_data_keys.add(team_data_key)
-                        team_data_to_create.append(away_team_data)
-
-
-    # bulk create and update the respective games
-    TeamData.objects.bulk_create(team_data_to_create)
-    Game.objects.bulk_create(games_to_create)
+        season_schedule_json = nhl_api_client.get_json(season_schedule_url)
+        games_json += season_schedule_json.get("games", [])
+
+    # the games that already exist are found with a single query
+    existing_game_ids = get_existing_game_ids(games_json)
+
+    # iterate over all games
+    for game_json in games_json:
+        game_id = game_json.get("id")
+        game_type = game_json.get("gameType")
+        game_date = datetime.strptime(game_json.get("gameDate"), "%Y-%m-%d").date()
+
+        home_team_json = game_json.get("homeTeam", {})
+        away_team_json = game_json.get("awayTeam", {})
+        home_team_goals = home_team_json.get("score", 0)
+        away_team_goals = away_team_json.get("score", 0)
+
+        # only create game data when it is not preseason game, in the past, has a winner, and doesn't already exist
+        if game_type != Game.PRESEASON and game_id not in existing_game_ids:
+            existing_game_ids.add(game_id)
+
+            away_team_abbreviation = away_team_json.get("abbrev")
+            away_team = reference_data.team(away_team_abbreviation)
+
+            home_team_abbreviation = home_team_json.get("abbrev")
+            home_team = reference_data.team(home_team_abbreviation)
+
+            winning_team = None
+            home_team_data = None
+            away_team_data = None
+            if game_date < current_date and get_team_data and not (home_team_goals == 0 and away_team_goals == 0):
+                winning_team = home_team if home_team_goals > away_team_goals else away_team
+                home_team_data = load_team_data_for_date_from_api(team=home_team,
+                                                                  game_date=game_date)
+                away_team_data = load_team_data_for_date_from_api(team=away_team,
+                                                                  game_date=game_date)
+                
+
+            game = Game(id=game_id,
+                        season=reference_data.season(game_json.get("season")),
+                        game_type=game_type,
+                        game_date=game_date,
+                        game_json=game_json,
+                        home_team=home_team,
+                        away_team=away_team,
+                        winning_team=winning_team,
+                        home_team_data=home_team_data,
+                        away_team_data=away_team_data)
+            games_to_create.append(game)
+
+            # check if home team data already exists in list
+            if home_team_data is not None and home_team_data.pk is None:
+                team_data_key = (home_team.id, home_team_data.data_capture_date)
+                if team_data_key not in existing_team_data_keys:
+                    existing_team_data_keys.add(team_data_key)
+                    team_data_to_create.append(home_team_data)
+
+            # check if away team data already exists in list
+            if away_team_data is not None and away_team_data.pk is None:
+                team_data_key = (away_team.id, away_team_data.data_capture_date)
+                if team_data_key not in existing_team_data_keys:
+                    existing_team_data_keys.add(team_data_key)
+                    team_data_to_create.append(away_team_data)
+
+
+    return games_to_create, team_data_to_create
+
+def convert_schedule_games_json_to_game_data_objects(dated_games_json : list, get_team_data : bool = True):
+    """
+    converts (game date, game JSON) pairs from the NHL API schedule endpoints into unsaved
+    Game instances in bulk. games are deduplicated by ID, and preseason games, games that
+    already exist, and games involving non-NHL teams are skipped.
+
+    returns the Game instances along with a dictionary mapping each date that TeamData is
+    required for to the abbreviations of the teams that require it. TeamData is only
+    required for completed games, and is assigned with assign_team_data_to_games
+    """
+
+    check_standings_source_for_fetch_phase(get_team_data=get_team_data)
+
+    games_json = {}
+    for game_date, game_json in dated_games_json:
+        if game_json.get("gameType") != Game.PRESEASON:
+            games_json.setdefault(game_json.get("id"), (game_date, game_json))
+
+    existing_game_ids = get_existing_game_ids([game_json for _, game_json in games_json.values()])
+    current_date = timezone.localdate()
+
+    games_to_create = []
+    team_abbreviations_by_date = defaultdict(set)
+    for game_id, (game_date, game_json) in games_json.items():
+        if game_id in existing_game_ids:
+            continue
+
+        home_team_json = game_json.get("homeTeam", {})
+        away_team_json = game_json.get("awayTeam", {})
+        home_team_goals = home_team_json.get("score", 0)
+        away_team_goals = away_team_json.get("score", 0)
+
+        home_team = reference_data.team(home_team_json.get("abbrev"))
+        away_team = reference_data.team(away_team_json.get("abbrev"))
+
+        # handle case where games are between an NHL team and non-NHL team
+        if home_team is None or away_team is None:
+            continue
+
+        winning_team = None
+        if game_date < current_date and get_team_data and not (home_team_goals == 0 and away_team_goals == 0):
+            winning_team = home_team if home_team_goals > away_team_goals else away_team
+
+            data_capture_date = game_date - timedelta(days=1)
+            team_abbreviations_by_date[data_capture_date].update([home_team.abbreviation, away_team.abbreviation])
+
+        game = Game(id=game_id,
+                    season=reference_data.season(game_json.get("season")),
+                    game_type=game_json.get("gameType"),
+                    game_date=game_date,
+                    game_json=game_json,
+                    home_team=home_team,
+                    away_team=away_team,
+                    winning_team=winning_team)
+        games_to_create.append(game)
+
+    return games_to_create, team_abbreviations_by_date
+
+def load_team_data_for_dates_from_api(team_abbreviations_by_date : dict, prefetched_standings : dict = None):
+    """
+    creates TeamData for the provided teams on each date, using a single standings
+    snapshot per date. returns a dictionary mapping (team abbreviation, data capture date)
+    to TeamData, along with the list of TeamData instances that still need to be created.
+    prefetched_standings is passed to fetch_standings_for_date
+    """
+
+    team_data_map = {}
+    team_data_to_create = []
+    existing_team_data_by_date = get_existing_team_data_by_date(list(team_abbreviations_by_date.keys()))
+    for data_capture_date, team_abbreviations in team_abbreviations_by_date.items():
+        team_data_snapshot = load_team_data_snapshot_for_date_from_api(data_capture_date=data_capture_date,
+                                                                       existing_team_data=existing_team_data_by_date[data_capture_date],
+                                                                       prefetched_standings=prefetched_standings)
+        standings_json = fetch_standings_for_date(data_capture_date=data_capture_date,
+                                                  prefetched_standings=prefetched_standings)
+
+        for team_abbreviation in team_abbreviations:
+            team_data = team_data_snapshot.get(team_abbreviation)
+
+            # if standings is blank, it is the first game of the season, so only supply date and team
+            if team_data is None and len(standings_json) == 0:
+                team_data = TeamData(standings_snapshot=None,
+                                     team=reference_data.team(team_abbreviation),
+                                     data_capture_date=data_capture_date)
+
+            if team_data is not None and team_data.pk is None:
+                team_data_to_create.append(team_data)
+
+            team_data_map[(team_abbreviation, data_capture_date)] = team_data
+
+    return team_data_map, team_data_to_create
+
+def assign_team_data_to_games(games : list, team_data_map : dict):
+    """
+    assigns the TeamData from the day before each completed game to the game
+    """
+    for game in games:
+        if game.winning_team is not None:
+            data_capture_date = game.game_date - timedelta(days=1)
+            game.home_team_data = team_data_map.get((game.home_team.abbreviation, data_capture_date))
+            game.away_team_data = team_data_map.get((game.away_team.abbreviation, data_capture_date))
+
+def get_season_end_date(season : Season, schedule_json : dict):
+    """
+    returns the last date that games can be played in a season. the schedule endpoint
+    reports the end of the playoffs, otherwise an upper bound on the length of the playoffs is used
+    """
+    playoff_end_date = schedule_json.get("playoffEndDate")
+    if playoff_end_date is not None:
+        return datetime.strptime(playoff_end_date, "%Y-%m-%d").date()
+
+    return season.regular_season_end + PLAYOFFS_MAX_DURATION
+
+def record_season_calendar(schedule_json : dict):
+    """
+    stores the season dates reported by a weekly schedule response (such as the start of the
+    preseason and the end of the playoffs) in the season_json of the Season the week belongs to
+    """
+    regular_season_start = schedule_json.get("regularSeasonStartDate")
+    regular_season_end = schedule_json.get("regularSeasonEndDate")
+    if regular_season_start is None or regular_season_end is None:
+        return
+
+    regular_season_start = datetime.strptime(regular_season_start, "%Y-%m-%d").date()
+    regular_season_end = datetime.strptime(regular_season_end, "%Y-%m-%d").date()
+    season_calendar = {key: schedule_json.get(key) for key in SEASON_CALENDAR_KEYS if schedule_json.get(key) is not None}
+
+    for season in reference_data.seasons():
+        if season.regular_season_start <= regular_season_end and season.regular_season_end >= regular_season_start:
+            if any(season.season_json.get(key) != value for key, value in season_calendar.items()):
+                # update does not send post_save signals, so the index and calendar are invalidated explicitly
+                Season.objects.filter(id=season.id).update(season_json={**season.season_json, **season_calendar})
+                reference_data.invalidate()
+                empty_game_dates.invalidate()
+            return
+
+def record_schedule_calendar(schedules_json : list):
+    """
+    records what weekly schedule responses reveal about the calendar: the days of each
+    week without games, and the dates of the season that each week belongs to.
+
+    a day without games is only recorded once its schedule can no longer change, which is
+    when it is in the past or falls outside of its season (before the preseason or after the playoffs)
+    """
+    current_date = timezone.localdate()
+    dates_without_games = set()
+
+    for schedule_json in schedules_json:
+        record_season_calendar(schedule_json)
+
+        preseason_start_date = schedule_json.get("preSeasonStartDate")
+        playoff_end_date = schedule_json.get("playoffEndDate")
+        preseason_start_date = datetime.strptime(preseason_start_date, "%Y-%m-%d").date() if preseason_start_date is not None else None
+        playoff_end_date = datetime.strptime(playoff_end_date, "%Y-%m-%d").date() if playoff_end_date is not None else None
+
+        for game_day_json in schedule_json.get("gameWeek", []):
+            if len(game_day_json.get("games", [])) != 0:
+                continue
+
+            game_date = datetime.strptime(game_day_json.get("date"), "%Y-%m-%d").date()
+            is_outside_season = ((preseason_start_date is not None and game_date < preseason_start_date)
+                                 or (playoff_end_date is not None and game_date > playoff_end_date))
+            if game_date < current_date or is_outside_season:
+                dates_without_games.add(game_date)
+
+    empty_game_dates.record(dates_without_games)
+
+def get_dated_games_json_from_schedule(schedule_json : dict, season : Season, season_end_date : datetime) -> list:
+    """
+    extracts (game date, game JSON) pairs from a weekly schedule response for
+    every day of the week that falls within the provided season
+    """
+    dated_games_json = []
+    for game_day_json in schedule_json.get("gameWeek", []):
+        game_date = datetime.strptime(game_day_json.get("date"), "%Y-%m-%d").date()
+        if season.regular_season_start <= game_date <= season_end_date:
+            for game_json in game_day_json.get("games", []):
+                if game_json.get("season") == season.id:
+                    dated_games_json.append((game_date, game_json))
+
+    return dated_games_json
+
+def get_season_schedule_weeks(season : Season):
+    """
+    returns the last date of a season along with the start date of every week
+    in the season's schedule. the first week is requested to find the end of the playoffs.
+    nothing is written to the database: the first week is also the first week returned, so
+    its calendar is recorded when the games of that week are written
+    """
+    schedule_url = f"{settings.NHL_API_BASE_URL}schedule/{season.regular_season_start.strftime('%Y-%m-%d')}"
+    schedule_json = nhl_api_client.get_json(schedule_url)
+    season_end_date = get_season_end_date(season=season, schedule_json=schedule_json)
+
+    week_start_dates = []
+    week_start_date = season.regular_season_start
+    while week_start_date <= season_end_date:
+        week_start_dates.append(week_start_date)
+        week_start_date += timedelta(days=7)
+
+    return season_end_date, week_start_dates
+
+def load_games_for_schedule_week_from_api(season : Season, week_start_date : datetime, season_end_date : datetime, get_team_data : bool = True) -> list:
+    """
+    loads Game and optionally TeamData instances for a single week of a season's
+    schedule into the database. returns the list of created Game instances
+    """
+    games_to_create, team_data_to_create, schedules_json = fetch_games_for_schedule_week_from_api(season=season,
+                                                                                                  week_start_date=week_start_date,
+                                                                                                  season_end_date=season_end_date,
+                                                                                                  get_team_data=get_team_data)
+    write_games_batch(games_to_create=games_to_create,
+                      team_data_to_create=team_data_to_create,
+                      schedules_json=schedules_json)
+
+    return games_to_create
+
+def fetch_games_for_schedule_week_from_api(season : Season, week_start_date : datetime, season_end_date : datetime, get_team_data : bool = True):
+    """
+    fetch phase of load_games_for_schedule_week_from_api: builds the unsaved Game and
+    TeamData instances for a week of a season's schedule without writing to the database.
+    returns the list of Game instances and the list of TeamData instances to create, along
+    with the schedule responses whose calendar is recorded by write_games_batch
+    """
+    check_standings_source_for_fetch_phase(get_team_data=get_team_data)
+
+    schedule_url = f"{settings.NHL_API_BASE_URL}schedule/{week_start_date.strftime('%Y-%m-%d')}"
+    schedule_json = nhl_api_client.get_json(schedule_url)
+    dated_games_json = get_dated_games_json_from_schedule(schedule_json=schedule_json,
+                                                          season=season,
+                                                          season_end_date=season_end_date)
+
+    games_to_create, team_abbreviations_by_date = convert_schedule_games_json_to_game_data_objects(dated_games_json=dated_games_json,
+                                                                                                   get_team_data=get_team_data)
+    team_data_map, team_data_to_create = load_team_data_for_dates_from_api(team_abbreviations_by_date)
+    assign_team_data_to_games(games=games_to_create, team_data_map=team_data_map)
+
+    return games_to_create, team_data_to_create, [schedule_json]
+
+def load_games_for_seasons_from_schedule_api(seasons : list, get_team_data : bool = True) -> list:
+    """
+    league-wide alternative to load_games_for_all_teams_from_api. rather than downloading
+    every team's club schedule (which contains each game twice), the weekly schedule
+    endpoint is walked from the start of the regular season to the end of the playoffs,
+    and games are deduplicated by ID. optionally, TeamData instances are created as well.
+    returns the list of created Game instances
+    """
+
+    if len(seasons) == 0:
+        raise ValueError(f"Please enter seasons to fetch game data for.")
+
+    check_standings_source_for_fetch_phase(get_team_data=get_team_data)
+
+    dated_games_json = []
+    schedules_json = []
+    for season_id in seasons:
+        season = reference_data.season(season_id)
+        if season is None:
+            raise ValueError(f"No season found with ID {season_id}")
+
+        # each response contains a whole week, so only one date per week is requested
+        week_start_date = season.regular_season_start
+        season_end_date = None
+        while season_end_date is None or week_start_date <= season_end_date:
+            schedule_url = f"{settings.NHL_API_BASE_URL}schedule/{week_start_date.strftime('%Y-%m-%d')}"
+            schedule_json = nhl_api_client.get_json(schedule_url)
+            schedules_json.append(schedule_json)
+
+            if season_end_date is None:
+                season_end_date = get_season_end_date(season=season, schedule_json=schedule_json)
+
+            dated_games_json += get_dated_games_json_from_schedule(schedule_json=schedule_json,
+                                                                   season=season,
+                                                                   season_end_date=season_end_date)
+            week_start_date += timedelta(days=7)
+
+    games_to_create, team_abbreviations_by_date = convert_schedule_games_json_to_game_data_objects(dated_games_json=dated_games_json,
+                                                                                                   get_team_data=get_team_data)
+    team_data_map, team_data_to_create = load_team_data_for_dates_from_api(team_abbreviations_by_date)
+    assign_team_data_to_games(games=games_to_create, team_data_map=team_data_map)
+
+    write_games_batch(games_to_create=games_to_create,
+                      team_data_to_create=team_data_to_create,
+                      schedules_json=schedules_json)
+
+    return games_to_create
 
-@transaction.atomic
 def load_games_for_all_teams_from_api(seasons : list, get_team_data : bool = True):
     """
     given a list of season ids (such as [20202021, 20212022]), get all
     NHL games for each of the seasons. optionally, create TeamData instances,
-    which are each team's statistics the day prior to a game
+    which are each team's statistics the day prior to a game.
+
+    each team is committed as soon as it has been loaded, so a failure only rolls
+    back the team being loaded. see BackfillJob for backfills that can be resumed
     """
     teams = Team.objects.all()
 
@@ -334,6 +1168,78 @@ def load_games_for_all_teams_from_api(seasons : list, get_team_data : bool = Tru
                                      seasons=seasons,
                                      get_team_data=get_team_data)
     
+def rebuild_team_data_from_local_standings(seasons : list) -> list:
+    """
+    recomputes the StandingsSnapshot and TeamData of every completed regular season and
+    playoff game of the provided seasons from the stored game results, without requesting
+    any standings from the NHL API. the standings of every date of a season are computed
+    in a single pass with a StandingsEngine, and snapshots that already exist for a date
+    are overwritten. the winning team of each game is set as well, so games loaded
+    without TeamData can be used for training.
+
+    each season is written in its own transaction, along with the feature vectors of its
+    games. returns the list of updated Game instances
+    """
+
+    if len(seasons) == 0:
+        raise ValueError(f"Please enter seasons to rebuild standings for.")
+
+    updated_games = []
+    for season_id in seasons:
+        season = reference_data.season(season_id)
+        if season is None:
+            raise ValueError(f"No season found with ID {season_id}")
+
+        season_games = list(Game.objects.filter(season=season).select_related("home_team", "away_team"))
+        engine = StandingsEngine(season=season,
+                                 games=[game for game in season_games if game.game_type == Game.REGULAR_SEASON])
+        games_to_update = [
+            game for game in season_games
+            if game.game_type != Game.PRESEASON and is_completed_game(game)
+        ]
+
+        # the engine computes the standings of each date in ascending order in one pass
+        standings_dates = set(get_standings_date(game.game_date - timedelta(days=1)) for game in games_to_update)
+        snapshots_by_date = {}
+        for standings_date in sorted(standings_dates - {None}):
+            snapshots_by_date[standings_date] = build_standings_snapshot(data_capture_date=standings_date,
+                                                                         standings_json=engine.standings(standings_date))
+
+        team_data_by_key = {}
+        for game in games_to_update:
+            data_capture_date = game.game_date - timedelta(days=1)
+            standings_snapshot = snapshots_by_date.get(get_standings_date(data_capture_date))
+
+            for team, team_data_field in ((game.home_team, "home_team_data"), (game.away_team, "away_team_data")):
+                team_data_key = (team.id, data_capture_date)
+                if team_data_key not in team_data_by_key:
+                    team_data_by_key[team_data_key] = TeamData(standings_snapshot=standings_snapshot,
+                                                               team=team,
+                                                               data_capture_date=data_capture_date)
+                setattr(game, team_data_field, team_data_by_key[team_data_key])
+
+            home_team_goals = game.game_json.get("homeTeam", {}).get("score", 0)
+            away_team_goals = game.game_json.get("awayTeam", {}).get("score", 0)
+            game.winning_team = game.home_team if home_team_goals > away_team_goals else game.away_team
+
+        with transaction.atomic():
+            StandingsSnapshot.objects.bulk_create([snapshot for snapshot in snapshots_by_date.values() if snapshot is not None],
+                                                  update_conflicts=True,
+                                                  unique_fields=["standings_date"],
+                                                  update_fields=["standings_json"])
+            upsert_team_data(list(team_data_by_key.values()))
+
+            if games_to_update:
+                Game.objects.bulk_update(games_to_update,
+                                         fields=["winning_team", "home_team_data", "away_team_data"],
+                                         batch_size=1000)
+
+            update_game_feature_vectors(seasons=[season_id])
+
+        updated_games += games_to_update
+
+    return updated_games
+
 @transaction.atomic
 def clear_database():
     """
@@ -344,7 +1250,6 @@ def clear_database():
     Game.objects.all().delete()
     TeamData.objects.all().delete()
 
-@transaction.atomic
 def update_completed_games() -> list:
     """
     for all games in the database that have been completed but do not yet
@@ -352,61 +1257,119 @@ def update_completed_games() -> list:
     update the game_json field, and store the winning team. also fetch
     TeamData for each team if it has not yet been created.
     returns a list of all updated Game instances.
+
+    the schedule endpoint returns a whole week of games, so pending dates are
+    grouped into weeks and only one request is made per week. game_json is only
+    rewritten when its hash shows that the payload changed.
+
+    when settings.NHL_STANDINGS_SOURCE is "local", the TeamData are computed in the write
+    transaction after the results are written, so that their standings include them
     """
 
     today = timezone.localdate()
-    completed_games_dates = Game.objects.filter(winning_team__isnull=True, game_date__lt=today).values_list("game_date", flat=True).distinct()
+    pending_games = {
+        game.id: game
+        for game in Game.objects.filter(winning_team__isnull=True, game_date__lt=today).select_related("home_team", "away_team")
+    }
+    pending_dates = sorted(set(game.game_date for game in pending_games.values()))
+
     games_to_update = []
-    team_datas_to_create = []
+    team_abbreviations_by_date = defaultdict(set)
+    covered_dates = set()
+    schedules_json = []
+
+    for game_date in pending_dates:
+        # the date was part of a week that has already been requested
+        if game_date in covered_dates:
+            continue
 
-    for game_date in completed_games_dates:
         date_string = game_date.strftime("%Y-%m-%d")
-        schedule_url = f"https://api-web.nhle.com/v1/schedule/{date_string}"
-        schedule_response = httpx.get(schedule_url)
-        response_json = schedule_response.json()
-        games_for_date_json = response_json.get("gameWeek")[0].get("games", [])
+        schedule_url = f"{settings.NHL_API_BASE_URL}schedule/{date_string}"
+        response_json = nhl_api_client.get_json(schedule_url)
+        schedules_json.append(response_json)
+
+        for day_json in response_json.get("gameWeek", []):
+            covered_dates.add(datetime.strptime(day_json.get("date"), "%Y-%m-%d").date())
+
+            for game_json in day_json.get("games", []):
+                game = pending_games.pop(game_json.get("id"), None)
+                if game is not None:
+                    # update the game_json field, unless the payload has not changed
+                    changed_fields = []
+                    if game.update_game_json(game_json):
+                        changed_fields += ["game_json", "game_json_hash"]
+
+                    # find the winning team and store
+                    home_team_goals = game_json.get("homeTeam", {}).get("score", 0)
+                    away_team_goals = game_json.get("awayTeam", {}).get("score", 0)
+                    winning_team = game.home_team if home_team_goals > away_team_goals else game.away_team
+                    if winning_team != game.winning_team:
+                        game.winning_team = winning_team
+                        changed_fields.append("winning_team")
+
+                    # fetch team data if it has not yet been created
+                    data_capture_date = game.game_date - timedelta(days=1)
+                    if game.home_team_data_id is None:
+                        team_abbreviations_by_date[data_capture_date].add(game.home_team.abbreviation)
+                    if game.away_team_data_id is None:
+                        team_abbreviations_by_date[data_capture_date].add(game.away_team.abbreviation)
+
+                    games_to_update.append((game, changed_fields))
+
+        # guard against an empty response, so the date is not requested again
+        covered_dates.add(game_date)
+
+    # local standings are computed from the stored results, so their TeamData is created once the results are written.
+    # the seasons of the dates are found first, as they may be reloaded from the NHL API
+    local_standings = settings.NHL_STANDINGS_SOURCE == "local"
+    if local_standings:
+        for data_capture_date in team_abbreviations_by_date:
+            get_standings_date(data_capture_date)
+    else:
+        team_data_map, team_datas_to_create = load_team_data_for_dates_from_api(team_abbreviations_by_date)
 
-        for game_json in games_for_date_json:
-            game = Game.objects.filter(id=game_json.get("id")).first()
-            if game is not None:
-                # update the game_json field
-                game.game_json = game_json
+    # write phase: every request has been made, so the transaction is only held for the bulk writes
+    with transaction.atomic():
+        record_schedule_calendar(schedules_json)
 
-                # find the winning team and store
-                home_team_json = game_json.get("homeTeam", {})
-                away_team_json = game_json.get("awayTeam", {})
-                home_team_goals = home_team_json.get("score", 0)
-                away_team_goals = away_team_json.get("score", 0)
+        # games are grouped by the fields that changed, so only those columns are written
+        games_by_changed_fields = defaultdict(list)
+        for game, changed_fields in games_to_update:
+            if changed_fields:
+                games_by_changed_fields[tuple(changed_fields)].append(game)
 
-                away_team_abbreviation = away_team_json.get("abbrev")
-                away_team = Team.objects.filter(abbreviation=away_team_abbreviation).first()
+        for changed_fields, games in games_by_changed_fields.items():
+            Game.objects.bulk_update(games, list(changed_fields))
 
-                home_team_abbreviation = home_team_json.get("abbrev")
-                home_team = Team.objects.filter(abbreviation=home_team_abbreviation).first()
+        if local_standings:
+            STANDINGS_ENGINES.invalidate(season_ids={game.season_id for games in games_by_changed_fields.values() for game in games})
+            team_data_map, team_datas_to_create = load_team_data_for_dates_from_api(team_abbreviations_by_date)
 
-                winning_team = home_team if home_team_goals > away_team_goals else away_team
-                game.winning_team = winning_team
-
-                # fetch team data if it has not yet been created
-                if game.home_team_data is None:
-                    home_team_data = load_team_data_for_date_from_api(team=home_team,
-                                                                    game_date=game_date)
-                    if home_team_data is not None:
-                        team_datas_to_create.append(home_team_data)
-                    
-                if game.away_team_data is None:
-                    away_team_data = load_team_data_for_date_from_api(team=away_team,
-                                                                    game_date=game_date)
-                    if away_team_data is not None:
-                        team_datas_to_create.append(away_team_data)
-
-                games_to_update.append(game)
-
-    if team_datas_to_create:
-        TeamData.objects.bulk_create(team_datas_to_create)
-    
-    if games_to_update:
-        Game.objects.bulk_update(games_to_update,
-                                 ["game_json", "winning_team", "home_team_data", "away_team_data"])
-        
-    return games_to_update
\ No newline at end of file
+        upsert_team_data(team_datas_to_create)
+
+        games_by_team_data_fields = defaultdict(list)
+        for game, changed_fields in games_to_update:
+            data_capture_date = game.game_date - timedelta(days=1)
+            team_data_fields = []
+            if game.home_team_data_id is None:
+                game.home_team_data = team_data_map.get((game.home_team.abbreviation, data_capture_date))
+                if game.home_team_data is not None:
+                    team_data_fields.append("home_team_data")
+            if game.away_team_data_id is None:
+                game.away_team_data = team_data_map.get((game.away_team.abbreviation, data_capture_date))
+                if game.away_team_data is not None:
+                    team_data_fields.append("away_team_data")
+
+            if team_data_fields:
+                games_by_team_data_fields[tuple(team_data_fields)].append(game)
+                changed_fields += team_data_fields
+
+        for team_data_fields, games in games_by_team_data_fields.items():
+            Game.objects.bulk_update(games, list(team_data_fields))
+
+        update_game_feature_vectors(games=[game for game, changed_fields in games_to_update if changed_fields],
+                                    team_data=team_datas_to_create)
+
+    STANDINGS_ENGINES.invalidate(season_ids={game.season_id for game, changed_fields in games_to_update if changed_fields})
+
+    return [game for game, _ in games_to_update]
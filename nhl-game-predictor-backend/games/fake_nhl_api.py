@@ -0,0 +1,501 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+
+from functools import lru_cache
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+# the teams of the synthetic league, keyed by abbreviation
+SYNTHETIC_TEAMS = {
+    "ANA": "Anaheim Ducks", "BOS": "Boston Bruins", "BUF": "Buffalo Sabres", "CGY": "Calgary Flames",
+    "CAR": "Carolina Hurricanes", "CHI": "Chicago Blackhawks", "COL": "Colorado Avalanche", "CBJ": "Columbus Blue Jackets",
+    "DAL": "Dallas Stars", "DET": "Detroit Red Wings", "EDM": "Edmonton Oilers", "FLA": "Florida Panthers",
+    "LAK": "Los Angeles Kings", "MIN": "Minnesota Wild", "MTL": "Montréal Canadiens", "NSH": "Nashville Predators",
+    "NJD": "New Jersey Devils", "NYI": "New York Islanders", "NYR": "New York Rangers", "OTT": "Ottawa Senators",
+    "PHI": "Philadelphia Flyers", "PIT": "Pittsburgh Penguins", "SJS": "San Jose Sharks", "SEA": "Seattle Kraken",
+    "STL": "St. Louis Blues", "TBL": "Tampa Bay Lightning", "TOR": "Toronto Maple Leafs", "UTA": "Utah Hockey Club",
+    "VAN": "Vancouver Canucks", "VGK": "Vegas Golden Knights", "WSH": "Washington Capitals", "WPG": "Winnipeg Jets",
+}
+
+# game types, as reported by the NHL API
+PRESEASON = 1
+REGULAR_SEASON = 2
+PLAYOFFS = 3
+
+# matches the endpoints served by the fake NHL API, relative to the /v1/ and /stats/rest/en/ prefixes
+SCHEDULE_PATH_REGEX = re.compile(r'^schedule/([0-9]{4}-[0-9]{2}-[0-9]{2})$')
+STANDINGS_PATH_REGEX = re.compile(r'^standings/([0-9]{4}-[0-9]{2}-[0-9]{2})$')
+CLUB_SCHEDULE_PATH_REGEX = re.compile(r'^club-schedule-season/([A-Z]+)/([0-9]{8})$')
+
+
+def fixture_key(url : str) -> str:
+    """
+    returns the endpoint path of an NHL API URL relative to its API prefix, such as
+    schedule/2024-10-08 for https://api-web.nhle.com/v1/schedule/2024-10-08. recorded
+    fixtures are matched by this key, so they can be replayed from any host
+    """
+    path = urlsplit(url).path
+    for prefix in ("/stats/rest/en/", "/v1/"):
+        if prefix in path:
+            key = path.split(prefix, 1)[1].strip("/")
+            return f"stats/rest/en/{key}" if prefix == "/stats/rest/en/" else key
+
+    return path.strip("/")
+
+
+class SyntheticLeague:
+    """
+    class to represent a deterministic, synthetic NHL league. every season follows the
+    same calendar, and the games of each day are generated from the seed and the date,
+    so the same request always returns the same response. standings are aggregated
+    from the generated regular season games, so they are consistent with the schedule
+    """
+
+    def __init__(self, seed : int = 0, first_season_start_year : int = 2008):
+        self.seed = seed
+        self.first_season_start_year = first_season_start_year
+        self.team_abbreviations = sorted(SYNTHETIC_TEAMS.keys())
+
+    def season_dates(self, season_start_year : int) -> dict:
+        return {
+            "preSeasonStartDate": date(season_start_year, 9, 21),
+            "regularSeasonStartDate": date(season_start_year, 10, 4),
+            "regularSeasonEndDate": date(season_start_year + 1, 4, 17),
+            "playoffEndDate": date(season_start_year + 1, 6, 17),
+        }
+
+    def season_start_year_for_date(self, game_date : date) -> int:
+        # seasons start in September, so earlier dates belong to the previous season
+        return game_date.year if game_date.month >= 9 else game_date.year - 1
+
+    def season_id(self, season_start_year : int) -> int:
+        return int(f"{season_start_year}{season_start_year + 1}")
+
+    def game_type_for_date(self, game_date : date):
+        """
+        returns the game type of the games played on a date, or None if no games are played
+        """
+        season_dates = self.season_dates(self.season_start_year_for_date(game_date))
+
+        if season_dates["preSeasonStartDate"] <= game_date < season_dates["regularSeasonStartDate"]:
+            return PRESEASON
+        if season_dates["regularSeasonStartDate"] <= game_date <= season_dates["regularSeasonEndDate"]:
+            return REGULAR_SEASON
+        if season_dates["regularSeasonEndDate"] + timedelta(days=3) <= game_date <= season_dates["playoffEndDate"]:
+            return PLAYOFFS
+
+        return None
+
+    @lru_cache(maxsize=None)
+    def games_for_date(self, game_date : date) -> tuple:
+        """
+        generates the games played on a date. games on dates before today are completed
+        """
+        game_type = self.game_type_for_date(game_date)
+        if game_type is None:
+            return ()
+
+        rnd = random.Random(self.seed * 1000003 + game_date.toordinal())
+
+        # a few days without games, as in a real schedule
+        if rnd.random() < 0.08:
+            return ()
+
+        teams = self.team_abbreviations[:16] if game_type == PLAYOFFS else self.team_abbreviations[:]
+        rnd.shuffle(teams)
+        number_of_games = {
+            PRESEASON: rnd.randint(2, 6),
+            REGULAR_SEASON: rnd.randint(4, 10),
+            PLAYOFFS: rnd.randint(1, 4),
+        }[game_type]
+
+        season_start_year = self.season_start_year_for_date(game_date)
+        season_start = self.season_dates(season_start_year)["preSeasonStartDate"]
+        is_completed = game_date < date.today()
+
+        games = []
+        for game_number in range(number_of_games):
+            home_team_abbreviation = teams[2 * game_number]
+            away_team_abbreviation = teams[2 * game_number + 1]
+
+            # each day of a season can hold up to 16 games
+            game_id = int(f"{season_start_year}{game_type:02d}{(game_date - season_start).days * 16 + game_number:04d}")
+            home_team_json = {"abbrev": home_team_abbreviation, "placeName": {"default": SYNTHETIC_TEAMS[home_team_abbreviation]}}
+            away_team_json = {"abbrev": away_team_abbreviation, "placeName": {"default": SYNTHETIC_TEAMS[away_team_abbreviation]}}
+
+            game_json = {
+                "id": game_id,
+                "season": self.season_id(season_start_year),
+                "gameType": game_type,
+                "gameDate": game_date.strftime("%Y-%m-%d"),
+                "startTimeUTC": f"{game_date.strftime('%Y-%m-%d')}T23:00:00Z",
+                "gameState": "OFF" if is_completed else "FUT",
+                "homeTeam": home_team_json,
+                "awayTeam": away_team_json,
+            }
+
+            if is_completed:
+                home_team_goals = rnd.randint(0, 6)
+                away_team_goals = rnd.randint(0, 6)
+                period_type = "REG"
+
+                # ties are decided in overtime
+                if home_team_goals == away_team_goals:
+                    period_type = "OT"
+                    if rnd.random() < 0.5:
+                        home_team_goals += 1
+                    else:
+                        away_team_goals += 1
+
+                home_team_json["score"] = home_team_goals
+                away_team_json["score"] = away_team_goals
+                game_json["periodDescriptor"] = {"periodType": period_type}
+
+            games.append(game_json)
+
+        return tuple(games)
+
+    def games_between(self, start_date : date, end_date : date) -> list:
+        games = []
+        game_date = start_date
+        while game_date <= end_date:
+            games += self.games_for_date(game_date)
+            game_date += timedelta(days=1)
+
+        return games
+
+    def schedule(self, start_date : date) -> dict:
+        """
+        the response of schedule/{date}: the week of games starting at the date
+        """
+        season_dates = self.season_dates(self.season_start_year_for_date(start_date))
+        game_week = []
+        for day in range(7):
+            game_date = start_date + timedelta(days=day)
+            games = list(self.games_for_date(game_date))
+            game_week.append({
+                "date": game_date.strftime("%Y-%m-%d"),
+                "dayAbbrev": game_date.strftime("%a").upper(),
+                "numberOfGames": len(games),
+                "games": games,
+            })
+
+        return {
+            "nextStartDate": (start_date + timedelta(days=7)).strftime("%Y-%m-%d"),
+            "previousStartDate": (start_date - timedelta(days=7)).strftime("%Y-%m-%d"),
+            "gameWeek": game_week,
+            "numberOfGames": sum(day_json["numberOfGames"] for day_json in game_week),
+            **{key: value.strftime("%Y-%m-%d") for key, value in season_dates.items()},
+        }
+
+    @lru_cache(maxsize=None)
+    def club_schedule_season(self, team_abbreviation : str, season_id : int) -> dict:
+        """
+        the response of club-schedule-season/{team}/{season}: every game of a team in a season
+        """
+        season_dates = self.season_dates(int(str(season_id)[:4]))
+        games = [
+            game_json
+            for game_json in self.games_between(season_dates["preSeasonStartDate"], season_dates["playoffEndDate"])
+            if team_abbreviation in (game_json["homeTeam"]["abbrev"], game_json["awayTeam"]["abbrev"])
+        ]
+
+        return {
+            "previousSeason": season_id - 10001,
+            "nextSeason": season_id + 10001,
+            "currentSeason": season_id,
+            "clubTimezone": "America/Toronto",
+            "games": games,
+        }
+
+    @lru_cache(maxsize=None)
+    def standings(self, standings_date : date) -> dict:
+        """
+        the response of standings/{date}: every team's record in the regular season games
+        played up to and including the date. the standings are blank before the season starts
+        """
+        season_start_year = self.season_start_year_for_date(standings_date)
+        season_dates = self.season_dates(season_start_year)
+        if standings_date < season_dates["regularSeasonStartDate"]:
+            return {"wildCardIndicator": True, "standings": []}
+
+        end_date = min(standings_date, season_dates["regularSeasonEndDate"], date.today() - timedelta(days=1))
+        records = defaultdict(lambda: defaultdict(int))
+        for game_json in self.games_between(season_dates["regularSeasonStartDate"], end_date):
+            if game_json.get("gameType") != REGULAR_SEASON:
+                continue
+
+            is_overtime = game_json.get("periodDescriptor", {}).get("periodType") != "REG"
+            for location, team_key, opponent_key in (("home", "homeTeam", "awayTeam"), ("road", "awayTeam", "homeTeam")):
+                record = records[game_json[team_key]["abbrev"]]
+                goals_for = game_json[team_key].get("score", 0)
+                goals_against = game_json[opponent_key].get("score", 0)
+
+                if goals_for > goals_against:
+                    result = "Wins"
+                elif is_overtime:
+                    result = "OtLosses"
+                else:
+                    result = "Losses"
+
+                for prefix in ("", location):
+                    record[f"{prefix}GamesPlayed"] += 1
+                    record[f"{prefix}{result}"] += 1
+                    record[f"{prefix}GoalsFor"] += goals_for
+                    record[f"{prefix}GoalsAgainst"] += goals_against
+
+        standings_json = []
+        for team_abbreviation in self.team_abbreviations:
+            record = records[team_abbreviation]
+            team_standings = {
+                "date": standings_date.strftime("%Y-%m-%d"),
+                "seasonId": self.season_id(season_start_year),
+                "teamAbbrev": {"default": team_abbreviation},
+                "teamName": {"default": SYNTHETIC_TEAMS[team_abbreviation]},
+                "teamLogo": f"https://assets.nhle.com/logos/nhl/svg/{team_abbreviation}_light.svg",
+                "gamesPlayed": record["GamesPlayed"],
+                "wins": record["Wins"],
+                "losses": record["Losses"],
+                "otLosses": record["OtLosses"],
+                "points": 2 * record["Wins"] + record["OtLosses"],
+                "goalFor": record["GoalsFor"],
+                "goalAgainst": record["GoalsAgainst"],
+                "goalDifferential": record["GoalsFor"] - record["GoalsAgainst"],
+            }
+            for location in ("home", "road"):
+                team_standings.update({
+                    f"{location}GamesPlayed": record[f"{location}GamesPlayed"],
+                    f"{location}Wins": record[f"{location}Wins"],
+                    f"{location}Losses": record[f"{location}Losses"],
+                    f"{location}OtLosses": record[f"{location}OtLosses"],
+                    f"{location}GoalsFor": record[f"{location}GoalsFor"],
+                    f"{location}GoalsAgainst": record[f"{location}GoalsAgainst"],
+                    f"{location}GoalDifferential": record[f"{location}GoalsFor"] - record[f"{location}GoalsAgainst"],
+                })
+            standings_json.append(team_standings)
+
+        standings_json.sort(key=lambda team_standings: team_standings["points"], reverse=True)
+        return {"wildCardIndicator": True, "standings": standings_json}
+
+    def standings_season(self) -> dict:
+        """
+        the response of standings-season: the standings date range of every season
+        """
+        last_season_start_year = self.season_start_year_for_date(date.today())
+        seasons = []
+        for season_start_year in range(self.first_season_start_year, last_season_start_year + 1):
+            season_dates = self.season_dates(season_start_year)
+            seasons.append({
+                "id": self.season_id(season_start_year),
+                "conferencesInUse": True,
+                "divisionsInUse": True,
+                "pointForOTlossInUse": True,
+                "regulationWinsInUse": True,
+                "rowInUse": True,
+                "standingsEnd": season_dates["regularSeasonEndDate"].strftime("%Y-%m-%d"),
+                "standingsStart": season_dates["regularSeasonStartDate"].strftime("%Y-%m-%d"),
+                "tiesInUse": False,
+                "wildcardInUse": True,
+            })
+
+        return {"currentDate": date.today().strftime("%Y-%m-%d"), "seasons": seasons}
+
+    def teams(self) -> dict:
+        """
+        the response of stats/rest/en/team: every team along with its franchise
+        """
+        return {
+            "data": [
+                {"id": team_id, "franchiseId": team_id, "fullName": SYNTHETIC_TEAMS[team_abbreviation], "triCode": team_abbreviation}
+                for team_id, team_abbreviation in enumerate(self.team_abbreviations, start=1)
+            ],
+            "total": len(self.team_abbreviations),
+        }
+
+
+class FakeNHLAPI:
+    """
+    class to represent a local stand-in for the NHL API. recorded responses are
+    replayed from a fixtures directory (in the format of the NHL API response cache,
+    see NHLAPIResponseCache), and every other request is answered by a SyntheticLeague.
+
+    latency (plus up to jitter seconds) is added to every response, and a fraction
+    error_rate of requests fail with error_status, so that ingestion throughput and
+    retry behaviour can be measured reproducibly without calling the real NHL API
+    """
+
+    def __init__(self, fixtures_dir : str = None, fixtures_only : bool = False, latency : float = 0, jitter : float = 0,
+                 error_rate : float = 0, error_status : int = 503, retry_after : float = None, seed : int = 0):
+        self.fixtures = self.load_fixtures(fixtures_dir) if fixtures_dir is not None else {}
+        self.fixtures_only = fixtures_only
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.league = SyntheticLeague(seed=seed)
+
+        # latency and errors are drawn from a seeded generator, so runs are reproducible
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_counts = defaultdict(int)
+        self.error_counts = defaultdict(int)
+
+    def load_fixtures(self, fixtures_dir : str) -> dict:
+        """
+        loads every recorded response in a fixtures directory, keyed by fixture_key
+        """
+        fixtures = {}
+        for directory, _, file_names in os.walk(fixtures_dir):
+            for file_name in file_names:
+                if not file_name.endswith(".json"):
+                    continue
+
+                try:
+                    with open(os.path.join(directory, file_name), "r") as fixture_file:
+                        fixture = json.load(fixture_file)
+                except (OSError, ValueError):
+                    continue
+
+                if fixture.get("url") is not None and fixture.get("status_code") == 200:
+                    fixtures[fixture_key(fixture["url"])] = fixture["content"]
+
+        return fixtures
+
+    def synthetic_response(self, key : str):
+        """
+        returns the synthetic JSON body for an endpoint, or None if the endpoint is not served
+        """
+        schedule_match = SCHEDULE_PATH_REGEX.match(key)
+        if schedule_match is not None:
+            return self.league.schedule(datetime.strptime(schedule_match.group(1), "%Y-%m-%d").date())
+
+        standings_match = STANDINGS_PATH_REGEX.match(key)
+        if standings_match is not None:
+            return self.league.standings(datetime.strptime(standings_match.group(1), "%Y-%m-%d").date())
+
+        club_schedule_match = CLUB_SCHEDULE_PATH_REGEX.match(key)
+        if club_schedule_match is not None:
+            return self.league.club_schedule_season(club_schedule_match.group(1), int(club_schedule_match.group(2)))
+
+        if key == "standings-season":
+            return self.league.standings_season()
+
+        if key == "stats/rest/en/team":
+            return self.league.teams()
+
+        return None
+
+    def respond(self, path : str):
+        """
+        returns the status code, headers and body of the response to a request path
+        """
+        key = fixture_key(path)
+        endpoint = key.split("/")[0] if not key.startswith("stats/") else key
+
+        with self.lock:
+            self.request_counts[endpoint] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            is_error = self.random.random() < self.error_rate
+            if is_error:
+                self.error_counts[endpoint] += 1
+
+        if delay > 0:
+            time.sleep(delay)
+
+        if is_error:
+            headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+            return self.error_status, headers, json.dumps({"message": "injected error"})
+
+        if key in self.fixtures:
+            return 200, {}, self.fixtures[key]
+
+        if not self.fixtures_only:
+            response_json = self.synthetic_response(key)
+            if response_json is not None:
+                return 200, {}, json.dumps(response_json)
+
+        return 404, {}, json.dumps({"message": f"no response for {key}"})
+
+    def stats_summary(self) -> dict:
+        with self.lock:
+            return {
+                endpoint: {"requests": requests, "errors": self.error_counts[endpoint]}
+                for endpoint, requests in self.request_counts.items()
+            }
+
+
+class FakeNHLAPIRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP request handler that answers GET requests with the server's FakeNHLAPI
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status_code, headers, body = self.server.fake_api.respond(self.path)
+        content = body.encode("utf-8")
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FakeNHLAPIServer:
+    """
+    class to represent a FakeNHLAPI served over HTTP on a background thread. point
+    settings.NHL_API_BASE_URL at base_url and settings.NHL_STATS_API_BASE_URL at
+    stats_base_url to ingest from it. port 0 picks a free port
+    """
+
+    def __init__(self, fake_api : FakeNHLAPI = None, host : str = "127.0.0.1", port : int = 0, verbose : bool = False):
+        self.fake_api = FakeNHLAPI() if fake_api is None else fake_api
+        self.http_server = ThreadingHTTPServer((host, port), FakeNHLAPIRequestHandler)
+        self.http_server.daemon_threads = True
+        self.http_server.fake_api = self.fake_api
+        self.http_server.verbose = verbose
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.http_server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def base_url(self) -> str:
+        return f"{self.url}v1/"
+
+    @property
+    def stats_base_url(self) -> str:
+        return f"{self.url}stats/rest/en/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.http_server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self):
+        self.http_server.serve_forever()
+
+    def stop(self):
+        self.http_server.shutdown()
+        self.http_server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
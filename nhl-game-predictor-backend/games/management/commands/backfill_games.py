@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from games.backfill import backfill_games_from_api, backfill_games_from_schedule_api, BackfillFetchError
+from games.pipeline import stream_games_from_api
+from games.nhl_api import nhl_api_client
+
+class Command(BaseCommand):
+  help = "Concurrently loads Game and TeamData instances for the provided seasons from the NHL API"
+
+  def add_arguments(self, parser):
+    parser.add_argument("seasons", nargs="+", type=int, help="season IDs compliant with the NHL API, e.g. 20242025")
+    parser.add_argument("--teams", nargs="+", default=None, help="abbreviations of the teams to load (defaults to every team in the final standings of each season)")
+    parser.add_argument("--league", action="store_true", help="walk the league-wide weekly schedule instead of every team's club schedule")
+    parser.add_argument("--max-concurrent-requests", type=int, default=settings.NHL_API_MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--skip-team-data", action="store_true", help="do not create TeamData instances")
+    parser.add_argument("--offline", action="store_true", help="only serve NHL API responses from the on-disk cache")
+    parser.add_argument("--stream", action="store_true", help="write games in fixed-size batches while fetches continue, so memory does not grow with the number of seasons")
+    parser.add_argument("--batch-size", type=int, default=settings.NHL_API_PIPELINE_BATCH_SIZE, help="number of games written per transaction with --stream")
+    parser.add_argument("--queue-size", type=int, default=settings.NHL_API_PIPELINE_QUEUE_SIZE, help="maximum number of fetched units waiting to be written with --stream")
+
+  def handle(self, *args, **options):
+    if options["offline"]:
+      nhl_api_client.offline = True
+
+    start = timezone.now()
+    failed_urls = {}
+
+    if options["stream"]:
+      pipeline = stream_games_from_api(seasons=options["seasons"],
+                                       league=options["league"],
+                                       team_abbreviations=options["teams"],
+                                       get_team_data=not options["skip_team_data"],
+                                       batch_size=options["batch_size"],
+                                       queue_size=options["queue_size"],
+                                       fetchers=options["max_concurrent_requests"])
+      games_loaded = pipeline.games_written
+    else:
+      try:
+        if options["league"]:
+          games = backfill_games_from_schedule_api(seasons=options["seasons"],
+                                                   get_team_data=not options["skip_team_data"],
+                                                   max_concurrent_requests=options["max_concurrent_requests"])
+        else:
+          games = backfill_games_from_api(seasons=options["seasons"],
+                                          team_abbreviations=options["teams"],
+                                          get_team_data=not options["skip_team_data"],
+                                          max_concurrent_requests=options["max_concurrent_requests"])
+      except BackfillFetchError as error:
+        games = error.games
+        failed_urls = error.failed_urls
+      games_loaded = len(games)
+
+    elapsed_seconds = (timezone.now() - start).total_seconds()
+    self.stdout.write(f"Loaded {games_loaded} games in {elapsed_seconds:.1f}s.")
+
+    for endpoint, endpoint_stats in nhl_api_client.stats_summary().items():
+      self.stdout.write(f"{endpoint}: {endpoint_stats}")
+
+    # the games of every other request were loaded, so running the command again only has to fill the gaps
+    if failed_urls:
+      for url, error in failed_urls.items():
+        self.stderr.write(f"{url}: {error}")
+      raise CommandError(f"{len(failed_urls)} requests to the NHL API failed, please run the backfill again to load their games.")
@@ -0,0 +1,79 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from games.benchmarks import IngestionBenchmark
+from games.fake_nhl_api import FakeNHLAPI, FakeNHLAPIServer
+from games.nhl_api import nhl_api_client, TokenBucket
+
+class Command(BaseCommand):
+  help = ("Benchmarks the data loader entry points against a local stand-in for the NHL API, reporting wall time, "
+          "HTTP requests, bytes and database queries per game ingested. the benchmark runs against a scratch database, "
+          "so the configured database is left unchanged")
+
+  def add_arguments(self, parser):
+    parser.add_argument("--season", type=int, default=20232024, help="season ID compliant with the NHL API, e.g. 20232024")
+    parser.add_argument("--team", default="TOR", help="abbreviation of the team loaded by load_games_for_team_from_api")
+    parser.add_argument("--days", type=int, default=7, help="number of dates loaded by fetch_games_for_date")
+    parser.add_argument("--scenarios", nargs="+", choices=IngestionBenchmark.SCENARIOS, default=None, help="scenarios to run (defaults to every scenario)")
+    parser.add_argument("--output", default="ingestion_benchmark.json", help="file that the results are written to as JSON")
+    parser.add_argument("--use-configured-api", action="store_true", help="benchmark against settings.NHL_API_BASE_URL instead of starting a local stand-in")
+    parser.add_argument("--fixtures-dir", default=None, help="directory of recorded responses served by the local stand-in")
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every response of the local stand-in")
+    parser.add_argument("--jitter", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests to the local stand-in that fail with 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keepdb", action="store_true", help="keep the scratch database (and the loaded teams and seasons) for the next run")
+    parser.add_argument("--requests-per-second", type=float, default=None, help="overrides NHL_API_REQUESTS_PER_SECOND for the benchmark")
+
+  def handle(self, *args, **options):
+    if options["requests_per_second"] is not None:
+      nhl_api_client.rate_limiter = TokenBucket(rate=options["requests_per_second"],
+                                                capacity=max(1, int(options["requests_per_second"])))
+
+    benchmark = IngestionBenchmark(season_id=options["season"],
+                                   team_abbreviation=options["team"],
+                                   days=options["days"],
+                                   keepdb=options["keepdb"])
+
+    server = None
+    base_urls = (settings.NHL_API_BASE_URL, settings.NHL_STATS_API_BASE_URL)
+    if not options["use_configured_api"]:
+      fake_api = FakeNHLAPI(fixtures_dir=options["fixtures_dir"],
+                            latency=options["latency"],
+                            jitter=options["jitter"],
+                            error_rate=options["error_rate"],
+                            seed=options["seed"])
+      server = FakeNHLAPIServer(fake_api=fake_api).start()
+      settings.NHL_API_BASE_URL = server.base_url
+      settings.NHL_STATS_API_BASE_URL = server.stats_base_url
+
+    try:
+      metadata = benchmark.metadata()
+      results = benchmark.run(scenarios=options["scenarios"])
+    finally:
+      settings.NHL_API_BASE_URL, settings.NHL_STATS_API_BASE_URL = base_urls
+      if server is not None:
+        server.stop()
+
+    metadata["database"] = benchmark.database
+    if server is not None:
+      metadata["fake_nhl_api"] = {
+        "fixtures_dir": options["fixtures_dir"],
+        "fixtures": len(server.fake_api.fixtures),
+        "latency": options["latency"],
+        "jitter": options["jitter"],
+        "error_rate": options["error_rate"],
+        "seed": options["seed"],
+      }
+
+    with open(options["output"], "w") as output_file:
+      json.dump({**metadata, "scenarios": results}, output_file, indent=2)
+
+    for result in results:
+      self.stdout.write(f"{result['scenario']}: {result['games']} games in {result['seconds']:.2f}s, "
+                        f"{result['http_requests']} HTTP requests ({result['bytes']} bytes), {result['db_queries']} DB queries | "
+                        f"per game: {result['seconds_per_game']}s, {result['http_requests_per_game']} requests, "
+                        f"{result['bytes_per_game']} bytes, {result['db_queries_per_game']} queries")
+
+    self.stdout.write(f"Wrote results to {options['output']}.")
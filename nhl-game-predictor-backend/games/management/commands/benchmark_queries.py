@@ -0,0 +1,58 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from games.benchmarks import QueryPlanBenchmark
+from games.fake_nhl_api import FakeNHLAPI, FakeNHLAPIServer
+
+class Command(BaseCommand):
+  help = ("Explains and times the date-driven read paths of the public endpoints and the data loader, with the "
+          "current indexes and with the baseline indexes, reporting the query plan and latency of each. by default the games "
+          "in the database are used and everything the benchmark writes is rolled back; with --seasons, the seasons are "
+          "loaded into a scratch database that the benchmark runs against instead")
+
+  def add_arguments(self, parser):
+    parser.add_argument("--seasons", nargs="+", type=int, default=[],
+                        help="season IDs compliant with the NHL API (e.g. 20232024) to load into a scratch database before the benchmark (by default the games already in the database are used)")
+    parser.add_argument("--access-paths", nargs="+", choices=QueryPlanBenchmark.ACCESS_PATHS, default=None, help="access paths to measure (defaults to every access path)")
+    parser.add_argument("--repeat", type=int, default=20, help="number of times each query is timed")
+    parser.add_argument("--output", default="query_benchmark.json", help="file that the results are written to as JSON")
+    parser.add_argument("--show-plans", action="store_true", help="print the query plan of each access path")
+    parser.add_argument("--use-local-api", action="store_true",
+                        help="load the seasons from a local stand-in for the NHL API instead of settings.NHL_API_BASE_URL")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic league served by the local stand-in")
+    parser.add_argument("--keepdb", action="store_true", help="keep the scratch database (and the loaded seasons) for the next run")
+
+  def handle(self, *args, **options):
+    benchmark = QueryPlanBenchmark(seasons=options["seasons"],
+                                   repeat=options["repeat"],
+                                   keepdb=options["keepdb"])
+
+    server = None
+    base_urls = (settings.NHL_API_BASE_URL, settings.NHL_STATS_API_BASE_URL)
+    if options["seasons"] and options["use_local_api"]:
+      server = FakeNHLAPIServer(fake_api=FakeNHLAPI(seed=options["seed"])).start()
+      settings.NHL_API_BASE_URL = server.base_url
+      settings.NHL_STATS_API_BASE_URL = server.stats_base_url
+
+    try:
+      results = benchmark.run(access_paths=options["access_paths"])
+    finally:
+      settings.NHL_API_BASE_URL, settings.NHL_STATS_API_BASE_URL = base_urls
+      if server is not None:
+        server.stop()
+
+    with open(options["output"], "w") as output_file:
+      json.dump({**benchmark.metadata(), **results}, output_file, indent=2)
+
+    for indexed, baseline in zip(results["indexed"], results["baseline"]):
+      self.stdout.write(f"{indexed['access_path']}: {indexed['rows']} rows | indexed {indexed['median_ms']}ms, "
+                        f"baseline {baseline['median_ms']}ms (median of {options['repeat']})")
+
+      if options["show_plans"]:
+        for label, result in (("indexed", indexed), ("baseline", baseline)):
+          self.stdout.write(f"  {label} plan:")
+          for line in result["plan"].splitlines():
+            self.stdout.write(f"    {line}")
+
+    self.stdout.write(f"Wrote results to {options['output']}.")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from games.data_loader import rebuild_team_data_from_local_standings
+
+class Command(BaseCommand):
+  help = "Recomputes the standings snapshots and TeamData of the provided seasons from the stored game results, without calling the NHL API"
+
+  def add_arguments(self, parser):
+    parser.add_argument("seasons", nargs="+", type=int, help="season IDs compliant with the NHL API, e.g. 20242025")
+
+  def handle(self, *args, **options):
+    start = timezone.now()
+
+    try:
+      games = rebuild_team_data_from_local_standings(seasons=options["seasons"])
+    except ValueError as error:
+      raise CommandError(str(error))
+
+    elapsed_seconds = (timezone.now() - start).total_seconds()
+    self.stdout.write(f"Rebuilt the standings of {len(games)} games in {elapsed_seconds:.1f}s.")
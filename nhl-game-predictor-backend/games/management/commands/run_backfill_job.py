@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from games.backfill import create_backfill_job, run_backfill_job
+from games.models import BackfillJob, BackfillJobUnit
+from games.nhl_api import nhl_api_client
+
+class Command(BaseCommand):
+  help = "Loads Game and TeamData instances for the provided seasons from the NHL API as a resumable, checkpointed BackfillJob"
+
+  def add_arguments(self, parser):
+    parser.add_argument("seasons", nargs="*", type=int, help="season IDs compliant with the NHL API, e.g. 20242025")
+    parser.add_argument("--resume", type=int, default=None, metavar="JOB_ID", help="resume the BackfillJob with this ID from its last completed unit")
+    parser.add_argument("--teams", nargs="+", default=None, help="abbreviations of the teams to load (defaults to every team in the final standings of each season)")
+    parser.add_argument("--league", action="store_true", help="split the job into one unit per week of the league-wide schedule instead of one unit per team and season")
+    parser.add_argument("--skip-team-data", action="store_true", help="do not create TeamData instances")
+    parser.add_argument("--offline", action="store_true", help="only serve NHL API responses from the on-disk cache")
+
+  def handle(self, *args, **options):
+    if options["offline"]:
+      nhl_api_client.offline = True
+
+    if options["resume"] is not None:
+      job = BackfillJob.objects.filter(id=options["resume"]).first()
+      if job is None:
+        raise CommandError(f"No backfill job found with ID {options['resume']}")
+      self.stdout.write(f"Resuming {job} with {job.units.filter(completed_at__isnull=True).count()} units remaining.")
+    else:
+      if len(options["seasons"]) == 0:
+        raise CommandError("Please enter seasons to fetch game data for, or a job to --resume.")
+      job = create_backfill_job(seasons=options["seasons"],
+                                mode=BackfillJob.LEAGUE if options["league"] else BackfillJob.TEAM,
+                                get_team_data=not options["skip_team_data"],
+                                team_abbreviations=options["teams"])
+      self.stdout.write(f"Created {job} with {job.units.count()} units.")
+
+    job = run_backfill_job(job=job, on_unit_completed=self.report_unit)
+
+    games_per_second = job.games_created / job.elapsed_seconds if job.elapsed_seconds else 0
+    api_calls_per_second = job.api_calls / job.elapsed_seconds if job.elapsed_seconds else 0
+    self.stdout.write(f"Completed {job}: {job.games_created} games and {job.api_calls} API calls in {job.elapsed_seconds:.1f}s "
+                      f"({games_per_second:.1f} games/s, {api_calls_per_second:.1f} API calls/s).")
+
+  def report_unit(self, unit : BackfillJobUnit):
+    games_per_second = unit.games_created / unit.elapsed_seconds if unit.elapsed_seconds else 0
+    self.stdout.write(f"{unit}: {unit.games_created} games, {unit.api_calls} API calls in {unit.elapsed_seconds:.1f}s ({games_per_second:.1f} games/s)")
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from games.fake_nhl_api import FakeNHLAPI, FakeNHLAPIServer
+
+class Command(BaseCommand):
+  help = "Serves a local stand-in for the NHL API with recorded or synthetic responses, for benchmarking ingestion without calling the real NHL API"
+
+  def add_arguments(self, parser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures-dir", default=None, help="directory of recorded responses, in the format of the NHL API response cache (e.g. NHL_API_CACHE_DIR)")
+    parser.add_argument("--fixtures-only", action="store_true", help="respond with 404 instead of a synthetic response when no recorded response exists")
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0, help="up to this many seconds are randomly added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0, help="fraction of requests that fail with --error-status")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After header sent with injected errors")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic league, latency and injected errors")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+
+  def handle(self, *args, **options):
+    fake_api = FakeNHLAPI(fixtures_dir=options["fixtures_dir"],
+                          fixtures_only=options["fixtures_only"],
+                          latency=options["latency"],
+                          jitter=options["jitter"],
+                          error_rate=options["error_rate"],
+                          error_status=options["error_status"],
+                          retry_after=options["retry_after"],
+                          seed=options["seed"])
+    server = FakeNHLAPIServer(fake_api=fake_api,
+                              host=options["host"],
+                              port=options["port"],
+                              verbose=options["verbose"])
+
+    self.stdout.write(f"Serving {len(fake_api.fixtures)} recorded responses and a synthetic league at {server.url}")
+    self.stdout.write(f"export NHL_API_BASE_URL={server.base_url} NHL_STATS_API_BASE_URL={server.stats_base_url} NHL_API_CACHE_ENABLED=False")
+
+    try:
+      server.serve_forever()
+    except KeyboardInterrupt:
+      pass
+    finally:
+      server.http_server.server_close()
+
+    for endpoint, endpoint_stats in fake_api.stats_summary().items():
+      self.stdout.write(f"{endpoint}: {endpoint_stats}")
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from predictor.ml_models.utils import update_game_feature_vectors
+
+class Command(BaseCommand):
+  help = ("Recomputes the stored feature vectors of the games of the provided seasons (by default every game), "
+          "e.g. after the features defined by GameDataFrameEntry change. with --missing, only games without a vector "
+          "are computed, which is run on every deploy after the migrations")
+
+  def add_arguments(self, parser):
+    parser.add_argument("seasons", nargs="*", type=int, help="season IDs compliant with the NHL API, e.g. 20242025")
+    parser.add_argument("--missing", action="store_true", help="only compute the vectors of games that do not have one")
+
+  def handle(self, *args, **options):
+    start = timezone.now()
+
+    vectors_written = update_game_feature_vectors(seasons=options["seasons"] or None,
+                                                  missing_only=options["missing"])
+
+    elapsed_seconds = (timezone.now() - start).total_seconds()
+    self.stdout.write(f"Updated the feature vectors of {vectors_written} games in {elapsed_seconds:.1f}s.")
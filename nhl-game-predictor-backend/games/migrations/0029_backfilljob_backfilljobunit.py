@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-18 08:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0028_add_utah_mammoth'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('team', 'Team club schedules'), ('league', 'League weekly schedule')], default='league', max_length=10)),
+                ('seasons', models.JSONField(default=list)),
+                ('get_team_data', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('games_created', models.IntegerField(default=0)),
+                ('api_calls', models.IntegerField(default=0)),
+                ('elapsed_seconds', models.FloatField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BackfillJobUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season', models.BigIntegerField()),
+                ('unit_key', models.CharField(max_length=10)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('games_created', models.IntegerField(default=0)),
+                ('api_calls', models.IntegerField(default=0)),
+                ('elapsed_seconds', models.FloatField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='units', to='games.backfilljob')),
+            ],
+            options={
+                'unique_together': {('job', 'season', 'unit_key')},
+            },
+        ),
+    ]
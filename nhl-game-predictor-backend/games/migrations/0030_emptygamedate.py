@@ -0,0 +1,19 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0029_backfilljob_backfilljobunit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmptyGameDate',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+    ]
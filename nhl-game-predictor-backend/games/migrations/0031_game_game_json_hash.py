@@ -0,0 +1,46 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:17
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def hash_game_json(game_json):
+    """
+    copy of games.models.hash_game_json at the time of this migration, so that
+    later changes to the model's hashing do not change what this migration does
+    """
+    canonical_json = json.dumps(game_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+
+def hash_existing_game_json(apps, schema_editor):
+    Game = apps.get_model('games', 'Game')
+
+    games_to_update = []
+    for game in Game.objects.only("id", "game_json").iterator(chunk_size=2000):
+        game.game_json_hash = hash_game_json(game.game_json)
+        games_to_update.append(game)
+
+        if len(games_to_update) == 2000:
+            Game.objects.bulk_update(games_to_update, fields=["game_json_hash"])
+            games_to_update = []
+
+    Game.objects.bulk_update(games_to_update, fields=["game_json_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0030_emptygamedate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='game_json_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.RunPython(hash_existing_game_json, migrations.RunPython.noop),
+    ]
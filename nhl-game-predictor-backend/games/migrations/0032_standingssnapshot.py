@@ -0,0 +1,102 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:19
+
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import timedelta
+from django.db import migrations, models
+
+
+# upper bound on the length of the preseason, as in the data loader at the time of this migration
+PRESEASON_MAX_DURATION = timedelta(days=45)
+
+
+def get_standings_date(data_capture_date, seasons):
+    """
+    copy of games.data_loader.get_standings_date at the time of this migration, which finds
+    the season of a date among the stored seasons rather than reloading them from the NHL API
+    """
+    candidate_seasons = [season for season in seasons if season.regular_season_start - PRESEASON_MAX_DURATION <= data_capture_date]
+    season = max(candidate_seasons, key=lambda season: season.regular_season_start, default=None)
+    if season is None:
+        return data_capture_date
+
+    if data_capture_date < season.regular_season_start:
+        return None
+
+    return min(data_capture_date, season.regular_season_end)
+
+def create_standings_snapshots(apps, schema_editor):
+    """
+    moves the standings stored in every TeamData into one StandingsSnapshot per standings date,
+    which is found as the data loader finds it (see get_standings_date). TeamData whose date has
+    no standings (the preseason) are left without a snapshot, as the data loader creates them
+    """
+    TeamData = apps.get_model('games', 'TeamData')
+    Season = apps.get_model('games', 'Season')
+    StandingsSnapshot = apps.get_model('games', 'StandingsSnapshot')
+
+    seasons = list(Season.objects.all())
+    team_data_with_standings = TeamData.objects.exclude(team_data_json={}).order_by("data_capture_date", "id")
+
+    # the standings of every date are collected first, as the TeamData of a standings date are not always consecutive.
+    # each team's entry is taken from its earliest TeamData, which is the closest to the standings date
+    standings_json_by_date = defaultdict(dict)
+    for team_data in team_data_with_standings.only("id", "team_id", "data_capture_date", "team_data_json").iterator(chunk_size=2000):
+        standings_date = get_standings_date(team_data.data_capture_date, seasons)
+        if standings_date is not None:
+            standings_json_by_date[standings_date].setdefault(str(team_data.team_id), team_data.team_data_json)
+
+    StandingsSnapshot.objects.bulk_create([
+        StandingsSnapshot(standings_date=standings_date, standings_json=standings_json)
+        for standings_date, standings_json in standings_json_by_date.items()
+    ], batch_size=500)
+    snapshot_ids_by_date = dict(StandingsSnapshot.objects.values_list("standings_date", "id"))
+
+    team_data_to_update = []
+    for team_data in team_data_with_standings.only("id", "data_capture_date").iterator(chunk_size=2000):
+        standings_date = get_standings_date(team_data.data_capture_date, seasons)
+        if standings_date is None:
+            continue
+
+        team_data.standings_snapshot_id = snapshot_ids_by_date[standings_date]
+        team_data_to_update.append(team_data)
+
+        if len(team_data_to_update) == 2000:
+            TeamData.objects.bulk_update(team_data_to_update, fields=["standings_snapshot"])
+            team_data_to_update = []
+
+    TeamData.objects.bulk_update(team_data_to_update, fields=["standings_snapshot"])
+
+def restore_team_data_json(apps, schema_editor):
+    TeamData = apps.get_model('games', 'TeamData')
+
+    team_data_to_update = []
+    for team_data in TeamData.objects.filter(standings_snapshot__isnull=False).select_related("standings_snapshot").iterator(chunk_size=2000):
+        team_data.team_data_json = team_data.standings_snapshot.standings_json.get(str(team_data.team_id), {})
+        team_data_to_update.append(team_data)
+
+    TeamData.objects.bulk_update(team_data_to_update, fields=["team_data_json"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0031_game_game_json_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StandingsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('standings_date', models.DateField(unique=True)),
+                ('standings_json', models.JSONField(default=dict)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='standings_snapshot',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='team_data', to='games.standingssnapshot'),
+        ),
+        migrations.RunPython(create_standings_snapshots, restore_team_data_json),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0032_standingssnapshot'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='teamdata',
+            name='team_data_json',
+        ),
+    ]
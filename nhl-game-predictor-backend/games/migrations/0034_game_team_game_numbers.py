@@ -0,0 +1,65 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:27
+
+from django.db import migrations, models
+
+# assigns games without a season to the season in their game_json, so that they are numbered within it
+BACKFILL_GAME_SEASONS_SQL = """
+UPDATE games_game
+SET season_id = games_season.id
+FROM games_season
+WHERE games_game.season_id IS NULL
+  AND games_season.id = (games_game.game_json ->> 'season')::bigint
+"""
+
+# numbers every game of every team season in one statement (see GAME_NUMBERS_SQL in the data loader)
+BACKFILL_GAME_NUMBERS_SQL = """
+WITH team_games AS (
+    SELECT id, season_id, home_team_id AS team_id, TRUE AS is_home, (game_json ->> 'gameType')::int AS game_type, game_date
+    FROM games_game
+    UNION ALL
+    SELECT id, season_id, away_team_id AS team_id, FALSE AS is_home, (game_json ->> 'gameType')::int AS game_type, game_date
+    FROM games_game
+),
+numbered_team_games AS (
+    SELECT id, is_home,
+           ROW_NUMBER() OVER (PARTITION BY team_id, season_id, game_type ORDER BY game_date, id)
+           + CASE WHEN game_type = 3
+                  THEN COUNT(*) FILTER (WHERE game_type = 2) OVER (PARTITION BY team_id, season_id)
+                  ELSE 0 END AS game_number
+    FROM team_games
+),
+game_numbers AS (
+    SELECT id,
+           MAX(game_number) FILTER (WHERE is_home) AS home_team_game_number,
+           MAX(game_number) FILTER (WHERE NOT is_home) AS away_team_game_number
+    FROM numbered_team_games
+    GROUP BY id
+)
+UPDATE games_game
+SET home_team_game_number = game_numbers.home_team_game_number,
+    away_team_game_number = game_numbers.away_team_game_number
+FROM game_numbers
+WHERE games_game.id = game_numbers.id
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0033_remove_teamdata_team_data_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='away_team_game_number',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='home_team_game_number',
+            field=models.PositiveIntegerField(null=True),
+        ),
+        migrations.RunSQL(BACKFILL_GAME_SEASONS_SQL, migrations.RunSQL.noop),
+        migrations.RunSQL(BACKFILL_GAME_NUMBERS_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:28
+
+from django.db import migrations, models
+
+# copies the game type out of game_json (games without a season were assigned one before they were numbered, see 0034)
+BACKFILL_GAME_TYPE_SQL = """
+UPDATE games_game
+SET game_type = (game_json ->> 'gameType')::int
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0034_game_team_game_numbers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='game_type',
+            field=models.IntegerField(choices=[(1, 'Preseason'), (2, 'Regular Season'), (3, 'Playoffs')], null=True),
+        ),
+        migrations.RunSQL(BACKFILL_GAME_TYPE_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['season', 'game_type'], name='game_season_game_type_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0035_game_game_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='game',
+            name='season',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='games', to='games.season'),
+        ),
+        migrations.AlterField(
+            model_name='gameprediction',
+            name='game',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='predictions', to='games.game'),
+        ),
+        migrations.AlterField(
+            model_name='teamdata',
+            name='team',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='team_data', to='games.team'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['game_date'], name='game_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(condition=models.Q(('winning_team__isnull', True)), fields=['game_date'], name='game_unresolved_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teamdata',
+            index=models.Index(fields=['data_capture_date'], include=('id', 'team', 'standings_snapshot'), name='teamdata_date_covering_idx'),
+        ),
+    ]
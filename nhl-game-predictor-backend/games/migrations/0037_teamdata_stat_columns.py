@@ -0,0 +1,227 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+# copy of games.models.TEAM_DATA_STAT_FIELDS at the time of this migration: the TeamData columns
+# added below, mapped to the keys of a team's entry in the NHL API standings response
+TEAM_DATA_STAT_FIELDS = {
+    # overall record
+    "games_played": "gamesPlayed",
+    "wins": "wins",
+    "losses": "losses",
+    "ot_losses": "otLosses",
+    "goals_for": "goalFor",
+    "goals_against": "goalAgainst",
+    "goal_differential": "goalDifferential",
+
+    # last 10 games
+    "l10_games_played": "l10GamesPlayed",
+    "l10_wins": "l10Wins",
+    "l10_losses": "l10Losses",
+    "l10_ot_losses": "l10OtLosses",
+    "l10_goals_for": "l10GoalsFor",
+    "l10_goals_against": "l10GoalsAgainst",
+    "l10_goal_differential": "l10GoalDifferential",
+
+    # home games
+    "home_games_played": "homeGamesPlayed",
+    "home_wins": "homeWins",
+    "home_losses": "homeLosses",
+    "home_ot_losses": "homeOtLosses",
+    "home_goals_for": "homeGoalsFor",
+    "home_goals_against": "homeGoalsAgainst",
+    "home_goal_differential": "homeGoalDifferential",
+
+    # road games
+    "road_games_played": "roadGamesPlayed",
+    "road_wins": "roadWins",
+    "road_losses": "roadLosses",
+    "road_ot_losses": "roadOtLosses",
+    "road_goals_for": "roadGoalsFor",
+    "road_goals_against": "roadGoalsAgainst",
+    "road_goal_differential": "roadGoalDifferential",
+}
+
+
+def set_team_data_stats(apps, schema_editor):
+    TeamData = apps.get_model('games', 'TeamData')
+    StandingsSnapshot = apps.get_model('games', 'StandingsSnapshot')
+
+    # TeamData is read in snapshot order, so each snapshot is only fetched once
+    standings_json = {}
+    standings_snapshot_id = None
+    team_data_to_update = []
+    for team_data in TeamData.objects.filter(standings_snapshot__isnull=False).only("id", "team_id", "standings_snapshot_id").order_by("standings_snapshot_id").iterator(chunk_size=2000):
+        if team_data.standings_snapshot_id != standings_snapshot_id:
+            standings_snapshot_id = team_data.standings_snapshot_id
+            standings_json = StandingsSnapshot.objects.get(id=standings_snapshot_id).standings_json
+
+        team_data_json = standings_json.get(str(team_data.team_id), {})
+        for field, standings_key in TEAM_DATA_STAT_FIELDS.items():
+            setattr(team_data, field, team_data_json.get(standings_key) or 0)
+        team_data_to_update.append(team_data)
+
+        if len(team_data_to_update) == 2000:
+            TeamData.objects.bulk_update(team_data_to_update, fields=list(TEAM_DATA_STAT_FIELDS))
+            team_data_to_update = []
+
+    TeamData.objects.bulk_update(team_data_to_update, fields=list(TEAM_DATA_STAT_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0036_date_read_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='teamdata',
+            name='teamdata_date_covering_idx',
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='games_played',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='goal_differential',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='goals_against',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='goals_for',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='home_games_played',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='home_goal_differential',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='home_goals_against',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='home_goals_for',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='home_losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='home_ot_losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='home_wins',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='l10_games_played',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='l10_goal_differential',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='l10_goals_against',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='l10_goals_for',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='l10_losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='l10_ot_losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='l10_wins',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='ot_losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='road_games_played',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='road_goal_differential',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='road_goals_against',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='road_goals_for',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='road_losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='road_ot_losses',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='road_wins',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='teamdata',
+            name='wins',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='teamdata',
+            index=models.Index(fields=['data_capture_date'], name='teamdata_date_idx'),
+        ),
+        migrations.RunPython(set_team_data_stats, migrations.RunPython.noop),
+    ]
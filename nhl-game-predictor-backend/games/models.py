@@ -1,7 +1,58 @@
+import hashlib
+import json
+
 from django.db import models
 from django.utils import timezone
 
 
+def hash_game_json(game_json : dict) -> str:
+    """
+    returns the SHA-256 hex digest of a game payload from the NHL API. keys are sorted
+    and whitespace is removed first, so equal payloads always have the same hash
+    """
+    canonical_json = json.dumps(game_json, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical_json.encode("utf-8")).hexdigest()
+
+# the statistics of a team's standings entry that TeamData stores as columns, mapped to their keys in the NHL API standings
+TEAM_DATA_STAT_FIELDS = {
+    # overall record
+    "games_played": "gamesPlayed",
+    "wins": "wins",
+    "losses": "losses",
+    "ot_losses": "otLosses",
+    "goals_for": "goalFor",
+    "goals_against": "goalAgainst",
+    "goal_differential": "goalDifferential",
+
+    # last 10 games
+    "l10_games_played": "l10GamesPlayed",
+    "l10_wins": "l10Wins",
+    "l10_losses": "l10Losses",
+    "l10_ot_losses": "l10OtLosses",
+    "l10_goals_for": "l10GoalsFor",
+    "l10_goals_against": "l10GoalsAgainst",
+    "l10_goal_differential": "l10GoalDifferential",
+
+    # home games
+    "home_games_played": "homeGamesPlayed",
+    "home_wins": "homeWins",
+    "home_losses": "homeLosses",
+    "home_ot_losses": "homeOtLosses",
+    "home_goals_for": "homeGoalsFor",
+    "home_goals_against": "homeGoalsAgainst",
+    "home_goal_differential": "homeGoalDifferential",
+
+    # road games
+    "road_games_played": "roadGamesPlayed",
+    "road_wins": "roadWins",
+    "road_losses": "roadLosses",
+    "road_ot_losses": "roadOtLosses",
+    "road_goals_for": "roadGoalsFor",
+    "road_goals_against": "roadGoalsAgainst",
+    "road_goal_differential": "roadGoalDifferential",
+}
+
+
 class Franchise(models.Model):
     """
     a model to represent a franchise, which can have multiple team representations
@@ -22,19 +73,72 @@ class Team(models.Model):
     def __str__(self):
         return f"{self.name} ({self.abbreviation})"
 
+class StandingsSnapshot(models.Model):
+    """
+    class to store the league standings reported by the NHL API for a single date.
+    every team's standings are stored in one row, so the standings of the whole league
+    on a date are read with a single fetch, and TeamData only references the snapshot
+    """
+    id = models.BigAutoField(primary_key=True)
+
+    # date of the standings response, which is shared by every date that it describes (e.g. the playoffs)
+    standings_date = models.DateField(unique=True)
+
+    # maps the ID of each team (as a string) to the team's entry in the standings response
+    standings_json = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Standings ({self.standings_date})"
+
+
 class TeamData(models.Model):
     """
     class to record a team's statistics for a provided day for model training
     """
     id = models.BigAutoField(primary_key=True)
     
-    # associated to a team
-    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='team_data')
-    # date that the data captures for
-    team_data_json = models.JSONField(default=dict)
+    # associated to a team. indexed by the unique (team, data_capture_date) constraint, which leads with the team
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='team_data', db_index=False)
+
+    # league standings that the team's statistics are read from. there are no standings before a team's first game
+    standings_snapshot = models.ForeignKey(StandingsSnapshot, on_delete=models.CASCADE, related_name='team_data', null=True)
 
+    # date that the data captures for
     data_capture_date = models.DateField()
 
+    # the statistics of the team's standings entry (see TEAM_DATA_STAT_FIELDS), copied by set_stats so that
+    # features are built from numeric columns rather than the standings JSON. every statistic is 0 without standings
+    games_played = models.PositiveSmallIntegerField(default=0)
+    wins = models.PositiveSmallIntegerField(default=0)
+    losses = models.PositiveSmallIntegerField(default=0)
+    ot_losses = models.PositiveSmallIntegerField(default=0)
+    goals_for = models.PositiveSmallIntegerField(default=0)
+    goals_against = models.PositiveSmallIntegerField(default=0)
+    goal_differential = models.SmallIntegerField(default=0)
+
+    l10_games_played = models.PositiveSmallIntegerField(default=0)
+    l10_wins = models.PositiveSmallIntegerField(default=0)
+    l10_losses = models.PositiveSmallIntegerField(default=0)
+    l10_ot_losses = models.PositiveSmallIntegerField(default=0)
+    l10_goals_for = models.PositiveSmallIntegerField(default=0)
+    l10_goals_against = models.PositiveSmallIntegerField(default=0)
+    l10_goal_differential = models.SmallIntegerField(default=0)
+
+    home_games_played = models.PositiveSmallIntegerField(default=0)
+    home_wins = models.PositiveSmallIntegerField(default=0)
+    home_losses = models.PositiveSmallIntegerField(default=0)
+    home_ot_losses = models.PositiveSmallIntegerField(default=0)
+    home_goals_for = models.PositiveSmallIntegerField(default=0)
+    home_goals_against = models.PositiveSmallIntegerField(default=0)
+    home_goal_differential = models.SmallIntegerField(default=0)
+
+    road_games_played = models.PositiveSmallIntegerField(default=0)
+    road_wins = models.PositiveSmallIntegerField(default=0)
+    road_losses = models.PositiveSmallIntegerField(default=0)
+    road_ot_losses = models.PositiveSmallIntegerField(default=0)
+    road_goals_for = models.PositiveSmallIntegerField(default=0)
+    road_goals_against = models.PositiveSmallIntegerField(default=0)
+    road_goal_differential = models.SmallIntegerField(default=0)
     WIN = 0
     LOSS = 1
     OVERTIME = 2
@@ -42,9 +146,36 @@ class TeamData(models.Model):
 
     class Meta:
         unique_together = ('team', 'data_capture_date')
+        indexes = [
+            # the data loader selects the TeamData of a set of dates
+            models.Index(fields=['data_capture_date'], name='teamdata_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.team} Data ({self.data_capture_date})"
+
+    @property
+    def team_data_json(self) -> dict:
+        """
+        the team's entry in the league standings, or an empty dictionary if there are no standings
+        """
+        if self.standings_snapshot is None:
+            return {}
+
+        return self.standings_snapshot.standings_json.get(str(self.team_id), {})
+
+    def save(self, *args, **kwargs):
+        self.set_stats()
+        super().save(*args, **kwargs)
+
+    def set_stats(self):
+        """
+        copies the statistics of the team's standings entry into their columns. called before
+        TeamData is written, including by the bulk writes of the data loader
+        """
+        team_data_json = self.team_data_json
+        for field, standings_key in TEAM_DATA_STAT_FIELDS.items():
+            setattr(self, field, team_data_json.get(standings_key) or 0)
     
 class Season(models.Model):
     """
@@ -58,6 +189,17 @@ class Season(models.Model):
 
     season_json = models.JSONField(default=dict)
 
+class EmptyGameDate(models.Model):
+    """
+    class to represent a date on which no NHL games are played. dates are recorded from
+    the NHL API's schedule responses, so that the schedule is not requested again for
+    dates that are known to have no games (off-days, the All-Star break, the off-season)
+    """
+    date = models.DateField(primary_key=True)
+
+    def __str__(self):
+        return f"No games on {self.date}"
+
 class Game(models.Model):
     """
     class to represent a single NHL game
@@ -67,6 +209,9 @@ class Game(models.Model):
 
     game_json = models.JSONField(default=dict)
 
+    # hash of game_json (see hash_game_json), used to detect payloads that have not changed
+    game_json_hash = models.CharField(max_length=64, blank=True, default="")
+
     # home and away teams
     home_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='home_games')
     away_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='away_games')
@@ -75,20 +220,57 @@ class Game(models.Model):
     # date of game
     game_date = models.DateField()
 
-    season = models.ForeignKey(Season, on_delete=models.SET_NULL, null=True, related_name='games')
+    # indexed by game_season_game_type_idx, which leads with the season
+    season = models.ForeignKey(Season, on_delete=models.SET_NULL, null=True, related_name='games', db_index=False)
 
     # game type
     PRESEASON = 1
     REGULAR_SEASON = 2
     PLAYOFFS = 3
 
+    # the gameType of game_json, stored as a column so that games can be filtered by type without decoding game_json
+    game_type = models.IntegerField(choices=[(PRESEASON, 'Preseason'), (REGULAR_SEASON, 'Regular Season'), (PLAYOFFS, 'Playoffs')], null=True)
+
     # relationships to TeamData for pre-game analysis
     home_team_data = models.ForeignKey(TeamData, on_delete=models.SET_NULL, related_name='home_game_data', null=True)
     away_team_data = models.ForeignKey(TeamData, on_delete=models.SET_NULL, related_name='away_game_data', null=True)
 
+    # the number of each team's game in the season, counted separately for preseason games. playoff
+    # games continue from the end of the regular season. maintained by update_game_numbers in the data loader
+    home_team_game_number = models.PositiveIntegerField(null=True)
+    away_team_game_number = models.PositiveIntegerField(null=True)
+
+    class Meta:
+        indexes = [
+            # training and the standings engine select the games of seasons by type
+            models.Index(fields=['season', 'game_type'], name='game_season_game_type_idx'),
+            # the public endpoints and fetch_games_for_date select the games of a date
+            models.Index(fields=['game_date'], name='game_date_idx'),
+            # update_completed_games selects past games without a winner, which are a small fraction of all games
+            models.Index(fields=['game_date'], condition=models.Q(winning_team__isnull=True), name='game_unresolved_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.home_team} vs {self.away_team} on {self.game_date.strftime('%Y-%m-%d %H:%M')}"
     
+    def save(self, *args, **kwargs):
+        self.game_json_hash = hash_game_json(self.game_json)
+        super().save(*args, **kwargs)
+
+    def update_game_json(self, game_json : dict) -> bool:
+        """
+        stores a game payload from the NHL API along with its hash, unless it is identical
+        to the stored payload. returns True if the payload changed, so callers refreshing
+        games only need to write game_json and game_json_hash when it did
+        """
+        game_json_hash = hash_game_json(game_json)
+        if game_json_hash == self.game_json_hash:
+            return False
+
+        self.game_json = game_json
+        self.game_json_hash = game_json_hash
+        return True
+
     def is_completed(self):
         """
         a game is defined as completed if the date of the game is in the past
@@ -96,68 +278,6 @@ class Game(models.Model):
         current_date = timezone.localdate()
         return current_date > self.game_date
     
-    def home_team_game_number(self):
-        game_type = self.game_json.get("gameType")
-
-        def combined_games(game_type):
-            home_games = Game.objects.filter(
-                game_json__gameType=game_type,
-                home_team=self.home_team,
-                season=self.season,
-                game_date__lte=self.game_date
-            ).exclude(id=self.id)
-
-            away_games = Game.objects.filter(
-                game_json__gameType=game_type,
-                away_team=self.home_team,
-                season=self.season,
-                game_date__lte=self.game_date
-            ).exclude(id=self.id)
-
-            return home_games.union(away_games)
-
-        if game_type == self.PRESEASON:
-            return combined_games(self.PRESEASON).count() + 1
-
-        elif game_type == self.REGULAR_SEASON:
-            return combined_games(self.REGULAR_SEASON).count() + 1
-
-        else:
-            regular_season_count = combined_games(self.REGULAR_SEASON).count()
-            playoff_count = combined_games(self.PLAYOFFS).count()
-            return regular_season_count + playoff_count + 1
-        
-    def away_team_game_number(self):
-        game_type = self.game_json.get("gameType")
-
-        def combined_games(game_type):
-            home_games = Game.objects.filter(
-                game_json__gameType=game_type,
-                home_team=self.away_team,
-                season=self.season,
-                game_date__lte=self.game_date
-            ).exclude(id=self.id)
-
-            away_games = Game.objects.filter(
-                game_json__gameType=game_type,
-                away_team=self.away_team,
-                season=self.season,
-                game_date__lte=self.game_date
-            ).exclude(id=self.id)
-
-            return home_games.union(away_games)
-
-        if game_type == self.PRESEASON:
-            return combined_games(self.PRESEASON).count() + 1
-
-        elif game_type == self.REGULAR_SEASON:
-            return combined_games(self.REGULAR_SEASON).count() + 1
-
-        else:
-            regular_season_count = combined_games(self.REGULAR_SEASON).count()
-            playoff_count = combined_games(self.PLAYOFFS).count()
-            return regular_season_count + playoff_count + 1
-    
 
 class GamePrediction(models.Model):
     """
@@ -165,7 +285,8 @@ class GamePrediction(models.Model):
     used for caching purposes once the machine learning model has made predictions
     for all games on a provided day.
     """
-    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='predictions', null=True)
+    # indexed by the unique (game, model) constraint, which leads with the game
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='predictions', null=True, db_index=False)
     model = models.ForeignKey('predictor.PredictionModel', on_delete=models.CASCADE, related_name='predictions', null=True)
     
     predicted_home_team_win = models.BooleanField(default=False)
@@ -177,4 +298,55 @@ class GamePrediction(models.Model):
         unique_together = ('game', 'model') 
 
     def __str__(self):
-        return f"Prediction by {self.model} for Game {self.game} - Predicted Winner: {self.game.home_team if self.predicted_home_team_win else self.game.away_team}"
\ No newline at end of file
+        return f"Prediction by {self.model} for Game {self.game} - Predicted Winner: {self.game.home_team if self.predicted_home_team_win else self.game.away_team}"
+
+class BackfillJob(models.Model):
+    """
+    class to represent a resumable backfill of games from the NHL API. a job is split
+    into units (one per team and season, or one per schedule week and season) that
+    are each committed to the database as they complete, so an interrupted job can be
+    resumed from its last completed unit
+    """
+    TEAM = "team"
+    LEAGUE = "league"
+    MODE_CHOICES = [
+        (TEAM, "Team club schedules"),
+        (LEAGUE, "League weekly schedule"),
+    ]
+
+    mode = models.CharField(max_length=10, choices=MODE_CHOICES, default=LEAGUE)
+    seasons = models.JSONField(default=list)
+    get_team_data = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    # totals accumulated across every run of the job, used to report throughput
+    games_created = models.IntegerField(default=0)
+    api_calls = models.IntegerField(default=0)
+    elapsed_seconds = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"Backfill Job {self.id} ({self.mode}: {', '.join(str(season) for season in self.seasons)})"
+
+
+class BackfillJobUnit(models.Model):
+    """
+    class to represent a single checkpoint of a BackfillJob. unit_key is the team
+    abbreviation for team jobs, or the schedule week's start date for league jobs
+    """
+    job = models.ForeignKey(BackfillJob, on_delete=models.CASCADE, related_name='units')
+    season = models.BigIntegerField()
+    unit_key = models.CharField(max_length=10)
+
+    completed_at = models.DateTimeField(null=True, blank=True)
+    games_created = models.IntegerField(default=0)
+    api_calls = models.IntegerField(default=0)
+    elapsed_seconds = models.FloatField(default=0)
+
+    class Meta:
+        unique_together = ('job', 'season', 'unit_key')
+
+    def __str__(self):
+        return f"{self.job} - {self.unit_key} ({self.season})"
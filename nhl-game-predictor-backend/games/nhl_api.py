@@ -0,0 +1,455 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import threading
+import httpx
+
+from django.conf import settings
+from django.utils import timezone
+from datetime import datetime, timedelta
+
+# matches the date in date-based endpoints, such as schedule/2024-10-08 and standings/2024-10-08
+DATE_URL_REGEX = re.compile(r'/(schedule|standings)/([0-9]{4}-[0-9]{2}-[0-9]{2})')
+
+# matches the season in club schedule endpoints, such as club-schedule-season/TOR/20242025
+SEASON_URL_REGEX = re.compile(r'/club-schedule-season/[A-Z]+/([0-9]{8})')
+
+# matches the endpoint name of a URL, such as standings in https://api-web.nhle.com/v1/standings/2024-10-08
+ENDPOINT_URL_REGEX = re.compile(r'/(?:v1|stats/rest/en)/([A-Za-z-]+)')
+
+# responses with these status codes are transient, so the request is retried
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# results (and the standings computed from them) can still be corrected shortly after a game,
+# so a date is only settled once it is at least this many days in the past
+SETTLED_DATE_MIN_AGE = timedelta(days=2)
+
+# game state of games whose results are official, after which they no longer change
+FINAL_GAME_STATE = "OFF"
+
+
+def is_settled_date(date : datetime) -> bool:
+    """
+    determines whether the games and standings of a date can no longer change
+    """
+    return date <= timezone.localdate() - SETTLED_DATE_MIN_AGE
+
+def are_all_games_final(response_json : dict) -> bool:
+    """
+    determines whether a schedule response has games, and every one of them is final
+    """
+    games_json = response_json.get("games", [])
+    for day_json in response_json.get("gameWeek", []):
+        games_json = games_json + day_json.get("games", [])
+
+    return len(games_json) != 0 and all(game_json.get("gameState") == FINAL_GAME_STATE for game_json in games_json)
+
+
+class NHLAPIOfflineError(Exception):
+    """
+    raised when the NHL API client is in offline mode and a response
+    has not been cached for the requested URL
+    """
+
+
+class NHLAPIError(Exception):
+    """
+    raised when the NHL API does not return a successful response,
+    including after all retries of a transient failure have been exhausted
+    """
+
+
+class TokenBucket:
+    """
+    class to represent a token bucket rate limiter. tokens are added at a constant
+    rate up to a maximum capacity, and each request consumes a single token. the bucket
+    is thread-safe and shared by synchronous and asynchronous requests alike
+    """
+
+    def __init__(self, rate : float, capacity : int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        consumes a token, returning the number of seconds the caller must wait
+        before the token is available. tokens can be reserved ahead of time, so
+        concurrent callers are spaced out instead of all waking up at once
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait_seconds = self.reserve()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+
+    async def async_acquire(self):
+        wait_seconds = self.reserve()
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
+
+
+class NHLAPIEndpointStats:
+    """
+    class to record the requests made to a single NHL API endpoint
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.cache_hits = 0
+        self.retries = 0
+        self.failures = 0
+        self.bytes = 0
+        self.seconds = 0
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "retries": self.retries,
+            "failures": self.failures,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+class NHLAPIResponseCache:
+    """
+    class to represent a persistent, on-disk cache of NHL API responses. each
+    response is stored in a file named after the SHA-256 hash of its URL.
+
+    responses that describe settled dates (see is_settled_date), or only games that are
+    final, never change, so they are stored without an expiry. responses for recent or
+    future dates (and for endpoints that are not tied to a date) expire after ttl seconds
+    """
+
+    def __init__(self, cache_dir : str = None, ttl : float = None):
+        self.cache_dir = settings.NHL_API_CACHE_DIR if cache_dir is None else cache_dir
+        self.ttl = settings.NHL_API_CACHE_TTL if ttl is None else ttl
+
+    def path_for_url(self, url : str) -> str:
+        url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, url_hash[:2], f"{url_hash}.json")
+
+    def is_immutable(self, url : str, response_json : dict = None) -> bool:
+        """
+        determines whether the response for a URL can no longer change
+        """
+        current_date = timezone.localdate()
+
+        if isinstance(response_json, dict) and are_all_games_final(response_json):
+            return True
+
+        date_match = DATE_URL_REGEX.search(url)
+        if date_match is not None:
+            endpoint, date_string = date_match.groups()
+            url_date = datetime.strptime(date_string, "%Y-%m-%d").date()
+
+            # the schedule endpoint returns the whole week starting at the provided date
+            if endpoint == "schedule":
+                return is_settled_date(url_date + timedelta(days=6))
+
+            return is_settled_date(url_date)
+
+        season_match = SEASON_URL_REGEX.search(url)
+        if season_match is not None:
+            # a season is over once the next season has started in July
+            season_end_year = int(season_match.group(1)[4:])
+            return current_date >= datetime(season_end_year, 7, 1).date()
+
+        return False
+
+    def load(self, url : str, allow_expired : bool = False):
+        """
+        returns the cached response for a URL, or None if it is not cached or has expired
+        """
+        try:
+            with open(self.path_for_url(url), "r") as cache_file:
+                cache_entry = json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+        expires_at = cache_entry.get("expires_at")
+        if not allow_expired and expires_at is not None and expires_at < time.time():
+            return None
+
+        return httpx.Response(status_code=cache_entry.get("status_code"),
+                              content=cache_entry.get("content").encode("utf-8"),
+                              headers={"content-type": "application/json"},
+                              request=httpx.Request("GET", url))
+
+    def store(self, url : str, response : httpx.Response):
+        """
+        stores a successful response on disk. the entry is written to a temporary
+        file first so that concurrent readers never observe a partial entry
+        """
+        if response.status_code != 200:
+            return
+
+        try:
+            response_json = response.json()
+        except ValueError:
+            response_json = None
+
+        cache_entry = {
+            "url": url,
+            "status_code": response.status_code,
+            "fetched_at": time.time(),
+            "expires_at": None if self.is_immutable(url, response_json) else time.time() + self.ttl,
+            "content": response.text,
+        }
+
+        cache_path = self.path_for_url(url)
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        temporary_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporary_path, "w") as cache_file:
+            json.dump(cache_entry, cache_file)
+        os.replace(temporary_path, cache_path)
+
+
+class NHLAPIClient:
+    """
+    class to represent a long-lived connection to the NHL API. every request made
+    by the data loaders goes through a single pooled httpx.Client, so connections
+    (and their TLS handshakes) to api-web.nhle.com and api.nhle.com are reused
+    between requests instead of being re-established for every call
+    """
+
+    def __init__(self, timeout : float = None, http2 : bool = None, max_connections : int = None,
+                 max_keepalive_connections : int = None, keepalive_expiry : float = None,
+                 cache : NHLAPIResponseCache = None, offline : bool = None, rate_limiter : TokenBucket = None,
+                 max_retries : int = None, backoff_base : float = None, backoff_max : float = None):
+        self.timeout = settings.NHL_API_TIMEOUT if timeout is None else timeout
+        self.http2 = settings.NHL_API_HTTP2 if http2 is None else http2
+        self.max_connections = settings.NHL_API_MAX_CONNECTIONS if max_connections is None else max_connections
+        self.max_keepalive_connections = settings.NHL_API_MAX_KEEPALIVE_CONNECTIONS if max_keepalive_connections is None else max_keepalive_connections
+        self.keepalive_expiry = settings.NHL_API_KEEPALIVE_EXPIRY if keepalive_expiry is None else keepalive_expiry
+
+        # responses are cached on disk when caching is enabled, and offline mode only serves cached responses
+        if cache is None and settings.NHL_API_CACHE_ENABLED:
+            cache = NHLAPIResponseCache()
+        self.cache = cache
+        self.offline = settings.NHL_API_OFFLINE if offline is None else offline
+
+        # every request made through the client shares the same rate limit, and transient
+        # failures are retried with jittered exponential backoff
+        if rate_limiter is None:
+            rate_limiter = TokenBucket(rate=settings.NHL_API_REQUESTS_PER_SECOND,
+                                       capacity=settings.NHL_API_BURST)
+        self.rate_limiter = rate_limiter
+        self.max_retries = settings.NHL_API_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = settings.NHL_API_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = settings.NHL_API_BACKOFF_MAX if backoff_max is None else backoff_max
+
+        # requests made to each endpoint, keyed by endpoint name
+        self.stats = {}
+        self.stats_lock = threading.RLock()
+
+        # the underlying client is created on first use
+        self._client = None
+
+    def client_options(self) -> dict:
+        """
+        keyword arguments shared by the synchronous and asynchronous httpx clients
+        """
+        return {
+            "timeout": httpx.Timeout(self.timeout),
+            "http2": self.http2,
+            "limits": httpx.Limits(max_connections=self.max_connections,
+                                   max_keepalive_connections=self.max_keepalive_connections,
+                                   keepalive_expiry=self.keepalive_expiry),
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.Client(**self.client_options())
+        return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        """
+        creates an httpx.AsyncClient configured identically to the pooled client.
+        asynchronous clients are bound to an event loop, so a new one is created
+        for each event loop that needs one (e.g., each asyncio.run call)
+        """
+        return httpx.AsyncClient(**self.client_options())
+
+    def endpoint_stats(self, url : str) -> NHLAPIEndpointStats:
+        """
+        returns the stats of the endpoint that a URL belongs to
+        """
+        endpoint_match = ENDPOINT_URL_REGEX.search(url)
+        endpoint = endpoint_match.group(1) if endpoint_match is not None else "other"
+
+        with self.stats_lock:
+            if endpoint not in self.stats:
+                self.stats[endpoint] = NHLAPIEndpointStats()
+            return self.stats[endpoint]
+
+    def stats_summary(self) -> dict:
+        """
+        returns the request stats of every endpoint as a dictionary
+        """
+        with self.stats_lock:
+            return {endpoint: endpoint_stats.to_dict() for endpoint, endpoint_stats in self.stats.items()}
+
+    def reset_stats(self):
+        with self.stats_lock:
+            self.stats = {}
+
+    def load_cached_response(self, url : str):
+        """
+        returns the cached response for a URL, if there is one. in offline mode,
+        expired responses are still served and a missing response raises NHLAPIOfflineError
+        """
+        if self.cache is None:
+            if self.offline:
+                raise NHLAPIOfflineError(f"No response cache is configured to serve {url} offline")
+            return None
+
+        cached_response = self.cache.load(url, allow_expired=self.offline)
+        if cached_response is None and self.offline:
+            raise NHLAPIOfflineError(f"No cached response for {url}")
+
+        if cached_response is not None:
+            with self.stats_lock:
+                self.endpoint_stats(url).cache_hits += 1
+
+        return cached_response
+
+    def store_response(self, url : str, response : httpx.Response):
+        if self.cache is not None:
+            self.cache.store(url, response)
+
+    def retry_delay(self, attempt : int, response : httpx.Response = None) -> float:
+        """
+        the number of seconds to wait before retrying a failed request. the NHL API's
+        Retry-After header is respected, otherwise the delay grows exponentially
+        with each attempt and is jittered so that concurrent requests do not retry in lockstep
+        """
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(self.backoff_max, float(response.headers.get("Retry-After")))
+
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def record_response(self, url : str, response : httpx.Response, seconds : float):
+        with self.stats_lock:
+            endpoint_stats = self.endpoint_stats(url)
+            endpoint_stats.requests += 1
+            endpoint_stats.bytes += len(response.content)
+            endpoint_stats.seconds += seconds
+
+    def handle_attempt(self, url : str, attempt : int, seconds : float, response : httpx.Response = None, error : httpx.TransportError = None):
+        """
+        records an attempt of a request that either received a response or failed with a transport
+        error, and decides whether it is retried. returns None once the response can be returned,
+        or the number of seconds to wait before retrying a transient failure (see RETRY_STATUS_CODES).
+        an NHLAPIError is raised once every retry has been used
+        """
+        if response is not None:
+            self.record_response(url=url, response=response, seconds=seconds)
+            if response.status_code not in RETRY_STATUS_CODES:
+                return None
+
+        is_last_attempt = attempt >= self.max_retries
+        with self.stats_lock:
+            endpoint_stats = self.endpoint_stats(url)
+            if is_last_attempt:
+                endpoint_stats.failures += 1
+            else:
+                endpoint_stats.retries += 1
+
+        if is_last_attempt:
+            reason = repr(error) if error is not None else f"status code {response.status_code}"
+            raise NHLAPIError(f"Request to {url} failed after {attempt + 1} attempts: {reason}") from error
+
+        return self.retry_delay(attempt=attempt, response=response)
+
+    def get(self, url : str) -> httpx.Response:
+        """
+        sends a GET request through the pooled connection, serving the response
+        from the on-disk cache when possible. transient failures are retried, and
+        an NHLAPIError is raised once every retry has been used
+        """
+        cached_response = self.load_cached_response(url)
+        if cached_response is not None:
+            return cached_response
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            start = time.monotonic()
+            response = None
+            try:
+                response = self.client.get(url)
+            except httpx.TransportError as error:
+                retry_delay = self.handle_attempt(url=url, attempt=attempt, seconds=time.monotonic() - start, error=error)
+            else:
+                retry_delay = self.handle_attempt(url=url, attempt=attempt, seconds=time.monotonic() - start, response=response)
+
+            if retry_delay is None:
+                self.store_response(url, response)
+                return response
+
+            time.sleep(retry_delay)
+
+    async def async_get(self, client : httpx.AsyncClient, url : str) -> httpx.Response:
+        """
+        asynchronous equivalent of get, using a client created by async_client
+        """
+        cached_response = self.load_cached_response(url)
+        if cached_response is not None:
+            return cached_response
+
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.async_acquire()
+            start = time.monotonic()
+            response = None
+            try:
+                response = await client.get(url)
+            except httpx.TransportError as error:
+                retry_delay = self.handle_attempt(url=url, attempt=attempt, seconds=time.monotonic() - start, error=error)
+            else:
+                retry_delay = self.handle_attempt(url=url, attempt=attempt, seconds=time.monotonic() - start, response=response)
+
+            if retry_delay is None:
+                self.store_response(url, response)
+                return response
+
+            await asyncio.sleep(retry_delay)
+
+    def get_json(self, url : str) -> dict:
+        """
+        sends a GET request and returns the JSON body of the response,
+        raising an NHLAPIError if the response is not successful
+        """
+        response = self.get(url)
+        if response.status_code != 200:
+            raise NHLAPIError(f"Request to {url} returned status code {response.status_code}")
+        return response.json()
+
+    def close(self):
+        """
+        closes every pooled connection
+        """
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+
+# the client shared by every NHL API call in the process
+nhl_api_client = NHLAPIClient()
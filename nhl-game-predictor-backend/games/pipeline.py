@@ -0,0 +1,254 @@
+import queue
+import threading
+
+from collections import deque
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from games.reference_data import reference_data
+from games.nhl_api import nhl_api_client
+from games.data_loader import write_games_batch, fetch_games_for_team_from_api, fetch_games_for_schedule_week_from_api, get_season_schedule_weeks, get_season_for_date, check_standings_source_for_fetch_phase
+
+
+class IngestionPipeline:
+    """
+    class to represent a streaming producer/consumer pipeline that loads games from the NHL API.
+    the seasons are split into units (a week of the league schedule, or a team's club schedule
+    for a season), which fetcher threads request and parse concurrently. the parsed Game and
+    TeamData instances of each unit are put on a bounded queue, and the writer (the thread that
+    calls run) writes them in batches of batch_size games while fetches continue, each batch in
+    its own short transaction.
+
+    fetchers wait while the queue is full, so at most queue_size units are held in memory
+    at once, however many seasons are loaded.
+
+    fetchers only request the NHL API and read from the database: everything a unit reveals
+    (its games, TeamData and calendar) is written by the writer
+    """
+
+    # put on the queue by each fetcher once there are no units left to fetch
+    FETCHER_DONE = object()
+
+    def __init__(self, seasons : list, league : bool = True, team_abbreviations : list = None, get_team_data : bool = True,
+                 batch_size : int = None, queue_size : int = None, fetchers : int = None):
+
+        if len(seasons) == 0:
+            raise ValueError(f"Please enter seasons to fetch game data for.")
+
+        for season_id in seasons:
+            if reference_data.season(season_id) is None:
+                raise ValueError(f"No season found with ID {season_id}")
+
+        check_standings_source_for_fetch_phase(get_team_data=get_team_data)
+
+        self.seasons = seasons
+        self.league = league
+        self.team_abbreviations = team_abbreviations
+        self.get_team_data = get_team_data
+        self.batch_size = batch_size if batch_size is not None else settings.NHL_API_PIPELINE_BATCH_SIZE
+        self.fetchers = fetchers if fetchers is not None else settings.NHL_API_MAX_CONCURRENT_REQUESTS
+
+        self.queue = queue.Queue(maxsize=queue_size if queue_size is not None else settings.NHL_API_PIPELINE_QUEUE_SIZE)
+        self.stop_event = threading.Event()
+
+        # units are generated one season at a time (see next_unit). seasons_generating counts the
+        # seasons whose units are being requested, which the other fetchers wait for once no units are left
+        self.units = deque()
+        self.pending_seasons = deque(seasons)
+        self.seasons_generating = 0
+        self.units_available = threading.Condition()
+
+        self.games_written = 0
+        self.written_game_ids = set()
+        self.team_data_written = 0
+        self.batches_written = 0
+
+    def generate_units(self, season_id : int) -> list:
+        """
+        returns every unit of a season to fetch, as (season, week start date, season end date) tuples
+        for the league schedule or (team abbreviation, season ID) tuples for club schedules. by default,
+        the club schedules of the teams in the season's final standings are fetched
+        """
+        season = reference_data.season(season_id)
+
+        if self.league:
+            season_end_date, week_start_dates = get_season_schedule_weeks(season=season)
+            return [(season, week_start_date, season_end_date) for week_start_date in week_start_dates]
+
+        team_abbreviations = self.team_abbreviations
+        if team_abbreviations is None:
+            standings_url = f"{settings.NHL_API_BASE_URL}standings/{season.regular_season_end.strftime('%Y-%m-%d')}"
+            standings_json = nhl_api_client.get_json(standings_url).get("standings", [])
+            team_abbreviations = [team_json.get("teamAbbrev", {}).get("default") for team_json in standings_json]
+            team_abbreviations = [team_abbreviation for team_abbreviation in team_abbreviations if reference_data.team(team_abbreviation) is not None]
+
+        return [(team_abbreviation, season_id) for team_abbreviation in team_abbreviations]
+
+    def next_unit(self):
+        """
+        returns the next unit to fetch, or None once every unit has been handed out. once the
+        units of a season have all been handed out, the fetcher that asks for the next unit
+        generates the next season's units, which requires the NHL API. the request is made
+        without holding the lock, so the other fetchers keep fetching the remaining units
+        """
+        with self.units_available:
+            while True:
+                if self.units:
+                    return self.units.popleft()
+
+                if self.pending_seasons and not self.stop_event.is_set():
+                    season_id = self.pending_seasons.popleft()
+                    self.seasons_generating += 1
+                    break
+
+                if self.seasons_generating == 0 or self.stop_event.is_set():
+                    return None
+
+                self.units_available.wait()
+
+        units = []
+        try:
+            units = self.generate_units(season_id)
+        finally:
+            with self.units_available:
+                self.units.extend(units)
+                self.seasons_generating -= 1
+                self.units_available.notify_all()
+
+        return self.next_unit()
+
+    def fetch_unit(self, unit : tuple):
+        """
+        returns the list of Game instances and the list of TeamData instances to create for a unit,
+        along with the schedule responses whose calendar is recorded by the writer
+        """
+        if self.league:
+            season, week_start_date, season_end_date = unit
+            return fetch_games_for_schedule_week_from_api(season=season,
+                                                          week_start_date=week_start_date,
+                                                          season_end_date=season_end_date,
+                                                          get_team_data=self.get_team_data)
+
+        team_abbreviation, season_id = unit
+        games, team_data = fetch_games_for_team_from_api(team_abbreviation=team_abbreviation,
+                                                         seasons=[season_id],
+                                                         get_team_data=self.get_team_data)
+        return games, team_data, []
+
+    def fetch(self):
+        """
+        fetcher thread: fetches units until there are none left or the pipeline is stopped.
+        an exception is put on the queue for the writer to raise
+        """
+        try:
+            while not self.stop_event.is_set():
+                unit = self.next_unit()
+                if unit is None:
+                    break
+
+                self.queue.put(self.fetch_unit(unit))
+        except Exception as error:
+            self.stop_event.set()
+            self.queue.put(error)
+
+            # fetchers waiting for the units of a season stop as well
+            with self.units_available:
+                self.units_available.notify_all()
+        finally:
+            self.queue.put(self.FETCHER_DONE)
+
+            # each thread has its own database connection, which would otherwise be left open
+            connection.close()
+
+    def write_batch(self, games : list, team_data : list, schedules_json : list):
+        written_games = write_games_batch(games_to_create=games, team_data_to_create=team_data, schedules_json=schedules_json)
+
+        # in team mode, each game is in the club schedules of both of its teams, so it is only counted once
+        new_game_ids = {game.id for game in written_games} - self.written_game_ids
+        self.written_game_ids |= new_game_ids
+        self.games_written += len(new_game_ids)
+        self.team_data_written += len(team_data)
+        self.batches_written += 1
+
+    def run(self) -> int:
+        """
+        runs the pipeline until every unit has been fetched and written, and returns the number
+        of games written. if a fetch or write fails, the remaining units are abandoned and the
+        error is raised once the fetchers have stopped; batches already written are kept
+        """
+        # the seasons are reloaded (at most once a day) when a date is after every known season (see
+        # get_season_for_date). no later date is fetched than today, so they are reloaded here rather than by a fetcher
+        get_season_for_date(timezone.localdate())
+
+        fetcher_threads = [threading.Thread(target=self.fetch, daemon=True) for _ in range(self.fetchers)]
+        for fetcher_thread in fetcher_threads:
+            fetcher_thread.start()
+
+        error = None
+        batch_games = []
+        batch_team_data = []
+        batch_schedules_json = []
+        running_fetchers = len(fetcher_threads)
+
+        # the queue is drained until every fetcher is done, even after an error, so no fetcher is left waiting on it
+        while running_fetchers > 0:
+            item = self.queue.get()
+
+            if item is self.FETCHER_DONE:
+                running_fetchers -= 1
+                continue
+
+            if error is not None:
+                continue
+
+            if isinstance(item, Exception):
+                error = item
+                self.stop_event.set()
+                continue
+
+            unit_games, unit_team_data, unit_schedules_json = item
+            batch_games += unit_games
+            batch_team_data += unit_team_data
+            batch_schedules_json += unit_schedules_json
+
+            if len(batch_games) >= self.batch_size:
+                try:
+                    self.write_batch(games=batch_games, team_data=batch_team_data, schedules_json=batch_schedules_json)
+                except Exception as write_error:
+                    error = write_error
+                    self.stop_event.set()
+
+                batch_games = []
+                batch_team_data = []
+                batch_schedules_json = []
+
+        for fetcher_thread in fetcher_threads:
+            fetcher_thread.join()
+
+        if error is not None:
+            raise error
+
+        if batch_games or batch_team_data or batch_schedules_json:
+            self.write_batch(games=batch_games, team_data=batch_team_data, schedules_json=batch_schedules_json)
+
+        return self.games_written
+
+
+def stream_games_from_api(seasons : list, league : bool = True, team_abbreviations : list = None, get_team_data : bool = True,
+                          batch_size : int = None, queue_size : int = None, fetchers : int = None) -> IngestionPipeline:
+    """
+    loads the games of the provided seasons with an IngestionPipeline, from the league schedule
+    (by default) or from the club schedules of team_abbreviations (by default every team in
+    each season's final standings).
+    returns the pipeline, which records the number of games, TeamData and batches written
+    """
+    pipeline = IngestionPipeline(seasons=seasons,
+                                 league=league,
+                                 team_abbreviations=team_abbreviations,
+                                 get_team_data=get_team_data,
+                                 batch_size=batch_size,
+                                 queue_size=queue_size,
+                                 fetchers=fetchers)
+    pipeline.run()
+
+    return pipeline
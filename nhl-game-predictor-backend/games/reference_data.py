@@ -0,0 +1,174 @@
+import time
+import threading
+
+from datetime import datetime
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from games.models import Franchise, Team, Season, EmptyGameDate
+
+
+class ReferenceDataIndex:
+    """
+    class to represent an in-process index of the reference data (teams, franchises
+    and seasons) used while ingesting games. the reference data rarely changes, so
+    it is loaded from the database once and lookups are served from dictionaries.
+
+    the index is invalidated whenever a Team, Franchise or Season is saved or
+    deleted, and by the data loaders after they bulk write reference data. signals
+    are only received by the process that wrote the reference data, so the index is
+    also reloaded once it is older than ttl seconds
+    """
+
+    def __init__(self, ttl : float = None):
+        self.lock = threading.Lock()
+        self.ttl = settings.REFERENCE_DATA_TTL if ttl is None else ttl
+        self.loaded_at = None
+        self.teams_by_abbreviation = None
+        self.franchises_by_id = None
+        self.seasons_by_id = None
+
+    def load(self):
+        """
+        loads every Team, Franchise and Season into memory, if they are not already loaded
+        or were loaded more than ttl seconds ago
+        """
+        with self.lock:
+            if self.teams_by_abbreviation is not None and time.monotonic() - self.loaded_at < self.ttl:
+                return
+
+            # abbreviations are not unique, so the first team with an abbreviation is used (as with .first())
+            teams_by_abbreviation = {}
+            for team in Team.objects.select_related("franchise").order_by("id"):
+                teams_by_abbreviation.setdefault(team.abbreviation, team)
+
+            self.franchises_by_id = Franchise.objects.in_bulk()
+            self.seasons_by_id = Season.objects.in_bulk()
+            self.teams_by_abbreviation = teams_by_abbreviation
+            self.loaded_at = time.monotonic()
+
+    def invalidate(self):
+        """
+        discards the loaded reference data, so that it is reloaded on the next lookup
+        """
+        with self.lock:
+            self.teams_by_abbreviation = None
+            self.franchises_by_id = None
+            self.seasons_by_id = None
+
+    def team(self, abbreviation : str):
+        """
+        returns the Team with the provided abbreviation, or None if there is no such team
+        """
+        self.load()
+        return self.teams_by_abbreviation.get(abbreviation)
+
+    def teams(self) -> dict:
+        """
+        returns a dictionary that maps every team abbreviation to its Team
+        """
+        self.load()
+        return self.teams_by_abbreviation
+
+    def seasons(self) -> list:
+        """
+        returns every Season
+        """
+        self.load()
+        return list(self.seasons_by_id.values())
+
+    def franchise(self, franchise_id : int):
+        self.load()
+        return self.franchises_by_id.get(franchise_id)
+
+    def season(self, season_id : int):
+        """
+        returns the Season with the provided ID, or None if there is no such season
+        """
+        self.load()
+        return self.seasons_by_id.get(season_id)
+
+
+class EmptyGameDateCalendar:
+    """
+    class to represent the calendar of dates that are known to have no NHL games. the
+    calendar combines the EmptyGameDate instances recorded from schedule responses with
+    the off-season between consecutive seasons, once the end of a season's playoffs and the
+    start of the next preseason are known (see record_season_calendar in the data loader).
+
+    the calendar is loaded from the database once, so lookups do not need a query
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.empty_dates = None
+        self.off_seasons = None
+
+    def load(self):
+        """
+        loads the recorded empty dates and the off-season date ranges, if they are not already loaded
+        """
+        with self.lock:
+            if self.empty_dates is not None:
+                return
+
+            seasons_by_id = Season.objects.in_bulk()
+            off_seasons = []
+            for season in seasons_by_id.values():
+                # the next season's ID is the current ID with both years incremented, e.g. 20232024 -> 20242025
+                next_season = seasons_by_id.get(season.id + 10001)
+                playoff_end_date = season.season_json.get("playoffEndDate")
+                preseason_start_date = next_season.season_json.get("preSeasonStartDate") if next_season is not None else None
+
+                if playoff_end_date is not None and preseason_start_date is not None:
+                    off_seasons.append((datetime.strptime(playoff_end_date, "%Y-%m-%d").date(),
+                                        datetime.strptime(preseason_start_date, "%Y-%m-%d").date()))
+
+            self.off_seasons = off_seasons
+            self.empty_dates = set(EmptyGameDate.objects.values_list("date", flat=True))
+
+    def invalidate(self):
+        with self.lock:
+            self.empty_dates = None
+            self.off_seasons = None
+
+    def contains(self, date) -> bool:
+        """
+        returns True if there are known to be no games on the provided date
+        """
+        self.load()
+        if date in self.empty_dates:
+            return True
+
+        return any(playoff_end_date < date < preseason_start_date for playoff_end_date, preseason_start_date in self.off_seasons)
+
+    def record(self, dates):
+        """
+        persists dates that are known to have no games, ignoring dates that are already recorded
+        """
+        self.load()
+        dates_to_record = set(dates) - self.empty_dates
+        if not dates_to_record:
+            return
+
+        EmptyGameDate.objects.bulk_create([EmptyGameDate(date=date) for date in dates_to_record],
+                                          ignore_conflicts=True)
+        with self.lock:
+            if self.empty_dates is not None:
+                self.empty_dates.update(dates_to_record)
+
+
+# the index and calendar shared by every data loader in the process
+reference_data = ReferenceDataIndex()
+empty_game_dates = EmptyGameDateCalendar()
+
+
+@receiver([post_save, post_delete], sender=Team)
+@receiver([post_save, post_delete], sender=Franchise)
+@receiver([post_save, post_delete], sender=Season)
+def invalidate_reference_data(sender, **kwargs):
+    reference_data.invalidate()
+
+    # the off-season is derived from the seasons, so the calendar is reloaded as well
+    if sender is Season:
+        empty_game_dates.invalidate()
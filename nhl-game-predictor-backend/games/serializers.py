@@ -33,6 +33,7 @@ class TeamDataSerializer(serializers.ModelSerializer):
     """
     
     team = TeamSerializer()
+    team_data_json = serializers.JSONField(read_only=True)
 
     class Meta:
         model = TeamData
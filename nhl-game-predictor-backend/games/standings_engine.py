@@ -0,0 +1,174 @@
+from collections import defaultdict, deque
+from datetime import datetime
+from django.utils import timezone
+from games.models import Game
+
+
+# results of a game from a team's perspective, named as in the keys of the NHL API standings
+WINS = "Wins"
+LOSSES = "Losses"
+OT_LOSSES = "OtLosses"
+
+# streak codes reported by the NHL API standings for each result
+STREAK_CODES = {WINS: "W", LOSSES: "L", OT_LOSSES: "OT"}
+
+# number of games in the last-10 split of the standings
+LAST_GAMES_COUNT = 10
+
+
+def is_completed_game(game : Game) -> bool:
+    """
+    a game has a result once it is in the past and has a winner (games cannot end in a tie)
+    """
+    home_team_goals = game.game_json.get("homeTeam", {}).get("score", 0)
+    away_team_goals = game.game_json.get("awayTeam", {}).get("score", 0)
+    return game.game_date < timezone.localdate() and home_team_goals != away_team_goals
+
+def get_game_result(game_json : dict, goals_for : int, goals_against : int) -> str:
+    """
+    returns the result of a completed game for the team that scored goals_for. losses
+    in overtime or a shootout are OT losses, as in the NHL API standings
+    """
+    if goals_for > goals_against:
+        return WINS
+
+    period_type = game_json.get("periodDescriptor", {}).get("periodType") or game_json.get("gameOutcome", {}).get("lastPeriodType", "REG")
+    return LOSSES if period_type == "REG" else OT_LOSSES
+
+
+class TeamRecord:
+    """
+    class to accumulate a team's regular season record one game at a time, with the
+    overall, home, road and last-10 splits used by the feature builder
+    """
+
+    def __init__(self, abbreviation : str):
+        self.abbreviation = abbreviation
+        self.totals = defaultdict(int)
+        self.last_games = deque(maxlen=LAST_GAMES_COUNT)
+        self.streak_code = None
+        self.streak_count = 0
+
+    def add_game(self, location : str, goals_for : int, goals_against : int, result : str):
+        """
+        records a game played at home (location "home") or on the road (location "road")
+        """
+        for prefix in ("", location):
+            self.totals[f"{prefix}GamesPlayed"] += 1
+            self.totals[f"{prefix}{result}"] += 1
+            self.totals[f"{prefix}GoalsFor"] += goals_for
+            self.totals[f"{prefix}GoalsAgainst"] += goals_against
+
+        self.last_games.append((goals_for, goals_against, result))
+
+        streak_code = STREAK_CODES[result]
+        self.streak_count = self.streak_count + 1 if streak_code == self.streak_code else 1
+        self.streak_code = streak_code
+
+    def to_standings_json(self, standings_date : datetime, season_id : int) -> dict:
+        """
+        returns the record as an entry of the NHL API standings/{date} response
+        """
+        standings_json = {
+            "date": standings_date.strftime("%Y-%m-%d"),
+            "seasonId": season_id,
+            "teamAbbrev": {"default": self.abbreviation},
+            "gamesPlayed": self.totals["GamesPlayed"],
+            "wins": self.totals[WINS],
+            "losses": self.totals[LOSSES],
+            "otLosses": self.totals[OT_LOSSES],
+            "points": 2 * self.totals[WINS] + self.totals[OT_LOSSES],
+            "goalFor": self.totals["GoalsFor"],
+            "goalAgainst": self.totals["GoalsAgainst"],
+            "goalDifferential": self.totals["GoalsFor"] - self.totals["GoalsAgainst"],
+            "streakCode": self.streak_code,
+            "streakCount": self.streak_count,
+        }
+
+        for location in ("home", "road"):
+            standings_json.update({
+                f"{location}GamesPlayed": self.totals[f"{location}GamesPlayed"],
+                f"{location}Wins": self.totals[f"{location}{WINS}"],
+                f"{location}Losses": self.totals[f"{location}{LOSSES}"],
+                f"{location}OtLosses": self.totals[f"{location}{OT_LOSSES}"],
+                f"{location}GoalsFor": self.totals[f"{location}GoalsFor"],
+                f"{location}GoalsAgainst": self.totals[f"{location}GoalsAgainst"],
+                f"{location}GoalDifferential": self.totals[f"{location}GoalsFor"] - self.totals[f"{location}GoalsAgainst"],
+            })
+
+        l10_goals_for = sum(goals_for for goals_for, _, _ in self.last_games)
+        l10_goals_against = sum(goals_against for _, goals_against, _ in self.last_games)
+        standings_json.update({
+            "l10GamesPlayed": len(self.last_games),
+            "l10Wins": sum(1 for _, _, result in self.last_games if result == WINS),
+            "l10Losses": sum(1 for _, _, result in self.last_games if result == LOSSES),
+            "l10OtLosses": sum(1 for _, _, result in self.last_games if result == OT_LOSSES),
+            "l10GoalsFor": l10_goals_for,
+            "l10GoalsAgainst": l10_goals_against,
+            "l10GoalDifferential": l10_goals_for - l10_goals_against,
+        })
+
+        return standings_json
+
+
+class StandingsEngine:
+    """
+    class to compute point-in-time league standings from the results of the games stored
+    for a season, rather than requesting them from the NHL API. the season's completed
+    regular season games (unless games are provided) are read with a single query and
+    applied in date order, so the standings of every date of a season are computed in one
+    incremental pass, as long as the dates are requested in ascending order.
+
+    like the NHL API standings/{date} endpoint, the standings of a date include the games
+    played on that date, and every team that plays in the season is listed from its start
+    """
+
+    def __init__(self, season, games : list = None):
+        self.season = season
+
+        if games is None:
+            games = Game.objects.filter(
+                season=season,
+                game_type=Game.REGULAR_SEASON
+            ).select_related("home_team", "away_team")
+
+        self.games = sorted((game for game in games if is_completed_game(game)), key=lambda game: (game.game_date, game.id))
+        self.next_game_index = 0
+        self.records = {}
+        for game in self.games:
+            for team in (game.home_team, game.away_team):
+                self.records.setdefault(team.abbreviation, TeamRecord(abbreviation=team.abbreviation))
+
+    def add_game(self, game : Game):
+        home_team_goals = game.game_json.get("homeTeam", {}).get("score", 0)
+        away_team_goals = game.game_json.get("awayTeam", {}).get("score", 0)
+
+        self.records[game.home_team.abbreviation].add_game(location="home",
+                                                           goals_for=home_team_goals,
+                                                           goals_against=away_team_goals,
+                                                           result=get_game_result(game.game_json, home_team_goals, away_team_goals))
+        self.records[game.away_team.abbreviation].add_game(location="road",
+                                                           goals_for=away_team_goals,
+                                                           goals_against=home_team_goals,
+                                                           result=get_game_result(game.game_json, away_team_goals, home_team_goals))
+
+    def standings(self, standings_date : datetime) -> list:
+        """
+        returns the standings of the season on the provided date, in the format of the
+        standings list of the NHL API standings/{date} response. the standings are blank
+        before the regular season starts
+        """
+        if standings_date < self.season.regular_season_start:
+            return []
+
+        if self.next_game_index > 0 and self.games[self.next_game_index - 1].game_date > standings_date:
+            raise ValueError(f"Standings for {standings_date} were requested after the standings of a later date")
+
+        while self.next_game_index < len(self.games) and self.games[self.next_game_index].game_date <= standings_date:
+            self.add_game(self.games[self.next_game_index])
+            self.next_game_index += 1
+
+        standings_json = [record.to_standings_json(standings_date=standings_date, season_id=self.season.id) for record in self.records.values()]
+        standings_json.sort(key=lambda team_standings: team_standings["points"], reverse=True)
+
+        return standings_json
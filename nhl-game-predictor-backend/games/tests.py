@@ -1,3 +1,833 @@
-from django.test import TestCase
+import asyncio
+import tempfile
+import httpx
+from unittest import mock
+from datetime import date, timedelta
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from games.models import BackfillJob, EmptyGameDate, Game, Season, Team, TeamData
+from games.fake_nhl_api import FakeNHLAPI, FakeNHLAPIServer, SYNTHETIC_TEAMS, fixture_key
+from games.nhl_api import nhl_api_client, NHLAPIClient, NHLAPIResponseCache, NHLAPIError, NHLAPIOfflineError, TokenBucket
+from games.permissions import UpdateCompletedGamesPermission
+from games.reference_data import reference_data, empty_game_dates
+from games.standings_engine import StandingsEngine
+from games.pipeline import IngestionPipeline, stream_games_from_api
+from games.backfill import (BackfillFetchError, fetch_all_json, backfill_games_from_api, backfill_games_from_schedule_api,
+                            create_backfill_job, run_backfill_job, count_api_calls)
+from games.data_loader import (STANDINGS_CACHE, STANDINGS_ENGINES, SEASONS_REFRESHED_DATES, load_franchises_and_teams_data_from_api,
+                               load_seasons_from_api, load_games_for_schedule_week_from_api, load_games_for_seasons_from_schedule_api,
+                               load_active_team_logo_urls, load_games_for_team_from_api, update_completed_games, upsert_games,
+                               upsert_team_data, update_game_numbers, build_standings_snapshot, fetch_games_for_date, record_schedule_calendar,
+                               get_standings_date, fetch_standings_for_date, compute_standings_for_date)
 
-# Create your tests here.
+# the season of the synthetic league that the tests load, which is over, so every game has a result
+SEASON_ID = 20232024
+
+# nothing listens on this port, so every request to it fails with a connection error
+UNREACHABLE_BASE_URL = "http://127.0.0.1:9/v1/"
+
+
+def count_requests(endpoint : str) -> int:
+    return nhl_api_client.stats_summary().get(endpoint, {}).get("requests", 0)
+
+
+class FailingFakeNHLAPI(FakeNHLAPI):
+    """
+    fake NHL API that answers every request to one of failing_keys (see fixture_key) with a 404
+    """
+
+    def __init__(self, failing_keys : list, **kwargs):
+        super().__init__(**kwargs)
+        self.failing_keys = set(failing_keys)
+
+    def respond(self, path : str):
+        if fixture_key(path) in self.failing_keys:
+            return 404, {}, "{}"
+        return super().respond(path)
+
+
+class FakeNHLAPITestCase(TestCase):
+    """
+    test case whose NHL API requests are answered by a local FakeNHLAPIServer (see
+    games.fake_nhl_api). the teams and seasons of the synthetic league are loaded once,
+    and the in-process caches of the data loader are cleared before every test
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FakeNHLAPIServer(fake_api=FakeNHLAPI(seed=0)).start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.enterClassContext(override_settings(NHL_API_BASE_URL=cls.server.base_url,
+                                                NHL_STATS_API_BASE_URL=cls.server.stats_base_url))
+
+        # responses are never served from the on-disk cache, and the stand-in is not rate limited
+        cache, rate_limiter = nhl_api_client.cache, nhl_api_client.rate_limiter
+        nhl_api_client.cache = None
+        nhl_api_client.rate_limiter = TokenBucket(rate=1000, capacity=1000)
+        cls.addClassCleanup(setattr, nhl_api_client, "cache", cache)
+        cls.addClassCleanup(setattr, nhl_api_client, "rate_limiter", rate_limiter)
+
+        cls.clear_caches()
+        super().setUpClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        load_franchises_and_teams_data_from_api()
+        load_seasons_from_api()
+        cls.season = Season.objects.get(id=SEASON_ID)
+
+    @staticmethod
+    def clear_caches():
+        reference_data.invalidate()
+        empty_game_dates.invalidate()
+        STANDINGS_CACHE.clear()
+        STANDINGS_ENGINES.invalidate()
+        SEASONS_REFRESHED_DATES.clear()
+
+    def setUp(self):
+        # every test starts from the rows of setUpTestData, which the caches may not describe
+        self.clear_caches()
+        nhl_api_client.reset_stats()
+
+    @classmethod
+    def load_week(cls, week : int, get_team_data : bool = True) -> list:
+        """
+        loads the games of a week of the season, counted from the start of its regular season
+        """
+        return load_games_for_schedule_week_from_api(season=cls.season,
+                                                     week_start_date=cls.season.regular_season_start + timedelta(days=7 * week),
+                                                     season_end_date=cls.season.regular_season_end,
+                                                     get_team_data=get_team_data)
+
+
+class SeasonTestCase(FakeNHLAPITestCase):
+    """
+    test case with every game of the season loaded, without TeamData
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        load_games_for_seasons_from_schedule_api(seasons=[SEASON_ID], get_team_data=False)
+
+
+class StandingsEngineTests(SeasonTestCase):
+
+    def assertStandingsEqual(self, standings_json, api_standings_json):
+        # the NHL API also reports each team's name and logo, and orders teams with equal points differently
+        standings_by_team = {team_standings["teamAbbrev"]["default"]: team_standings for team_standings in standings_json}
+        self.assertEqual(len(standings_by_team), len(api_standings_json))
+
+        for api_team_standings in api_standings_json:
+            team_standings = standings_by_team[api_team_standings["teamAbbrev"]["default"]]
+            for key, value in api_team_standings.items():
+                if key not in ("teamName", "teamLogo"):
+                    self.assertEqual(team_standings[key], value, f"{key} of {api_team_standings['teamAbbrev']['default']}")
+
+    def test_standings_match_nhl_api(self):
+        engine = StandingsEngine(season=self.season)
+        for standings_date in (self.season.regular_season_start + timedelta(days=20),
+                               self.season.regular_season_start + timedelta(days=100),
+                               self.season.regular_season_end):
+            api_standings_json = nhl_api_client.get_json(f"{settings.NHL_API_BASE_URL}standings/{standings_date.strftime('%Y-%m-%d')}")
+            self.assertStandingsEqual(engine.standings(standings_date), api_standings_json["standings"])
+
+    def test_standings_are_blank_before_regular_season(self):
+        engine = StandingsEngine(season=self.season)
+        self.assertEqual(engine.standings(self.season.regular_season_start - timedelta(days=1)), [])
+
+    def test_standings_requested_out_of_order_raise(self):
+        engine = StandingsEngine(season=self.season)
+        engine.standings(self.season.regular_season_start + timedelta(days=50))
+        with self.assertRaises(ValueError):
+            engine.standings(self.season.regular_season_start + timedelta(days=10))
+
+    def test_local_standings_are_computed_in_any_order(self):
+        standings_dates = [self.season.regular_season_start + timedelta(days=days) for days in (60, 10, 90, 30)]
+        for standings_date in standings_dates:
+            self.assertEqual(compute_standings_for_date(standings_date),
+                             StandingsEngine(season=self.season).standings(standings_date))
+
+
+class GameNumberTests(SeasonTestCase):
+
+    def counted_game_number(self, game : Game, team : Team) -> int:
+        """
+        the game number of a team's game as Game used to count it: the team's games of the same type
+        in the season up to the game's date, where playoff games also count every regular season game
+        """
+        team_games = Game.objects.filter(season=game.season, game_date__lte=game.game_date).exclude(id=game.id)
+        team_games = team_games.filter(home_team=team) | team_games.filter(away_team=team)
+
+        game_types = [Game.REGULAR_SEASON, Game.PLAYOFFS] if game.game_type == Game.PLAYOFFS else [game.game_type]
+        return team_games.filter(game_type__in=game_types).count() + 1
+
+    def assertGameNumbersCounted(self, games):
+        for game in games:
+            self.assertEqual(game.home_team_game_number, self.counted_game_number(game, game.home_team), f"home team of game {game.id}")
+            self.assertEqual(game.away_team_game_number, self.counted_game_number(game, game.away_team), f"away team of game {game.id}")
+
+    def team_games(self, abbreviation : str):
+        team = Team.objects.get(abbreviation=abbreviation)
+        return (Game.objects.filter(home_team=team) | Game.objects.filter(away_team=team)).select_related("season", "home_team", "away_team")
+
+    def test_game_numbers_match_counting(self):
+        self.assertGameNumbersCounted(self.team_games("BOS"))
+
+    def test_playoff_game_numbers_continue_from_regular_season(self):
+        playoff_games = self.team_games("BOS").filter(game_type=Game.PLAYOFFS).order_by("game_date")
+        regular_season_games = self.team_games("BOS").filter(game_type=Game.REGULAR_SEASON).count()
+
+        first_playoff_game = playoff_games.first()
+        team_game_number = first_playoff_game.home_team_game_number if first_playoff_game.home_team.abbreviation == "BOS" else first_playoff_game.away_team_game_number
+        self.assertEqual(team_game_number, regular_season_games + 1)
+
+    def test_games_ingested_out_of_order_shift_later_numbers(self):
+        first_week_end = self.season.regular_season_start + timedelta(days=6)
+        Game.objects.filter(game_date__lte=first_week_end).delete()
+        update_game_numbers(seasons=[SEASON_ID])
+
+        self.load_week(0, get_team_data=False)
+
+        self.assertGameNumbersCounted(self.team_games("MTL"))
+
+    def test_unchanged_game_numbers_are_not_written(self):
+        self.assertEqual(update_game_numbers(seasons=[SEASON_ID]), 0)
+        self.assertEqual(update_game_numbers(), 0)
+
+
+@override_settings(NHL_STANDINGS_SOURCE="local")
+class LocalStandingsTests(FakeNHLAPITestCase):
+
+    def team_standings(self, standings_json : list) -> dict:
+        return {team_standings["teamAbbrev"]["default"]: team_standings for team_standings in standings_json}
+
+    def test_local_standings_include_games_written_after_they_were_computed(self):
+        standings_date = self.season.regular_season_start + timedelta(days=10)
+        self.load_week(0, get_team_data=False)
+        first_week_standings = self.team_standings(fetch_standings_for_date(standings_date))
+        self.assertNotIn(standings_date, STANDINGS_CACHE)
+
+        self.load_week(1, get_team_data=False)
+        standings = self.team_standings(fetch_standings_for_date(standings_date))
+
+        self.assertEqual(standings, self.team_standings(StandingsEngine(season=self.season).standings(standings_date)))
+        self.assertGreater(sum(team_standings["gamesPlayed"] for team_standings in standings.values()),
+                           sum(team_standings["gamesPlayed"] for team_standings in first_week_standings.values()))
+
+    def test_fetch_phases_reject_local_team_data(self):
+        loaders = [
+            lambda: self.load_week(0),
+            lambda: load_games_for_team_from_api(team_abbreviation="BOS", seasons=[SEASON_ID]),
+            lambda: load_games_for_seasons_from_schedule_api(seasons=[SEASON_ID]),
+            lambda: backfill_games_from_api(seasons=[SEASON_ID]),
+            lambda: backfill_games_from_schedule_api(seasons=[SEASON_ID]),
+            lambda: create_backfill_job(seasons=[SEASON_ID]),
+            lambda: IngestionPipeline(seasons=[SEASON_ID]),
+        ]
+        for loader in loaders:
+            with self.assertRaises(ValueError):
+                loader()
+
+        self.assertEqual(count_api_calls(), 0)
+        self.assertFalse(Game.objects.exists())
+
+    def test_completed_games_team_data_includes_their_results(self):
+        for week in (0, 1):
+            self.load_week(week, get_team_data=False)
+
+        # the games were stored before they were played, so their stored payloads have no score
+        for game in Game.objects.all():
+            game_json = {**game.game_json,
+                         "homeTeam": {**game.game_json["homeTeam"], "score": 0},
+                         "awayTeam": {**game.game_json["awayTeam"], "score": 0}}
+            game.update_game_json(game_json)
+            game.save()
+
+        update_completed_games()
+
+        second_week_start = self.season.regular_season_start + timedelta(days=7)
+        game = Game.objects.filter(game_date__gte=second_week_start).select_related("home_team", "home_team_data__standings_snapshot").first()
+        data_capture_date = game.game_date - timedelta(days=1)
+
+        expected_standings = self.team_standings(StandingsEngine(season=self.season).standings(data_capture_date))[game.home_team.abbreviation]
+        self.assertGreater(expected_standings["gamesPlayed"], 0)
+        self.assertEqual(game.home_team_data.standings_snapshot.standings_json[str(game.home_team_id)], expected_standings)
+
+
+class BackfillTests(FakeNHLAPITestCase):
+
+    def season_game_ids(self) -> set:
+        return set(Game.objects.filter(season_id=SEASON_ID).values_list("id", flat=True))
+
+    def test_club_schedules_match_league_schedule(self):
+        games = backfill_games_from_api(seasons=[SEASON_ID])
+        game_ids = self.season_game_ids()
+        self.assertEqual(len(games), len(game_ids))
+        self.assertFalse(Game.objects.filter(game_type=Game.REGULAR_SEASON, home_team_data__isnull=True).exists())
+
+        Game.objects.all().delete()
+        self.clear_caches()
+        backfill_games_from_schedule_api(seasons=[SEASON_ID], get_team_data=False)
+
+        self.assertEqual(self.season_game_ids(), game_ids)
+
+    def test_only_active_teams_are_requested(self):
+        Team.objects.create(name="Atlanta Thrashers", abbreviation="ATL")
+        reference_data.invalidate()
+
+        backfill_games_from_api(seasons=[SEASON_ID], get_team_data=False)
+
+        self.assertEqual(count_requests("club-schedule-season"), len(SYNTHETIC_TEAMS))
+
+    def test_failed_requests_are_collected(self):
+        with FakeNHLAPIServer(fake_api=FailingFakeNHLAPI(failing_keys=["standings/2024-01-16"])) as server:
+            urls = [f"{server.base_url}standings/2024-01-15", f"{server.base_url}standings/2024-01-16"]
+            responses, failed_urls = asyncio.run(fetch_all_json(urls=urls, max_concurrent_requests=2))
+
+        self.assertEqual(len(responses[0]["standings"]), len(SYNTHETIC_TEAMS))
+        self.assertIsNone(responses[1])
+        self.assertEqual(list(failed_urls), [urls[1]])
+
+    def test_failed_requests_do_not_discard_other_games(self):
+        failing_key = f"club-schedule-season/BOS/{SEASON_ID}"
+        with FakeNHLAPIServer(fake_api=FailingFakeNHLAPI(failing_keys=[failing_key])) as server:
+            with override_settings(NHL_API_BASE_URL=server.base_url), self.assertRaises(BackfillFetchError) as context:
+                backfill_games_from_api(seasons=[SEASON_ID], get_team_data=False)
+
+        self.assertEqual(list(context.exception.failed_urls), [f"{server.base_url}{failing_key}"])
+
+        # every game of BOS is also in the schedule of its opponent
+        self.assertEqual(len(context.exception.games), len(self.season_game_ids()))
+        self.assertTrue(Game.objects.filter(home_team__abbreviation="BOS").exists())
+
+
+class NHLAPIResponseCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.cache = NHLAPIResponseCache(cache_dir=cache_dir.name, ttl=600)
+
+    def url(self, endpoint : str, days_ago : int) -> str:
+        url_date = timezone.localdate() - timedelta(days=days_ago)
+        return f"https://api-web.nhle.com/v1/{endpoint}/{url_date.strftime('%Y-%m-%d')}"
+
+    def response(self, url : str, content : str = '{"standings": []}', status_code : int = 200) -> httpx.Response:
+        return httpx.Response(status_code=status_code, content=content.encode("utf-8"), request=httpx.Request("GET", url))
+
+    def test_settled_dates_are_immutable(self):
+        self.assertTrue(self.cache.is_immutable(self.url("standings", days_ago=2)))
+        self.assertFalse(self.cache.is_immutable(self.url("standings", days_ago=1)))
+        self.assertFalse(self.cache.is_immutable(self.url("standings", days_ago=0)))
+
+    def test_schedule_weeks_are_immutable_once_their_last_day_is_settled(self):
+        self.assertTrue(self.cache.is_immutable(self.url("schedule", days_ago=8)))
+        self.assertFalse(self.cache.is_immutable(self.url("schedule", days_ago=7)))
+
+    def test_final_games_are_immutable(self):
+        url = self.url("schedule", days_ago=0)
+        self.assertTrue(self.cache.is_immutable(url, {"gameWeek": [{"games": [{"gameState": "OFF"}]}, {"games": []}]}))
+        self.assertFalse(self.cache.is_immutable(url, {"gameWeek": [{"games": [{"gameState": "OFF"}, {"gameState": "FUT"}]}]}))
+        self.assertFalse(self.cache.is_immutable(url, {"gameWeek": [{"games": []}]}))
+
+    def test_past_seasons_are_immutable(self):
+        self.assertTrue(self.cache.is_immutable("https://api-web.nhle.com/v1/club-schedule-season/TOR/20082009"))
+        self.assertFalse(self.cache.is_immutable(f"https://api-web.nhle.com/v1/club-schedule-season/TOR/{timezone.localdate().year + 1}{timezone.localdate().year + 2}"))
+        self.assertFalse(self.cache.is_immutable("https://api-web.nhle.com/v1/standings-season"))
+
+    def test_stored_responses_are_loaded(self):
+        url = self.url("standings", days_ago=30)
+        self.cache.store(url, self.response(url))
+
+        cached_response = self.cache.load(url)
+        self.assertEqual(cached_response.status_code, 200)
+        self.assertEqual(cached_response.json(), {"standings": []})
+
+    def test_unsuccessful_responses_are_not_stored(self):
+        url = self.url("standings", days_ago=30)
+        self.cache.store(url, self.response(url, status_code=404))
+
+        self.assertIsNone(self.cache.load(url))
+
+    def test_expired_responses_are_only_loaded_offline(self):
+        self.cache.ttl = -1
+        settled_url, recent_url = self.url("standings", days_ago=30), self.url("standings", days_ago=0)
+        self.cache.store(settled_url, self.response(settled_url))
+        self.cache.store(recent_url, self.response(recent_url))
+
+        self.assertIsNotNone(self.cache.load(settled_url))
+        self.assertIsNone(self.cache.load(recent_url))
+        self.assertIsNotNone(self.cache.load(recent_url, allow_expired=True))
+
+    def test_client_serves_cached_responses(self):
+        with FakeNHLAPIServer() as server:
+            client = NHLAPIClient(cache=self.cache, rate_limiter=TokenBucket(rate=1000, capacity=1000))
+            self.addCleanup(client.close)
+            url = f"{server.base_url}standings/2024-01-15"
+
+            response_json = client.get_json(url)
+            self.assertEqual(client.get_json(url), response_json)
+
+        self.assertEqual(client.stats_summary()["standings"]["requests"], 1)
+        self.assertEqual(client.stats_summary()["standings"]["cache_hits"], 1)
+
+    def test_offline_client_only_serves_cached_responses(self):
+        url = self.url("standings", days_ago=30)
+        self.cache.store(url, self.response(url))
+        client = NHLAPIClient(cache=self.cache, offline=True)
+
+        self.assertEqual(client.get_json(url), {"standings": []})
+        with self.assertRaises(NHLAPIOfflineError):
+            client.get_json(self.url("standings", days_ago=31))
+        with self.assertRaises(NHLAPIOfflineError):
+            NHLAPIClient(cache=None, offline=True).get_json(url)
+
+
+class TokenBucketTests(SimpleTestCase):
+
+    def test_requests_beyond_capacity_wait_for_tokens(self):
+        rate_limiter = TokenBucket(rate=10, capacity=2)
+
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertEqual(rate_limiter.reserve(), 0)
+
+        # reserved tokens are spaced out, so concurrent callers do not wake up at once
+        self.assertAlmostEqual(rate_limiter.reserve(), 0.1, delta=0.01)
+        self.assertAlmostEqual(rate_limiter.reserve(), 0.2, delta=0.01)
+
+    def test_tokens_refill_up_to_capacity(self):
+        rate_limiter = TokenBucket(rate=1000, capacity=2)
+        for _ in range(3):
+            rate_limiter.acquire()
+
+        rate_limiter.updated_at -= 60
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertGreater(rate_limiter.reserve(), 0)
+
+
+class NHLAPIClientRetryTests(SimpleTestCase):
+
+    def client_for(self, max_retries : int) -> NHLAPIClient:
+        client = NHLAPIClient(cache=None, offline=False, rate_limiter=TokenBucket(rate=1000, capacity=1000),
+                              max_retries=max_retries, backoff_base=0, backoff_max=0)
+        self.addCleanup(client.close)
+        return client
+
+    def test_retry_delay_backs_off_exponentially(self):
+        client = NHLAPIClient(cache=None, backoff_base=0.5, backoff_max=3)
+
+        for attempt, max_delay in ((0, 0.5), (1, 1), (2, 2), (5, 3)):
+            delay = client.retry_delay(attempt=attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, max_delay)
+
+    def test_retry_delay_respects_retry_after(self):
+        client = NHLAPIClient(cache=None, backoff_base=0.5, backoff_max=3)
+        response = httpx.Response(status_code=429, headers={"Retry-After": "2"})
+
+        self.assertEqual(client.retry_delay(attempt=0, response=response), 2)
+        self.assertEqual(client.retry_delay(attempt=0, response=httpx.Response(status_code=429, headers={"Retry-After": "60"})), 3)
+
+    def test_transient_errors_are_retried(self):
+        client = self.client_for(max_retries=10)
+        with FakeNHLAPIServer(fake_api=FakeNHLAPI(error_rate=0.5, seed=1)) as server:
+            for day in range(1, 11):
+                client.get_json(f"{server.base_url}standings/2024-01-{day:02d}")
+
+        standings_stats = client.stats_summary()["standings"]
+        self.assertEqual(standings_stats["requests"], 10 + standings_stats["retries"])
+        self.assertGreater(standings_stats["retries"], 0)
+        self.assertEqual(standings_stats["failures"], 0)
+
+    def test_exhausted_retries_raise(self):
+        client = self.client_for(max_retries=2)
+        with FakeNHLAPIServer(fake_api=FakeNHLAPI(error_rate=1)) as server:
+            with self.assertRaises(NHLAPIError):
+                client.get(f"{server.base_url}standings/2024-01-15")
+            with self.assertRaises(NHLAPIError):
+                asyncio.run(self.async_get(client, f"{server.base_url}standings/2024-01-16"))
+
+        standings_stats = client.stats_summary()["standings"]
+        self.assertEqual((standings_stats["requests"], standings_stats["retries"], standings_stats["failures"]), (6, 4, 2))
+
+    def test_connection_errors_are_retried(self):
+        client = self.client_for(max_retries=1)
+        with self.assertRaises(NHLAPIError):
+            client.get(f"{UNREACHABLE_BASE_URL}standings/2024-01-15")
+
+        standings_stats = client.stats_summary()["standings"]
+        self.assertEqual((standings_stats["requests"], standings_stats["retries"], standings_stats["failures"]), (0, 1, 1))
+
+    def test_unsuccessful_responses_are_not_retried(self):
+        client = self.client_for(max_retries=2)
+        with FakeNHLAPIServer(fake_api=FakeNHLAPI(fixtures_only=True)) as server:
+            self.assertEqual(client.get(f"{server.base_url}standings/2024-01-15").status_code, 404)
+
+        self.assertEqual(client.stats_summary()["standings"]["retries"], 0)
+
+    async def async_get(self, client : NHLAPIClient, url : str) -> httpx.Response:
+        async with client.async_client() as async_client:
+            return await client.async_get(client=async_client, url=url)
+
+
+class NHLAPIUnavailableTests(FakeNHLAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        # requests to the unreachable NHL API fail without waiting for retries
+        patcher = mock.patch.object(nhl_api_client, "max_retries", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_logo_urls_are_kept_while_nhl_api_is_down(self):
+        with override_settings(NHL_API_BASE_URL=UNREACHABLE_BASE_URL):
+            load_active_team_logo_urls()
+        self.assertFalse(Team.objects.exclude(logo_url="").exists())
+
+        load_active_team_logo_urls()
+        self.assertFalse(Team.objects.filter(logo_url="").exists())
+
+    def test_update_completed_games_view_responds_while_nhl_api_is_down(self):
+        self.load_week(3, get_team_data=False)
+        token = UpdateCompletedGamesPermission.expected_token_value
+        headers = {UpdateCompletedGamesPermission.token_header_name: token} if token is not None else {}
+
+        with override_settings(NHL_API_BASE_URL=UNREACHABLE_BASE_URL):
+            response = self.client.get(reverse("update-completed-games"), headers=headers)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(Game.objects.filter(winning_team__isnull=True).exists())
+
+
+class BackfillJobInterrupted(Exception):
+    pass
+
+
+class BackfillJobTests(FakeNHLAPITestCase):
+
+    def interrupt_after(self, units : int):
+        """
+        returns an on_unit_completed function that interrupts the job once units have completed
+        """
+        completed_units = []
+        def on_unit_completed(unit):
+            completed_units.append(unit)
+            if len(completed_units) == units:
+                raise BackfillJobInterrupted()
+
+        return on_unit_completed
+
+    def test_league_job_has_one_unit_per_week(self):
+        job = create_backfill_job(seasons=[SEASON_ID], get_team_data=False)
+        week_start_dates = sorted(job.units.values_list("unit_key", flat=True))
+
+        self.assertEqual(week_start_dates[0], self.season.regular_season_start.strftime("%Y-%m-%d"))
+        self.assertEqual(len(week_start_dates), len(set(week_start_dates)))
+
+    def test_team_job_only_has_active_teams(self):
+        Team.objects.create(name="Atlanta Thrashers", abbreviation="ATL")
+        reference_data.invalidate()
+
+        job = create_backfill_job(seasons=[SEASON_ID], mode=BackfillJob.TEAM, get_team_data=False)
+
+        self.assertEqual(sorted(job.units.values_list("unit_key", flat=True)), sorted(SYNTHETIC_TEAMS))
+
+    def test_interrupted_job_resumes_from_last_completed_unit(self):
+        job = create_backfill_job(seasons=[SEASON_ID], get_team_data=False)
+        units = job.units.count()
+
+        with self.assertRaises(BackfillJobInterrupted):
+            run_backfill_job(job=job, on_unit_completed=self.interrupt_after(units=3))
+
+        job.refresh_from_db()
+        self.assertIsNone(job.completed_at)
+        self.assertEqual(job.units.filter(completed_at__isnull=False).count(), 3)
+        self.assertEqual(Game.objects.count(), job.games_created)
+
+        # completed units are not requested again, but the first week is, to find the end of the season
+        nhl_api_client.reset_stats()
+        job = run_backfill_job(job=BackfillJob.objects.get(id=job.id))
+
+        self.assertIsNotNone(job.completed_at)
+        self.assertFalse(job.units.filter(completed_at__isnull=True).exists())
+        self.assertEqual(count_requests("schedule"), units - 3 + 1)
+        self.assertEqual(Game.objects.count(), job.games_created)
+
+        job_game_ids = set(Game.objects.values_list("id", flat=True))
+        Game.objects.all().delete()
+        self.clear_caches()
+        backfill_games_from_schedule_api(seasons=[SEASON_ID], get_team_data=False)
+        self.assertEqual(set(Game.objects.values_list("id", flat=True)), job_game_ids)
+
+    def test_team_job_counts_each_game_once(self):
+        job = create_backfill_job(seasons=[SEASON_ID], mode=BackfillJob.TEAM, get_team_data=False, team_abbreviations=["BOS", "MTL"])
+        job = run_backfill_job(job=job)
+
+        self.assertEqual(job.units.count(), 2)
+        self.assertEqual(job.games_created, Game.objects.count())
+        self.assertEqual(job.api_calls, 2)
+
+
+class UpdateCompletedGamesTests(FakeNHLAPITestCase):
+
+    def expected_schedule_requests(self) -> int:
+        """
+        the number of schedule weeks that cover the dates of the pending games, where each week
+        starts at the earliest pending date that no previous week covers
+        """
+        requests = 0
+        covered_until = None
+        for game_date in Game.objects.filter(winning_team__isnull=True).order_by("game_date").values_list("game_date", flat=True).distinct():
+            if covered_until is None or game_date > covered_until:
+                requests += 1
+                covered_until = game_date + timedelta(days=6)
+
+        return requests
+
+    def assertGamesCompleted(self):
+        self.assertFalse(Game.objects.filter(winning_team__isnull=True).exists())
+        self.assertFalse(Game.objects.filter(home_team_data__isnull=True).exists())
+        self.assertFalse(Game.objects.filter(away_team_data__isnull=True).exists())
+
+        for game in Game.objects.select_related("home_team", "away_team", "winning_team"):
+            home_team_goals = game.game_json["homeTeam"]["score"]
+            away_team_goals = game.game_json["awayTeam"]["score"]
+            self.assertEqual(game.winning_team, game.home_team if home_team_goals > away_team_goals else game.away_team)
+
+    def test_pending_games_are_requested_once_per_week(self):
+        for week in (3, 6):
+            self.load_week(week, get_team_data=False)
+        pending_games = Game.objects.count()
+        self.assertEqual(self.expected_schedule_requests(), 2)
+        nhl_api_client.reset_stats()
+
+        self.assertEqual(len(update_completed_games()), pending_games)
+
+        self.assertEqual(count_requests("schedule"), 2)
+        self.assertGamesCompleted()
+
+    def test_consecutive_pending_weeks(self):
+        for week in (10, 11, 12):
+            self.load_week(week, get_team_data=False)
+        expected_schedule_requests = self.expected_schedule_requests()
+        nhl_api_client.reset_stats()
+
+        update_completed_games()
+
+        self.assertEqual(count_requests("schedule"), expected_schedule_requests)
+        self.assertGamesCompleted()
+
+    def test_completed_games_are_not_requested(self):
+        self.load_week(3)
+        nhl_api_client.reset_stats()
+
+        self.assertEqual(update_completed_games(), [])
+        self.assertEqual(count_requests("schedule"), 0)
+
+
+class UpsertTests(FakeNHLAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.load_week(3)
+
+    def unsaved_copies(self, with_results : bool = True) -> list:
+        return [
+            Game(id=game.id, season_id=game.season_id, game_type=game.game_type, game_date=game.game_date, game_json=game.game_json,
+                 home_team_id=game.home_team_id, away_team_id=game.away_team_id,
+                 winning_team_id=game.winning_team_id if with_results else None,
+                 home_team_data_id=game.home_team_data_id if with_results else None,
+                 away_team_data_id=game.away_team_data_id if with_results else None)
+            for game in Game.objects.all()
+        ]
+
+    def stored_games(self) -> list:
+        return list(Game.objects.order_by("id").values())
+
+    def test_upsert_games_is_idempotent(self):
+        stored_games = self.stored_games()
+
+        self.assertEqual(len(upsert_games(self.unsaved_copies())), len(stored_games))
+        self.assertEqual(len(upsert_games(self.unsaved_copies())), len(stored_games))
+
+        self.assertEqual(self.stored_games(), stored_games)
+
+    def test_upsert_games_keeps_results_and_team_data(self):
+        stored_games = self.stored_games()
+        self.assertTrue(all(game["winning_team_id"] is not None and game["home_team_data_id"] is not None for game in stored_games))
+
+        upsert_games(self.unsaved_copies(with_results=False))
+
+        self.assertEqual(self.stored_games(), stored_games)
+
+    def test_upsert_team_data_is_idempotent(self):
+        data_capture_date = self.season.regular_season_start + timedelta(days=30)
+        standings_json = nhl_api_client.get_json(f"{settings.NHL_API_BASE_URL}standings/{data_capture_date.strftime('%Y-%m-%d')}")["standings"]
+
+        def unsaved_team_data():
+            standings_snapshot = build_standings_snapshot(data_capture_date=data_capture_date, standings_json=standings_json)
+            return [TeamData(team=team, data_capture_date=data_capture_date, standings_snapshot=standings_snapshot)
+                    for team in Team.objects.filter(abbreviation__in=["BOS", "MTL", "TOR"])]
+
+        team_data_count = TeamData.objects.count()
+        first_team_data = unsaved_team_data()
+        upsert_team_data(first_team_data)
+        second_team_data = unsaved_team_data()
+        upsert_team_data(second_team_data)
+
+        self.assertEqual(TeamData.objects.count(), team_data_count + 3)
+        self.assertEqual([team_data.pk for team_data in first_team_data], [team_data.pk for team_data in second_team_data])
+
+        standings_by_team = {team_standings["teamAbbrev"]["default"]: team_standings for team_standings in standings_json}
+        for team_data in TeamData.objects.filter(data_capture_date=data_capture_date).select_related("team"):
+            self.assertEqual(team_data.wins, standings_by_team[team_data.team.abbreviation]["wins"])
+            self.assertEqual(team_data.goals_for, standings_by_team[team_data.team.abbreviation]["goalFor"])
+
+
+class EmptyGameDateCalendarTests(FakeNHLAPITestCase):
+
+    def test_days_without_games_are_recorded(self):
+        for week in range(4):
+            self.load_week(week, get_team_data=False)
+
+        weeks_start = self.season.regular_season_start
+        expected_empty_dates = set(
+            weeks_start + timedelta(days=day) for day in range(28)
+            if not self.server.fake_api.league.games_for_date(weeks_start + timedelta(days=day))
+        )
+        self.assertNotEqual(expected_empty_dates, set())
+        self.assertEqual(set(EmptyGameDate.objects.values_list("date", flat=True)), expected_empty_dates)
+
+    def test_recorded_dates_are_not_requested(self):
+        self.load_week(0, get_team_data=False)
+        empty_date = EmptyGameDate.objects.first().date
+
+        # the calendar is persisted, so it is still known once the in-process calendar is reloaded
+        empty_game_dates.invalidate()
+        nhl_api_client.reset_stats()
+
+        self.assertEqual(len(fetch_games_for_date(empty_date)), 0)
+        self.assertEqual(count_requests("schedule"), 0)
+
+    def test_recorded_dates_are_only_stored_once(self):
+        empty_dates = [date(2023, 12, 24), date(2023, 12, 25)]
+        empty_game_dates.record(empty_dates)
+        empty_game_dates.invalidate()
+        empty_game_dates.record(empty_dates + [date(2023, 12, 26)])
+
+        self.assertEqual(EmptyGameDate.objects.count(), 3)
+        self.assertTrue(all(empty_game_dates.contains(empty_date) for empty_date in empty_dates))
+
+    def test_off_season_is_empty_once_both_seasons_are_known(self):
+        off_season_date = date(2024, 7, 15)
+        self.assertFalse(empty_game_dates.contains(off_season_date))
+
+        record_schedule_calendar([
+            nhl_api_client.get_json(f"{settings.NHL_API_BASE_URL}schedule/2024-06-11"),
+            nhl_api_client.get_json(f"{settings.NHL_API_BASE_URL}schedule/2024-09-21"),
+        ])
+
+        self.assertTrue(empty_game_dates.contains(off_season_date))
+        self.assertFalse(empty_game_dates.contains(date(2024, 6, 17)))
+        self.assertFalse(empty_game_dates.contains(date(2024, 9, 21)))
+        self.assertFalse(EmptyGameDate.objects.filter(date=off_season_date).exists())
+
+
+class GetStandingsDateTests(FakeNHLAPITestCase):
+
+    def test_regular_season_dates_are_unchanged(self):
+        for standings_date in (self.season.regular_season_start, date(2024, 1, 15), self.season.regular_season_end):
+            self.assertEqual(get_standings_date(standings_date), standings_date)
+
+    def test_preseason_dates_have_no_standings(self):
+        self.assertIsNone(get_standings_date(self.season.regular_season_start - timedelta(days=1)))
+        self.assertIsNone(get_standings_date(date(2023, 9, 21)))
+
+    def test_playoff_dates_use_final_standings(self):
+        self.assertEqual(get_standings_date(date(2024, 4, 25)), self.season.regular_season_end)
+        self.assertEqual(get_standings_date(date(2024, 6, 17)), self.season.regular_season_end)
+
+    def test_off_season_dates_use_final_standings(self):
+        self.assertEqual(get_standings_date(date(2024, 7, 15)), self.season.regular_season_end)
+        self.assertIsNone(get_standings_date(date(2024, 9, 25)))
+
+    def test_dates_before_known_seasons_are_unchanged(self):
+        self.assertEqual(get_standings_date(date(2000, 1, 15)), date(2000, 1, 15))
+
+
+class RecordingIngestionPipeline(IngestionPipeline):
+    """
+    ingestion pipeline that records every statement its fetcher threads send to the database
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetcher_statements = []
+
+    def record_statement(self, execute, sql, params, many, context):
+        self.fetcher_statements.append(sql)
+        return execute(sql, params, many, context)
+
+    def generate_units(self, season_id : int) -> list:
+        with connection.execute_wrapper(self.record_statement):
+            return super().generate_units(season_id)
+
+    def fetch_unit(self, unit : tuple):
+        with connection.execute_wrapper(self.record_statement):
+            return super().fetch_unit(unit)
+
+
+class IngestionPipelineTests(FakeNHLAPITestCase):
+
+    def test_streamed_games_match_league_schedule(self):
+        pipeline = RecordingIngestionPipeline(seasons=[SEASON_ID], batch_size=200, queue_size=2, fetchers=4)
+        pipeline.run()
+
+        self.assertGreater(pipeline.batches_written, 1)
+        self.assertEqual(pipeline.games_written, Game.objects.count())
+        self.assertFalse(Game.objects.filter(game_type=Game.REGULAR_SEASON, home_team_data__isnull=True).exists())
+
+        # the calendar of every week is recorded by the writer
+        self.assertTrue(EmptyGameDate.objects.exists())
+        self.assertIsNotNone(Season.objects.get(id=SEASON_ID).season_json.get("playoffEndDate"))
+
+        game_ids = set(Game.objects.values_list("id", flat=True))
+        Game.objects.all().delete()
+        self.clear_caches()
+        backfill_games_from_schedule_api(seasons=[SEASON_ID], get_team_data=False)
+        self.assertEqual(set(Game.objects.values_list("id", flat=True)), game_ids)
+
+    def test_fetchers_do_not_write(self):
+        pipeline = RecordingIngestionPipeline(seasons=[SEASON_ID - 10001, SEASON_ID], batch_size=100, fetchers=4)
+        pipeline.run()
+
+        self.assertNotEqual(pipeline.fetcher_statements, [])
+        self.assertTrue(all(statement.lstrip().upper().startswith("SELECT") for statement in pipeline.fetcher_statements))
+        self.assertEqual(set(Game.objects.values_list("season_id", flat=True)), {SEASON_ID - 10001, SEASON_ID})
+
+    def test_club_schedules_of_active_teams_are_streamed(self):
+        Team.objects.create(name="Atlanta Thrashers", abbreviation="ATL")
+        reference_data.invalidate()
+
+        pipeline = stream_games_from_api(seasons=[SEASON_ID], league=False, get_team_data=False, fetchers=4)
+
+        self.assertEqual(count_requests("club-schedule-season"), len(SYNTHETIC_TEAMS))
+        self.assertEqual(pipeline.games_written, Game.objects.count())
+
+    def test_failed_season_stops_every_fetcher(self):
+        failing_key = f"schedule/{self.season.regular_season_start.strftime('%Y-%m-%d')}"
+        with FakeNHLAPIServer(fake_api=FailingFakeNHLAPI(failing_keys=[failing_key])) as server:
+            with override_settings(NHL_API_BASE_URL=server.base_url), self.assertRaises(NHLAPIError):
+                stream_games_from_api(seasons=[SEASON_ID - 10001, SEASON_ID], get_team_data=False, fetchers=4)
+
+    @override_settings(NHL_STANDINGS_SOURCE="local")
+    def test_local_standings_are_not_streamed(self):
+        with self.assertRaises(ValueError):
+            IngestionPipeline(seasons=[SEASON_ID])
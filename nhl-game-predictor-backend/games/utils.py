@@ -77,49 +77,49 @@ feature importances in the React frontend
 """
 cleaned_feature_names_dictionary = {
     # Home team overall metrics
-    "home_team_win_percentage": lambda game: f"The {game.home_team.name} have a win percentage of {(game.home_team_data.team_data_json.get('wins', 0) / max(1, game.home_team_data.team_data_json.get('gamesPlayed', 1))) * 100:.2f}%",
-    "home_team_loss_percentage": lambda game: f"The {game.home_team.name} have a regulation loss percentage of {(game.home_team_data.team_data_json.get('losses', 0) / max(1, game.home_team_data.team_data_json.get('gamesPlayed', 1))) * 100:.2f}%",
-    "home_team_ot_loss_percentage": lambda game: f"The {game.home_team.name} have an overtime loss percentage of {(game.home_team_data.team_data_json.get('otLosses', 0) / max(1, game.home_team_data.team_data_json.get('gamesPlayed', 1))) * 100:.2f}%",
-    "home_team_goals_for_per_game": lambda game: f"The {game.home_team.name} score an average of {(game.home_team_data.team_data_json.get('goalFor', 0) / max(1, game.home_team_data.team_data_json.get('gamesPlayed', 1))):.2f} goals per game",
-    "home_team_goals_against_per_game": lambda game: f"The {game.home_team.name} allow an average of {(game.home_team_data.team_data_json.get('goalAgainst', 0) / max(1, game.home_team_data.team_data_json.get('gamesPlayed', 1))):.2f} goals against per game",
-    "home_team_goal_differential_per_game": lambda game: f"The {game.home_team.name} have a goal differential of {(game.home_team_data.team_data_json.get('goalDifferential', 0) / max(1, game.home_team_data.team_data_json.get('gamesPlayed', 1))):.2f} per game",
+    "home_team_win_percentage": lambda game: f"The {game.home_team.name} have a win percentage of {(game.home_team_data.wins / max(1, game.home_team_data.games_played)) * 100:.2f}%",
+    "home_team_loss_percentage": lambda game: f"The {game.home_team.name} have a regulation loss percentage of {(game.home_team_data.losses / max(1, game.home_team_data.games_played)) * 100:.2f}%",
+    "home_team_ot_loss_percentage": lambda game: f"The {game.home_team.name} have an overtime loss percentage of {(game.home_team_data.ot_losses / max(1, game.home_team_data.games_played)) * 100:.2f}%",
+    "home_team_goals_for_per_game": lambda game: f"The {game.home_team.name} score an average of {(game.home_team_data.goals_for / max(1, game.home_team_data.games_played)):.2f} goals per game",
+    "home_team_goals_against_per_game": lambda game: f"The {game.home_team.name} allow an average of {(game.home_team_data.goals_against / max(1, game.home_team_data.games_played)):.2f} goals against per game",
+    "home_team_goal_differential_per_game": lambda game: f"The {game.home_team.name} have a goal differential of {(game.home_team_data.goal_differential / max(1, game.home_team_data.games_played)):.2f} per game",
 
     # Home team last 10 games data
-    "home_team_l10_win_percentage": lambda game: f"In the last 10 games, the {game.home_team.name} have a win percentage of {(game.home_team_data.team_data_json.get('l10Wins', 0) / max(1, game.home_team_data.team_data_json.get('l10GamesPlayed', 1))) * 100:.2f}%",
-    "home_team_l10_loss_percentage": lambda game: f"In the last 10 games, the {game.home_team.name} have a regulation loss percentage of {(game.home_team_data.team_data_json.get('l10Losses', 0) / max(1, game.home_team_data.team_data_json.get('l10GamesPlayed', 1))) * 100:.2f}%",
-    "home_team_l10_ot_losses": lambda game: f"The {game.home_team.name} have an overtime loss percentage of {(game.home_team_data.team_data_json.get('l10OtLosses', 0) / max(1, game.home_team_data.team_data_json.get('l10GamesPlayed', 1))) * 100:.2f}% in the last 10 games",
-    "home_team_l10_goals_for_per_game": lambda game: f"The {game.home_team.name} scored an average of {(game.home_team_data.team_data_json.get('l10GoalsFor', 0) / max(1, game.home_team_data.team_data_json.get('l10GamesPlayed', 1))):.2f} goals per game in the last 10 games",
-    "home_team_l10_goals_against_per_game": lambda game: f"The {game.home_team.name} allowed an average of {(game.home_team_data.team_data_json.get('l10GoalsAgainst', 0) / max(1, game.home_team_data.team_data_json.get('l10GamesPlayed', 1))):.2f} goals against per game in the last 10 games",
-    "home_team_l10_goal_differential_per_game": lambda game: f"The {game.home_team.name} have a goal differential of {(game.home_team_data.team_data_json.get('l10GoalDifferential', 0) / max(1, game.home_team_data.team_data_json.get('l10GamesPlayed', 1))):.2f} per game in the last 10 games",
+    "home_team_l10_win_percentage": lambda game: f"In the last 10 games, the {game.home_team.name} have a win percentage of {(game.home_team_data.l10_wins / max(1, game.home_team_data.l10_games_played)) * 100:.2f}%",
+    "home_team_l10_loss_percentage": lambda game: f"In the last 10 games, the {game.home_team.name} have a regulation loss percentage of {(game.home_team_data.l10_losses / max(1, game.home_team_data.l10_games_played)) * 100:.2f}%",
+    "home_team_l10_ot_losses": lambda game: f"The {game.home_team.name} have an overtime loss percentage of {(game.home_team_data.l10_ot_losses / max(1, game.home_team_data.l10_games_played)) * 100:.2f}% in the last 10 games",
+    "home_team_l10_goals_for_per_game": lambda game: f"The {game.home_team.name} scored an average of {(game.home_team_data.l10_goals_for / max(1, game.home_team_data.l10_games_played)):.2f} goals per game in the last 10 games",
+    "home_team_l10_goals_against_per_game": lambda game: f"The {game.home_team.name} allowed an average of {(game.home_team_data.l10_goals_against / max(1, game.home_team_data.l10_games_played)):.2f} goals against per game in the last 10 games",
+    "home_team_l10_goal_differential_per_game": lambda game: f"The {game.home_team.name} have a goal differential of {(game.home_team_data.l10_goal_differential / max(1, game.home_team_data.l10_games_played)):.2f} per game in the last 10 games",
 
     # Home team home data
-    "home_team_home_win_percentage": lambda game: f"At home, the {game.home_team.name} have a win percentage of {(game.home_team_data.team_data_json.get('homeWins', 0) / max(1, game.home_team_data.team_data_json.get('homeGamesPlayed', 1))) * 100:.2f}%",
-    "home_team_home_loss_percentage": lambda game: f"At home, the {game.home_team.name} have a regulation loss percentage of {(game.home_team_data.team_data_json.get('homeLosses', 0) / max(1, game.home_team_data.team_data_json.get('homeGamesPlayed', 1))) * 100:.2f}%",
-    "home_team_home_ot_loss_percentage": lambda game: f"At home, the {game.home_team.name} have an overtime loss percentage of {(game.home_team_data.team_data_json.get('homeOtLosses', 0) / max(1, game.home_team_data.team_data_json.get('homeGamesPlayed', 1))) * 100:.2f}%",
+    "home_team_home_win_percentage": lambda game: f"At home, the {game.home_team.name} have a win percentage of {(game.home_team_data.home_wins / max(1, game.home_team_data.home_games_played)) * 100:.2f}%",
+    "home_team_home_loss_percentage": lambda game: f"At home, the {game.home_team.name} have a regulation loss percentage of {(game.home_team_data.home_losses / max(1, game.home_team_data.home_games_played)) * 100:.2f}%",
+    "home_team_home_ot_loss_percentage": lambda game: f"At home, the {game.home_team.name} have an overtime loss percentage of {(game.home_team_data.home_ot_losses / max(1, game.home_team_data.home_games_played)) * 100:.2f}%",
 
     # Away team overall metrics
-    "away_team_win_percentage": lambda game: f"The {game.away_team.name} have a win percentage of {(game.away_team_data.team_data_json.get('wins', 0) / max(1, game.away_team_data.team_data_json.get('gamesPlayed', 1))) * 100:.2f}%",
-    "away_team_loss_percentage": lambda game: f"The {game.away_team.name} have a regulation loss percentage of {(game.away_team_data.team_data_json.get('losses', 0) / max(1, game.away_team_data.team_data_json.get('gamesPlayed', 1))) * 100:.2f}%",
-    "away_team_ot_loss_percentage": lambda game: f"The {game.away_team.name} have an overtime loss percentage of {(game.away_team_data.team_data_json.get('otLosses', 0) / max(1, game.away_team_data.team_data_json.get('gamesPlayed', 1))) * 100:.2f}%",
-    "away_team_goals_for_per_game": lambda game: f"The {game.away_team.name} score an average of {(game.away_team_data.team_data_json.get('goalFor', 0) / max(1, game.away_team_data.team_data_json.get('gamesPlayed', 1))):.2f} goals per game",
-    "away_team_goals_against_per_game": lambda game: f"The {game.away_team.name} allow an average of {(game.away_team_data.team_data_json.get('goalAgainst', 0) / max(1, game.away_team_data.team_data_json.get('gamesPlayed', 1))):.2f} goals against per game",
-    "away_team_goal_differential_per_game": lambda game: f"The {game.away_team.name} have a goal differential of {(game.away_team_data.team_data_json.get('goalDifferential', 0) / max(1, game.away_team_data.team_data_json.get('gamesPlayed', 1))):.2f} per game",
+    "away_team_win_percentage": lambda game: f"The {game.away_team.name} have a win percentage of {(game.away_team_data.wins / max(1, game.away_team_data.games_played)) * 100:.2f}%",
+    "away_team_loss_percentage": lambda game: f"The {game.away_team.name} have a regulation loss percentage of {(game.away_team_data.losses / max(1, game.away_team_data.games_played)) * 100:.2f}%",
+    "away_team_ot_loss_percentage": lambda game: f"The {game.away_team.name} have an overtime loss percentage of {(game.away_team_data.ot_losses / max(1, game.away_team_data.games_played)) * 100:.2f}%",
+    "away_team_goals_for_per_game": lambda game: f"The {game.away_team.name} score an average of {(game.away_team_data.goals_for / max(1, game.away_team_data.games_played)):.2f} goals per game",
+    "away_team_goals_against_per_game": lambda game: f"The {game.away_team.name} allow an average of {(game.away_team_data.goals_against / max(1, game.away_team_data.games_played)):.2f} goals against per game",
+    "away_team_goal_differential_per_game": lambda game: f"The {game.away_team.name} have a goal differential of {(game.away_team_data.goal_differential / max(1, game.away_team_data.games_played)):.2f} per game",
 
     # Away team last 10 games data
-    "away_team_l10_win_percentage": lambda game: f"In the last 10 games, the {game.away_team.name} have a win percentage of {(game.away_team_data.team_data_json.get('l10Wins', 0) / max(1, game.away_team_data.team_data_json.get('l10GamesPlayed', 1))) * 100:.2f}%",
-    "away_team_l10_loss_percentage": lambda game: f"In the last 10 games, the {game.away_team.name} have a regulation loss percentage of {(game.away_team_data.team_data_json.get('l10Losses', 0) / max(1, game.away_team_data.team_data_json.get('l10GamesPlayed', 1))) * 100:.2f}%",
-    "away_team_l10_ot_losses": lambda game: f"In the last 10 games, the {game.away_team.name} have an overtime loss percentage of {(game.away_team_data.team_data_json.get('l10OtLosses', 0) / max(1, game.away_team_data.team_data_json.get('l10GamesPlayed', 1))) * 100:.2f}%",
-    "away_team_l10_goals_for_per_game": lambda game: f"In the last 10 games, the {game.away_team.name} score an average of {(game.away_team_data.team_data_json.get('l10GoalsFor', 0) / max(1, game.away_team_data.team_data_json.get('l10GamesPlayed', 1))):.2f} goals per game",
-    "away_team_l10_goals_against_per_game": lambda game: f"In the last 10 games, the {game.away_team.name} allow an average of {(game.away_team_data.team_data_json.get('l10GoalsAgainst', 0) / max(1, game.away_team_data.team_data_json.get('l10GamesPlayed', 1))):.2f} goals against per game",
-    "away_team_l10_goal_differential_per_game": lambda game: f"In the last 10 games, the {game.away_team.name} have a goal differential of {(game.away_team_data.team_data_json.get('l10GoalDifferential', 0) / max(1, game.away_team_data.team_data_json.get('l10GamesPlayed', 1))):.2f} per game",
+    "away_team_l10_win_percentage": lambda game: f"In the last 10 games, the {game.away_team.name} have a win percentage of {(game.away_team_data.l10_wins / max(1, game.away_team_data.l10_games_played)) * 100:.2f}%",
+    "away_team_l10_loss_percentage": lambda game: f"In the last 10 games, the {game.away_team.name} have a regulation loss percentage of {(game.away_team_data.l10_losses / max(1, game.away_team_data.l10_games_played)) * 100:.2f}%",
+    "away_team_l10_ot_losses": lambda game: f"In the last 10 games, the {game.away_team.name} have an overtime loss percentage of {(game.away_team_data.l10_ot_losses / max(1, game.away_team_data.l10_games_played)) * 100:.2f}%",
+    "away_team_l10_goals_for_per_game": lambda game: f"In the last 10 games, the {game.away_team.name} score an average of {(game.away_team_data.l10_goals_for / max(1, game.away_team_data.l10_games_played)):.2f} goals per game",
+    "away_team_l10_goals_against_per_game": lambda game: f"In the last 10 games, the {game.away_team.name} allow an average of {(game.away_team_data.l10_goals_against / max(1, game.away_team_data.l10_games_played)):.2f} goals against per game",
+    "away_team_l10_goal_differential_per_game": lambda game: f"In the last 10 games, the {game.away_team.name} have a goal differential of {(game.away_team_data.l10_goal_differential / max(1, game.away_team_data.l10_games_played)):.2f} per game",
 
     # Away team road data
-    "away_team_road_win_percentage": lambda game: f"On the road, the {game.away_team.name} have a win percentage of {(game.away_team_data.team_data_json.get('roadWins', 0) / max(1, game.away_team_data.team_data_json.get('roadGamesPlayed', 1))) * 100:.2f}%",
-    "away_team_road_loss_percentage": lambda game: f"On the road, the {game.away_team.name} have a regulation loss percentage of {(game.away_team_data.team_data_json.get('roadLosses', 0) / max(1, game.away_team_data.team_data_json.get('roadGamesPlayed', 1))) * 100:.2f}%",
-    "away_team_road_ot_loss_percentage": lambda game: f"On the road, the {game.away_team.name} have an overtime loss percentage of {(game.away_team_data.team_data_json.get('roadOtLosses', 0) / max(1, game.away_team_data.team_data_json.get('roadGamesPlayed', 1))) * 100:.2f}%",
-    "away_team_road_goals_for_per_game": lambda game: f"On the road, the {game.away_team.name} score an average of {(game.away_team_data.team_data_json.get('roadGoalsFor', 0) / max(1, game.away_team_data.team_data_json.get('roadGamesPlayed', 1))):.2f} goals per game",
-    "away_team_road_goals_against_per_game": lambda game: f"On the road, the {game.away_team.name} allow an average of {(game.away_team_data.team_data_json.get('roadGoalsAgainst', 0) / max(1, game.away_team_data.team_data_json.get('roadGamesPlayed', 1))):.2f} goals against per game",
-    "away_team_road_goal_differential_per_game": lambda game: f"On the road, the {game.away_team.name} have a goal differential of {(game.away_team_data.team_data_json.get('roadGoalDifferential', 0) / max(1, game.away_team_data.team_data_json.get('roadGamesPlayed', 1))):.2f} per game",
+    "away_team_road_win_percentage": lambda game: f"On the road, the {game.away_team.name} have a win percentage of {(game.away_team_data.road_wins / max(1, game.away_team_data.road_games_played)) * 100:.2f}%",
+    "away_team_road_loss_percentage": lambda game: f"On the road, the {game.away_team.name} have a regulation loss percentage of {(game.away_team_data.road_losses / max(1, game.away_team_data.road_games_played)) * 100:.2f}%",
+    "away_team_road_ot_loss_percentage": lambda game: f"On the road, the {game.away_team.name} have an overtime loss percentage of {(game.away_team_data.road_ot_losses / max(1, game.away_team_data.road_games_played)) * 100:.2f}%",
+    "away_team_road_goals_for_per_game": lambda game: f"On the road, the {game.away_team.name} score an average of {(game.away_team_data.road_goals_for / max(1, game.away_team_data.road_games_played)):.2f} goals per game",
+    "away_team_road_goals_against_per_game": lambda game: f"On the road, the {game.away_team.name} allow an average of {(game.away_team_data.road_goals_against / max(1, game.away_team_data.road_games_played)):.2f} goals against per game",
+    "away_team_road_goal_differential_per_game": lambda game: f"On the road, the {game.away_team.name} have a goal differential of {(game.away_team_data.road_goal_differential / max(1, game.away_team_data.road_games_played)):.2f} per game",
 
     # Label for outcome
     "home_team_win": lambda game: "The home team won" if game.home_team_win else "The home team lost",
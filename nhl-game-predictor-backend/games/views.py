@@ -1,7 +1,7 @@
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.exceptions import APIException, NotFound, ParseError
 from .models import Game, GamePrediction
 from .serializers import GameSerializer, GamePredictionSerializer
 from django.utils import timezone
@@ -9,6 +9,16 @@ from rest_framework.permissions import AllowAny
 from predictor.ml_models.predict_model import predict_games
 from .permissions import FetchGamesFromNHLAPIByDatePermission, KeepActivePermission, PredictGamesTodayPermission, UpdateCompletedGamesPermission
 from .data_loader import fetch_games_for_date, update_completed_games
+from .nhl_api import NHLAPIError
+
+class NHLAPIUnavailable(APIException):
+    """
+    raised by the views that request the NHL API when it does not respond
+    successfully, even after the client has retried the request
+    """
+    status_code = 503
+    default_detail = "The NHL API is currently unavailable. Please try again later."
+    default_code = "nhl_api_unavailable"
 
 class GameDetailView(generics.RetrieveAPIView):
     """
@@ -82,7 +92,10 @@ class GamePredictionListByDateView(generics.ListAPIView):
         function to get the game predictions on the specified date
         """
         date = self.get_date()
-        predictions = GamePrediction.objects.filter(game__game_date=date)
+        # the feature descriptions read the statistic columns of each game's TeamData
+        predictions = GamePrediction.objects.filter(game__game_date=date).select_related(
+            "model", "game__home_team", "game__away_team", "game__home_team_data", "game__away_team_data"
+        )
         return predictions
 
     def get_games(self):
@@ -132,7 +145,10 @@ class PredictGamesTodayView(APIView):
             return Response(serializer.data)
         
         # otherwise, predictions haven't been made yet for the games today, 
-        todays_predictions = predict_games(games_today)
+        try:
+            todays_predictions = predict_games(games_today)
+        except NHLAPIError:
+            raise NHLAPIUnavailable()
         serializer = GamePredictionSerializer(todays_predictions, many=True)
         return Response(serializer.data)
     
@@ -180,8 +196,12 @@ class FetchGamesFromNHLAPIByDateView(generics.ListAPIView):
         
     def get_queryset(self):
         date = self.get_date()
-        games = fetch_games_for_date(date=date,
-                                     get_team_data=True)
+        try:
+            games = fetch_games_for_date(date=date,
+                                         get_team_data=True)
+        except NHLAPIError:
+            # the games of the date are only requested when none of them are stored yet
+            raise NHLAPIUnavailable()
 
         # there are no games scheduled on the date, so raise an error saying so
         if len(games) == 0:
@@ -200,7 +220,10 @@ class UpdateCompletedGamesView(generics.ListAPIView):
     serializer_class = GameSerializer
         
     def get_queryset(self):
-        games = update_completed_games()
+        try:
+            games = update_completed_games()
+        except NHLAPIError:
+            raise NHLAPIUnavailable()
 
         # no games were updated, so raise an error saying so
         if len(games) == 0:
@@ -161,8 +161,36 @@ STATIC_URL = '/static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-# default base NHL API URL for the new NHL API
-NHL_API_BASE_URL = "https://api-web.nhle.com/v1/"
+# default base NHL API URL for the new NHL API. both base URLs can be pointed at a local
+# stand-in for the NHL API (see the run_fake_nhl_api management command)
+NHL_API_BASE_URL = os.getenv("NHL_API_BASE_URL", "https://api-web.nhle.com/v1/")
+
+# base URL for the NHL stats API (franchises and teams)
+NHL_STATS_API_BASE_URL = os.getenv("NHL_STATS_API_BASE_URL", "https://api.nhle.com/stats/rest/en/")
+
+# connection settings for the pooled NHL API client. HTTP/2 requires httpx[http2] to be installed
+NHL_API_TIMEOUT = float(os.getenv("NHL_API_TIMEOUT", "10"))
+NHL_API_HTTP2 = os.getenv("NHL_API_HTTP2", "False") == "True"
+NHL_API_MAX_CONNECTIONS = int(os.getenv("NHL_API_MAX_CONNECTIONS", "20"))
+NHL_API_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("NHL_API_MAX_KEEPALIVE_CONNECTIONS", "10"))
+NHL_API_KEEPALIVE_EXPIRY = float(os.getenv("NHL_API_KEEPALIVE_EXPIRY", "30"))
+
+# on-disk cache of NHL API responses. responses for dates at least two days in the past (or
+# with only final games) never expire, while all other responses expire after NHL_API_CACHE_TTL seconds. in offline mode, only cached
+# responses are served and no requests are made to the NHL API
+NHL_API_CACHE_ENABLED = os.getenv("NHL_API_CACHE_ENABLED", "True") == "True"
+NHL_API_CACHE_DIR = os.getenv("NHL_API_CACHE_DIR", os.path.join(BASE_DIR, "nhl_api_cache"))
+NHL_API_CACHE_TTL = float(os.getenv("NHL_API_CACHE_TTL", "600"))
+NHL_API_OFFLINE = os.getenv("NHL_API_OFFLINE", "False") == "True"
+
+# every NHL API request shares a token bucket rate limit of NHL_API_REQUESTS_PER_SECOND with
+# bursts of up to NHL_API_BURST requests. transient failures (429 and 5xx responses, connection
+# errors) are retried up to NHL_API_MAX_RETRIES times with jittered exponential backoff
+NHL_API_REQUESTS_PER_SECOND = float(os.getenv("NHL_API_REQUESTS_PER_SECOND", "10"))
+NHL_API_BURST = int(os.getenv("NHL_API_BURST", "10"))
+NHL_API_MAX_RETRIES = int(os.getenv("NHL_API_MAX_RETRIES", "4"))
+NHL_API_BACKOFF_BASE = float(os.getenv("NHL_API_BACKOFF_BASE", "0.5"))
+NHL_API_BACKOFF_MAX = float(os.getenv("NHL_API_BACKOFF_MAX", "30"))
 
 # access token for calling PredictGamesTodayView REST API endpoint
 PREDICT_GAMES_TODAY_ACCESS_TOKEN = os.getenv("PREDICT_GAMES_TODAY_ACCESS_TOKEN", "")
@@ -174,4 +202,23 @@ KEEP_ACTIVE_ACCESS_TOKEN = os.getenv("KEEP_ACTIVE_ACCESS_TOKEN", "")
 FETCH_GAMES_TOKEN = os.getenv("FETCH_GAMES_TOKEN", "")
 
 # access token for calling UpdateCompletedGamesPermission REST API endpoint
-UPDATE_COMPLETED_GAMES_TOKEN = os.getenv("UPDATE_COMPLETED_GAMES_TOKEN", "")
\ No newline at end of file
+UPDATE_COMPLETED_GAMES_TOKEN = os.getenv("UPDATE_COMPLETED_GAMES_TOKEN", "")
+
+# maximum number of concurrent requests made to the NHL API when backfilling games
+NHL_API_MAX_CONCURRENT_REQUESTS = int(os.getenv("NHL_API_MAX_CONCURRENT_REQUESTS", "8"))
+
+# maximum number of dates whose league standings are memoized in memory while loading games
+NHL_API_STANDINGS_CACHE_SIZE = int(os.getenv("NHL_API_STANDINGS_CACHE_SIZE", "512"))
+
+# number of games written per transaction by the streaming ingestion pipeline
+NHL_API_PIPELINE_BATCH_SIZE = int(os.getenv("NHL_API_PIPELINE_BATCH_SIZE", "500"))
+
+# maximum number of fetched units (a week of the schedule, or a team's season) waiting to be written by the streaming ingestion pipeline
+NHL_API_PIPELINE_QUEUE_SIZE = int(os.getenv("NHL_API_PIPELINE_QUEUE_SIZE", "16"))
+
+# source of the league standings that TeamData is created from: "api" requests the NHL API standings endpoint, and "local" computes them from the stored games.
+# with "local", games are loaded without TeamData and their standings are rebuilt once they are stored (see the rebuild_standings command)
+NHL_STANDINGS_SOURCE = os.getenv("NHL_STANDINGS_SOURCE", "api")
+
+# seconds after which the in-process index of teams, franchises and seasons is reloaded, so reference data written by another process is picked up
+REFERENCE_DATA_TTL = float(os.getenv("REFERENCE_DATA_TTL", "60"))
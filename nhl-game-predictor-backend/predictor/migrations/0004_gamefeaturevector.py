@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0037_teamdata_stat_columns'),
+        ('predictor', '0003_predictionmodel_trained_seasons'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameFeatureVector',
+            fields=[
+                ('game', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='feature_vector', serialize=False, to='games.game')),
+                ('features', models.JSONField(default=dict)),
+            ],
+        ),
+    ]
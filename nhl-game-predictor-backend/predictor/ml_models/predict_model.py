@@ -7,12 +7,14 @@ import pickle
 import pandas as pd
 
 from django.db import transaction
-from games.models import Game, GamePrediction, TeamData
-from predictor.ml_models.utils import GameDataFrameEntry, one_hot_encode_game_df
-from predictor.models import PredictionModel
+from games.models import Game, GamePrediction
+from predictor.ml_models.utils import one_hot_encode_game_df, update_game_feature_vectors
+from predictor.models import PredictionModel, GameFeatureVector
 from predictor.ml_models.train_model import create_seasons_dataframe, create_training_data
 from lime.lime_tabular import LimeTabularExplainer
-from games.data_loader import load_team_data_for_date_from_api
+from games.data_loader import load_team_data_for_dates_from_api, upsert_team_data
+from collections import defaultdict
+from datetime import timedelta
 from django.db.models.query import QuerySet
 
 import re
@@ -43,12 +45,13 @@ def load_random_forest_model():
     
     return model, latest_model
 
-def get_top_features(game_data_frame_entry : GameDataFrameEntry, game_data_df : pd.DataFrame, model, training_features : pd.DataFrame) -> dict:
+def get_top_features(game : Game, game_features : dict, game_data_df : pd.DataFrame, model, training_features : pd.DataFrame) -> dict:
     """
-    get the top 5 features driving the prediction outcome for a specific game
+    get the top 5 features driving the prediction outcome for a specific game,
+    given the game's feature vector (see GameFeatureVector)
     """
 
-    print(f"predicting for game {game_data_frame_entry.game}")
+    print(f"predicting for game {game}")
 
     # use lime explainer. class_names is the label we're trying to predict
     explainer = LimeTabularExplainer(
@@ -71,7 +74,7 @@ def get_top_features(game_data_frame_entry : GameDataFrameEntry, game_data_df :
                           key=lambda top_feature: top_feature[1],
                           reverse=True)
     
-    game_feature_values = game_data_frame_entry.to_dict()
+    game_feature_values = game_features
 
     cleaned_features = set()
 
@@ -90,7 +93,7 @@ def get_top_features(game_data_frame_entry : GameDataFrameEntry, game_data_df :
 
                 if is_home_team_feature:
                     # we only record the home team value, and the corresponding feature importance
-                    home_team_id = game_data_frame_entry.game.home_team.franchise.pk
+                    home_team_id = game.home_team.franchise.pk
                     cleaned_features.add((f"home_team_{home_team_id}", importance_value))
 
                 # case 2: away_team_{id}
@@ -98,21 +101,21 @@ def get_top_features(game_data_frame_entry : GameDataFrameEntry, game_data_df :
 
                 if is_away_team_feature:
                     # we only record the away team value, and the corresponding feature importance
-                    away_team_id = game_data_frame_entry.game.away_team.franchise.pk
+                    away_team_id = game.away_team.franchise.pk
                     cleaned_features.add((f"away_team_{away_team_id}", importance_value))
 
                 # case 3: game_day_of_week_{day_index}
                 is_game_day_of_week_feature = GAME_DAY_OF_WEEK_REGEX.match(token)
 
                 if is_game_day_of_week_feature:
-                    game_day_of_week =  game_data_frame_entry.game.game_date.weekday()
+                    game_day_of_week =  game.game_date.weekday()
                     cleaned_features.add((f"game_day_of_week_{game_day_of_week}", importance_value))
 
                 # case 4: game_month_{month_index}
                 is_game_month_feature = GAME_MONTH_REGEX.match(token)
 
                 if is_game_month_feature:
-                    game_month = game_data_frame_entry.game.game_date.month
+                    game_month = game.game_date.month
                     cleaned_features.add((f"game_month_{game_month}", importance_value))
 
             else:
@@ -127,13 +130,13 @@ def get_top_features(game_data_frame_entry : GameDataFrameEntry, game_data_df :
         if key in game_feature_values:
             value = game_feature_values[key]
         elif key.startswith("game_day_of_week_"):
-            value = game_data_frame_entry.game.game_date.weekday()
+            value = game.game_date.weekday()
         elif key.startswith("game_month_"):
-            value = game_data_frame_entry.game.game_date.month
+            value = game.game_date.month
         elif key.startswith("home_team_"):
-            value = game_data_frame_entry.game.home_team.franchise.pk
+            value = game.home_team.franchise.pk
         elif key.startswith("away_team_"):
-            value = game_data_frame_entry.game.away_team.franchise.pk
+            value = game.away_team.franchise.pk
         else:
             continue
         top_features_dictionary[key] = [value, importance_value]
@@ -145,9 +148,9 @@ def predict_game_outcome(game : Game, model, training_features : pd.DataFrame) -
     predict the outcome of a game using the latest Random Forest model.
     """
    
-    # prepare game data for dataframe and prediction
-    game_data_frame_entry = GameDataFrameEntry(game)
-    game_data_df = pd.DataFrame([game_data_frame_entry.to_dict()])
+    # prepare game data for dataframe and prediction from the game's stored feature vector
+    game_features = game.feature_vector.features
+    game_data_df = pd.DataFrame([game_features])
 
     # one hot encode the dataframe
     game_data_df = one_hot_encode_game_df(game_data_df=game_data_df)
@@ -162,7 +165,8 @@ def predict_game_outcome(game : Game, model, training_features : pd.DataFrame) -
     confidence = max(predicted_probability)
     predicted_home_team_win = True if prediction == 1 else False
 
-    top_features = get_top_features(game_data_frame_entry=game_data_frame_entry,
+    top_features = get_top_features(game=game,
+                                    game_features=game_features,
                                     game_data_df=game_data_df,
                                     model=model,
                                     training_features=training_features)
@@ -200,39 +204,41 @@ def predict_games(games : QuerySet[Game]) -> list:
     # get training features
     training_features, _, _, _= create_training_data(seasons_dataframe)
 
-    predictions = []
-    team_data = []
-    games_data = []
+    games = list(games.select_related("home_team", "away_team"))
+
+    # the TeamData for every game is built from one standings snapshot per date
+    team_abbreviations_by_date = defaultdict(set)
     for game in games:
-        home_team_data = load_team_data_for_date_from_api(game.home_team, game.game_date)
-        away_team_data = load_team_data_for_date_from_api(game.away_team, game.game_date)
-        game.home_team_data = home_team_data
-        game.away_team_data = away_team_data
+        data_capture_date = game.game_date - timedelta(days=1)
+        team_abbreviations_by_date[data_capture_date].update([game.home_team.abbreviation, game.away_team.abbreviation])
+
+    team_data_map, team_data_to_create = load_team_data_for_dates_from_api(team_abbreviations_by_date)
+
+    # need to first create team data before bulk_updating the Games. the upsert sets the
+    # primary key and the statistic columns of each TeamData, even if it was created concurrently
+    upsert_team_data(team_data_to_create)
+
+    for game in games:
+        data_capture_date = game.game_date - timedelta(days=1)
+        game.home_team_data = team_data_map.get((game.home_team.abbreviation, data_capture_date))
+        game.away_team_data = team_data_map.get((game.away_team.abbreviation, data_capture_date))
+
+    if games:
+        Game.objects.bulk_update(games, 
+                                 fields=["home_team_data", "away_team_data"])
 
-        if home_team_data is not None:
-            team_data.append(home_team_data)
-        
-        if away_team_data is not None:
-            team_data.append(away_team_data)
+    # the feature vectors are computed from the TeamData written above, and read back in a single query
+    update_game_feature_vectors(games=games)
+    feature_vectors = GameFeatureVector.objects.in_bulk([game.id for game in games])
 
-        games_data.append(game)
+    predictions = []
+    for game in games:
+        game.feature_vector = feature_vectors[game.id]
 
         game_prediction = predict_game_outcome(game=game,
                                                model=model,
                                                training_features=training_features)
         predictions.append(game_prediction)
-
-    # need to first create team data before bulk_updating the Games
-    if team_data:
-        TeamData.objects.bulk_create(team_data, ignore_conflicts=True)
-
-        for td in team_data:
-            if td.id is None:
-                td.id = TeamData.objects.get(team=td.team, data_capture_date=td.data_capture_date).id
-    
-    if games_data:
-        Game.objects.bulk_update(games_data, 
-                                 fields=["home_team_data", "away_team_data"])
     
     return predictions
 
@@ -3,15 +3,14 @@ import django
 import pandas as pd
 from django.db import transaction
 from django.db.models import Max
-from predictor.models import PredictionModel
-from games.models import Game, Season
+from predictor.models import PredictionModel, GameFeatureVector
+from games.models import Season
 from django.utils import timezone
 import pickle
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
-from predictor.ml_models.utils import GameDataFrameEntry
 from predictor.ml_models.utils import one_hot_encode_game_df
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "nhl_game_predictor_backend")
@@ -45,19 +44,13 @@ def create_seasons_dataframe(past_seasons : list):
     creates a pandas dataframe of all games that took place in the
     list of seasons in past_seasons array of season IDs
     """
-    # fetch all Game records for the specified past seasons
-    games = Game.objects.filter(
-        game_json__season__in=past_seasons
-    ).exclude(home_team_data=None, away_team_data=None)
-
-    # create GameDataFrameEntry instances for each game
-    game_dataframe_entries = [GameDataFrameEntry(game) for game in games]
-
-    # convert the list of entries to a list of dictionaries
-    game_data_dicts = [entry.to_dict() for entry in game_dataframe_entries]
+    # the stored feature vectors of every game with TeamData are read in a single query
+    game_data_dicts = GameFeatureVector.objects.filter(
+        game__season_id__in=past_seasons
+    ).exclude(game__home_team_data=None, game__away_team_data=None).order_by("game_id").values_list("features", flat=True)
 
     # create a DataFrame from the list of dictionaries
-    game_data_df = pd.DataFrame(game_data_dicts)
+    game_data_df = pd.DataFrame(list(game_data_dicts))
 
     # apply one-hot encoding
     game_data_df = one_hot_encode_game_df(game_data_df)
@@ -1,10 +1,13 @@
-from games.models import Game, Franchise
+from games.models import Game, Franchise, TeamData
 import os
 import django
 import pandas as pd
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "nhl_game_predictor_backend")
 django.setup()
 
+from django.db.models import Q
+from predictor.models import GameFeatureVector
+
 CATEGORICAL_FEATURE_NAMES = [
         "home_team",
         "away_team",
@@ -31,6 +34,9 @@ GAME_DAYS_OF_WEEK = list(range(7))
 
 GAME_MONTHS = list(range(1, 13))
 
+# number of feature vectors computed and written at once by update_game_feature_vectors
+FEATURE_VECTOR_BATCH_SIZE = 2000
+
 def categorical_feature_column_name_prefix(categorical_feature_name, categorical_feature_value):
     """
     creates a name for a categorical feature column based on the name of the feature
@@ -78,10 +84,10 @@ class GameDataFrameEntry:
     def __init__(self, game: Game):
         self.game = game
         game_json = game.game_json
-        home_team_data = game.home_team_data
-        home_team_data_json = {} if home_team_data is None else home_team_data.team_data_json
-        away_team_data = game.away_team_data
-        away_team_data_json = {} if away_team_data is None else away_team_data.team_data_json
+
+        # games without TeamData have every statistic at 0
+        home_team_data = game.home_team_data if game.home_team_data is not None else TeamData()
+        away_team_data = game.away_team_data if game.away_team_data is not None else TeamData()
         
         # general game data
         self.home_team = game.home_team.franchise.pk
@@ -92,62 +98,62 @@ class GameDataFrameEntry:
         self.game_day_of_week = game.game_date.weekday()
 
         # home team data (using rates)
-        home_team_games_played = home_team_data_json.get("gamesPlayed", 1) if home_team_data_json.get("gamesPlayed", 1) != 0 else 1
-        self.home_team_win_percentage = home_team_data_json.get("wins", 0) / home_team_games_played
-        self.home_team_loss_percentage = home_team_data_json.get("losses", 0) / home_team_games_played
-        self.home_team_ot_loss_percentage = home_team_data_json.get("otLosses", 0) / home_team_games_played
-        self.home_team_goals_for_per_game = home_team_data_json.get("goalFor", 0) / home_team_games_played
-        self.home_team_goals_against_per_game = home_team_data_json.get("goalAgainst", 0) / home_team_games_played
-        self.home_team_goal_differential_per_game = home_team_data_json.get("goalDifferential", 0) / home_team_games_played
-
-
-        home_team_l10_games_played = home_team_data_json.get("l10GamesPlayed", 1) if home_team_data_json.get("l10GamesPlayed") != 0 else 1
-        self.home_team_l10_win_percentage = home_team_data_json.get("l10Wins", 0) / home_team_l10_games_played
-        self.home_team_l10_loss_percentage = home_team_data_json.get("l10Losses", 0) / home_team_l10_games_played
-        self.home_team_l10_ot_losses = home_team_data_json.get("l10OtLosses", 0) / home_team_l10_games_played
-        self.home_team_l10_goals_for_per_game = home_team_data_json.get("l10GoalsFor", 0) / home_team_l10_games_played
-        self.home_team_l10_goals_against_per_game = home_team_data_json.get("l10GoalsAgainst", 0) / home_team_l10_games_played
-        self.home_team_l10_goal_differential_per_game = home_team_data_json.get("l10GoalDifferential", 0) / home_team_l10_games_played
+        home_team_games_played = max(1, home_team_data.games_played)
+        self.home_team_win_percentage = home_team_data.wins / home_team_games_played
+        self.home_team_loss_percentage = home_team_data.losses / home_team_games_played
+        self.home_team_ot_loss_percentage = home_team_data.ot_losses / home_team_games_played
+        self.home_team_goals_for_per_game = home_team_data.goals_for / home_team_games_played
+        self.home_team_goals_against_per_game = home_team_data.goals_against / home_team_games_played
+        self.home_team_goal_differential_per_game = home_team_data.goal_differential / home_team_games_played
+
+
+        home_team_l10_games_played = max(1, home_team_data.l10_games_played)
+        self.home_team_l10_win_percentage = home_team_data.l10_wins / home_team_l10_games_played
+        self.home_team_l10_loss_percentage = home_team_data.l10_losses / home_team_l10_games_played
+        self.home_team_l10_ot_losses = home_team_data.l10_ot_losses / home_team_l10_games_played
+        self.home_team_l10_goals_for_per_game = home_team_data.l10_goals_for / home_team_l10_games_played
+        self.home_team_l10_goals_against_per_game = home_team_data.l10_goals_against / home_team_l10_games_played
+        self.home_team_l10_goal_differential_per_game = home_team_data.l10_goal_differential / home_team_l10_games_played
 
         # home team home data
-        home_games_played = home_team_data_json.get("homeGamesPlayed", 1) if home_team_data_json.get("homeGamesPlayed", 1) != 0 else 1
-        self.home_team_home_win_percentage = home_team_data_json.get("homeWins", 0) / home_games_played 
-        self.home_team_home_loss_percentage = home_team_data_json.get("homeLosses", 0) / home_games_played 
-        self.home_team_home_ot_loss_percentage = home_team_data_json.get("homeOtLosses", 0) / home_games_played 
-        self.home_team_home_goals_for_per_game = home_team_data_json.get("homeGoalsFor", 0) / home_games_played 
-        self.home_team_home_goals_against_per_game = home_team_data_json.get("homeGoalsAgainst", 0) / home_games_played 
-        self.home_team_home_goal_differential_per_game = home_team_data_json.get("homeGoalDifferent", 0) / home_games_played
+        home_games_played = max(1, home_team_data.home_games_played)
+        self.home_team_home_win_percentage = home_team_data.home_wins / home_games_played
+        self.home_team_home_loss_percentage = home_team_data.home_losses / home_games_played
+        self.home_team_home_ot_loss_percentage = home_team_data.home_ot_losses / home_games_played
+        self.home_team_home_goals_for_per_game = home_team_data.home_goals_for / home_games_played
+        self.home_team_home_goals_against_per_game = home_team_data.home_goals_against / home_games_played
+        self.home_team_home_goal_differential_per_game = home_team_data.home_goal_differential / home_games_played
 
 
         # away team data (using rates)
-        away_team_games_played = away_team_data_json.get("gamesPlayed", 1) if away_team_data_json.get("gamesPlayed", 1) != 0 else 1
-        self.away_team_win_percentage = away_team_data_json.get("wins", 0) / away_team_games_played 
-        self.away_team_loss_percentage = away_team_data_json.get("losses", 0) / away_team_games_played 
-        self.away_team_ot_loss_percentage = away_team_data_json.get("otLosses", 0) / away_team_games_played 
-        self.away_team_goals_for_per_game = away_team_data_json.get("goalFor", 0) / away_team_games_played 
-        self.away_team_goals_against_per_game = away_team_data_json.get("goalAgainst", 0) / away_team_games_played 
-        self.away_team_goal_differential_per_game = away_team_data_json.get("goalDifferential", 0) / away_team_games_played 
-
-
-        away_team_l10_games_played = away_team_data_json.get("l10GamesPlayed", 1) if away_team_data_json.get("l10GamesPlayed") != 0 else 1
-        self.away_team_l10_win_percentage = away_team_data_json.get("l10Wins", 0) / away_team_l10_games_played
-        self.away_team_l10_loss_percentage = away_team_data_json.get("l10Losses", 0) / away_team_l10_games_played
-        self.away_team_l10_ot_losses = away_team_data_json.get("l10OtLosses", 0) / away_team_l10_games_played
-        self.away_team_l10_goals_for_per_game = away_team_data_json.get("l10GoalsFor", 0) / away_team_l10_games_played
-        self.away_team_l10_goals_against_per_game = away_team_data_json.get("l10GoalsAgainst", 0) / away_team_l10_games_played
-        self.away_team_l10_goal_differential_per_game = away_team_data_json.get("l10GoalDifferential", 0) / away_team_l10_games_played
+        away_team_games_played = max(1, away_team_data.games_played)
+        self.away_team_win_percentage = away_team_data.wins / away_team_games_played
+        self.away_team_loss_percentage = away_team_data.losses / away_team_games_played
+        self.away_team_ot_loss_percentage = away_team_data.ot_losses / away_team_games_played
+        self.away_team_goals_for_per_game = away_team_data.goals_for / away_team_games_played
+        self.away_team_goals_against_per_game = away_team_data.goals_against / away_team_games_played
+        self.away_team_goal_differential_per_game = away_team_data.goal_differential / away_team_games_played
+
+
+        away_team_l10_games_played = max(1, away_team_data.l10_games_played)
+        self.away_team_l10_win_percentage = away_team_data.l10_wins / away_team_l10_games_played
+        self.away_team_l10_loss_percentage = away_team_data.l10_losses / away_team_l10_games_played
+        self.away_team_l10_ot_losses = away_team_data.l10_ot_losses / away_team_l10_games_played
+        self.away_team_l10_goals_for_per_game = away_team_data.l10_goals_for / away_team_l10_games_played
+        self.away_team_l10_goals_against_per_game = away_team_data.l10_goals_against / away_team_l10_games_played
+        self.away_team_l10_goal_differential_per_game = away_team_data.l10_goal_differential / away_team_l10_games_played
 
         # away team road data
-        away_games_played = away_team_data_json.get("roadGamesPlayed", 1) if away_team_data_json.get("roadGamesPlayed", 1) != 0 else 1
-        self.away_team_road_win_percentage = away_team_data_json.get("roadWins", 0) / away_games_played 
-        self.away_team_road_loss_percentage = away_team_data_json.get("roadLosses", 0) / away_games_played 
-        self.away_team_road_ot_loss_percentage = away_team_data_json.get("roadOtLosses", 0) / away_games_played 
-        self.away_team_road_goals_for_per_game = away_team_data_json.get("roadGoalsFor", 0) / away_games_played 
-        self.away_team_road_goals_against_per_game = away_team_data_json.get("roadGoalsAgainst", 0) / away_games_played 
-        self.away_team_road_goal_differential_per_game = away_team_data_json.get("roadGoalDifferential", 0) / away_games_played 
+        away_games_played = max(1, away_team_data.road_games_played)
+        self.away_team_road_win_percentage = away_team_data.road_wins / away_games_played
+        self.away_team_road_loss_percentage = away_team_data.road_losses / away_games_played
+        self.away_team_road_ot_loss_percentage = away_team_data.road_ot_losses / away_games_played
+        self.away_team_road_goals_for_per_game = away_team_data.road_goals_for / away_games_played
+        self.away_team_road_goals_against_per_game = away_team_data.road_goals_against / away_games_played
+        self.away_team_road_goal_differential_per_game = away_team_data.road_goal_differential / away_games_played
 
         # labels
-        self.home_team_win = 1 if game.winning_team == game.home_team else 0
+        self.home_team_win = 1 if game.winning_team_id == game.home_team_id else 0
 
 
     def to_dict(self):
@@ -210,4 +216,56 @@ class GameDataFrameEntry:
 
             # label is a simple binary decision of did the home team win or not
             "home_team_win": self.home_team_win,
-        }
\ No newline at end of file
+        }
+
+def update_game_feature_vectors(games : list = None, team_data : list = None, seasons : list = None, missing_only : bool = False) -> int:
+    """
+    recomputes the stored feature vectors (see GameFeatureVector) of the provided games and of the
+    games that reference the provided TeamData. when neither is provided, the vectors of every game
+    of the provided seasons (or of every game) are recomputed. missing_only restricts the games to
+    those without a vector. the games are read back from the database along with their teams and
+    TeamData, and the vectors are written in batches of INSERT ... ON CONFLICT (game) DO UPDATE
+    statements. returns the number of vectors written
+    """
+    # features are keyed by franchise, so games of teams without a franchise have no features
+    games_to_vectorize = Game.objects.filter(
+        home_team__franchise__isnull=False,
+        away_team__franchise__isnull=False
+    ).select_related(
+        "home_team__franchise", "away_team__franchise", "home_team_data", "away_team_data"
+    )
+
+    if games is not None or team_data is not None:
+        game_ids = [game.id for game in games or []]
+        team_data_ids = [team_data_instance.pk for team_data_instance in team_data or [] if team_data_instance is not None and team_data_instance.pk is not None]
+        if not game_ids and not team_data_ids:
+            return 0
+
+        games_to_vectorize = games_to_vectorize.filter(Q(id__in=game_ids) | Q(home_team_data__in=team_data_ids) | Q(away_team_data__in=team_data_ids))
+    elif seasons is not None:
+        games_to_vectorize = games_to_vectorize.filter(season_id__in=seasons)
+
+    if missing_only:
+        games_to_vectorize = games_to_vectorize.filter(feature_vector__isnull=True)
+
+    vectors_written = 0
+    feature_vectors = []
+    for game in games_to_vectorize.order_by("id").iterator(chunk_size=FEATURE_VECTOR_BATCH_SIZE):
+        feature_vectors.append(GameFeatureVector(game=game, features=GameDataFrameEntry(game).to_dict()))
+
+        if len(feature_vectors) == FEATURE_VECTOR_BATCH_SIZE:
+            vectors_written += len(write_game_feature_vectors(feature_vectors))
+            feature_vectors = []
+
+    vectors_written += len(write_game_feature_vectors(feature_vectors))
+
+    return vectors_written
+
+def write_game_feature_vectors(feature_vectors : list) -> list:
+    if not feature_vectors:
+        return []
+
+    return GameFeatureVector.objects.bulk_create(feature_vectors,
+                                                 update_conflicts=True,
+                                                 unique_fields=["game"],
+                                                 update_fields=["features"])
@@ -1,5 +1,5 @@
 from django.db import models
-from games.models import Season
+from games.models import Game, Season
 
 class PredictionModel(models.Model):
     """
@@ -15,3 +15,19 @@ class PredictionModel(models.Model):
     def __str__(self):
         # eg: Random Forest (v.2.3)
         return f"{self.name} (Version: {self.version})"
+
+
+class GameFeatureVector(models.Model):
+    """
+    class to represent the features of a game that the machine learning model is trained on and
+    predicts from, exactly as GameDataFrameEntry.to_dict defines them (including the home_team_win
+    label). the vectors are recomputed by update_game_feature_vectors whenever a game or its TeamData
+    is written, so training sets and predictions are read from this table rather than rebuilt per game
+    """
+    game = models.OneToOneField(Game, on_delete=models.CASCADE, primary_key=True, related_name="feature_vector")
+
+    # maps each feature name to its value, before one-hot encoding
+    features = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Features of Game {self.game_id}"
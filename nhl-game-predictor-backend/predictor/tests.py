@@ -1,3 +1,55 @@
-from django.test import TestCase
+from io import StringIO
+from datetime import timedelta
+from django.core.management import call_command
+from games.models import Game, TeamData
+from games.tests import FakeNHLAPITestCase
+from predictor.models import GameFeatureVector
+from predictor.ml_models.utils import GameDataFrameEntry, update_game_feature_vectors
 
-# Create your tests here.
+
+class GameFeatureVectorTests(FakeNHLAPITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for week in (3, 4):
+            cls.load_week(week)
+
+    def computed_features(self, game_id : int) -> dict:
+        game = Game.objects.select_related("home_team__franchise", "away_team__franchise", "home_team_data", "away_team_data").get(id=game_id)
+        return GameDataFrameEntry(game).to_dict()
+
+    def test_vectors_are_written_with_games(self):
+        self.assertEqual(GameFeatureVector.objects.count(), Game.objects.count())
+
+        for feature_vector in GameFeatureVector.objects.all():
+            self.assertEqual(feature_vector.features, self.computed_features(feature_vector.game_id))
+
+    def test_vectors_are_recomputed_with_team_data(self):
+        game = Game.objects.order_by("-game_date", "id").first()
+        TeamData.objects.filter(pk=game.home_team_data_id).update(wins=0, losses=0)
+        home_team_data = TeamData.objects.get(pk=game.home_team_data_id)
+
+        self.assertEqual(update_game_feature_vectors(team_data=[home_team_data]),
+                         Game.objects.filter(home_team_data=home_team_data).count() + Game.objects.filter(away_team_data=home_team_data).count())
+
+        features = GameFeatureVector.objects.get(game=game).features
+        self.assertEqual(features["home_team_win_percentage"], 0)
+        self.assertEqual(features, self.computed_features(game.id))
+
+    def test_only_missing_vectors_are_written(self):
+        first_week_end = Game.objects.order_by("game_date").first().game_date + timedelta(days=6)
+        missing_game_ids = set(Game.objects.filter(game_date__lte=first_week_end).values_list("id", flat=True))
+        GameFeatureVector.objects.filter(game_id__in=missing_game_ids).delete()
+
+        self.assertEqual(update_game_feature_vectors(missing_only=True), len(missing_game_ids))
+        self.assertEqual(update_game_feature_vectors(missing_only=True), 0)
+        self.assertEqual(GameFeatureVector.objects.count(), Game.objects.count())
+
+    def test_update_feature_vectors_command(self):
+        GameFeatureVector.objects.all().delete()
+        output = StringIO()
+
+        call_command("update_feature_vectors", "--missing", stdout=output)
+
+        self.assertIn(f"Updated the feature vectors of {Game.objects.count()} games", output.getvalue())
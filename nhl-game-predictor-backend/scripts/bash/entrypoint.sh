@@ -9,6 +9,9 @@ set -e
 poetry run python manage.py makemigrations --noinput
 poetry run python manage.py migrate --noinput
 
+# compute the feature vectors of games that do not have one yet (e.g. after GameFeatureVector was added)
+poetry run python manage.py update_feature_vectors --missing
+
 # collect static files
 poetry run python manage.py collectstatic --noinput
 
@@ -4,9 +4,14 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# a single pooled client is shared by every ServerPinger, so repeated pings reuse connections
+client = httpx.Client(timeout=120,
+                      limits=httpx.Limits(max_keepalive_connections=5, keepalive_expiry=60))
+
 class ServerPinger:
-  def __init__(self, url: str, token_env_var: str, header_name: str, params: dict = None):
+  def __init__(self, url: str, token_env_var: str, header_name: str, params: dict = None, client: httpx.Client = client):
     self.url = url
+    self.client = client
     self.token = os.getenv(token_env_var, "")
     self.header_name = header_name
     self.params = params or {}
@@ -17,7 +22,7 @@ class ServerPinger:
   def ping(self):
     headers = {self.header_name: self.token}
     try:
-      response = httpx.get(self.url, headers=headers, params=self.params, timeout=120)
+      response = self.client.get(self.url, headers=headers, params=self.params)
       if response.status_code == 200:
         print(f"Successfully pinged {response.url}")
       else: